@@ -0,0 +1,4 @@
+"""Benchmarks for meltdown, run them from the repository root, e.g.:
+
+uv run python -m benchmarks.bench_parse
+"""
@@ -0,0 +1,98 @@
+"""Parse time of inputs that used to be slow, either because of long blocks
+that were built one character at a time, because unclosed openers made the
+parser search the rest of the document again for every single one of them or
+because spans nested thousands of levels deep exceeded the recursion limit.
+
+    uv run python -m benchmarks.bench_adversarial --baseline /tmp/old/src/meltdown
+"""
+
+import argparse
+
+import meltdown
+
+from .corpus import load_meltdown, measure, megabytes
+
+
+def code_listing(size: int) -> str:
+    line = "    result = compute(value, other_value) + 42  # comment\n"
+    return "```python\n" + line * (size // len(line)) + "```\n"
+
+
+def long_comment(size: int) -> str:
+    line = "this part of the document is commented out for now\n"
+    return "Before <!--\n" + line * (size // len(line)) + "--> after.\n"
+
+
+def unclosed_fences(size: int) -> str:
+    # Every fence is shorter than the ones before it, so none of them is ever
+    # closed by a later one.
+    blocks = []
+    length = 3
+    while size > 0:
+        blocks.append("`" * length + "\nnot code\n\n")
+        size -= length + 11
+        length += 1
+    return "".join(reversed(blocks))
+
+
+def unclosed_comments(size: int) -> str:
+    word = "text <!-- "
+    return word * (size // len(word))
+
+
+def nested_emphasis(size: int) -> str:
+    # Every emphasis opens inside the previous one, none of them is closed
+    word = "*a _b_ "
+    return word * (size // len(word))
+
+
+def nested_links(size: int) -> str:
+    word = "[a **b** "
+    return word * (size // len(word))
+
+
+ADVERSARIAL = {
+    "code listing": code_listing,
+    "long comment": long_comment,
+    "unclosed fences": unclosed_fences,
+    "unclosed comments": unclosed_comments,
+    "nested emphasis": nested_emphasis,
+    "nested links": nested_links,
+}
+
+
+def parse_time(module, source: str, repeat: int) -> float | None:
+    try:
+        return measure(lambda: module.parse(source), repeat)
+    except RecursionError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--size", type=float, default=0.2, help="Size of the inputs in MB."
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="Source folder of meltdown to compare.")
+    args = parser.parse_args()
+
+    baseline = load_meltdown(args.baseline) if args.baseline else None
+
+    print(f"{'input':<20}{'MB':>8}{'seconds':>10}{'baseline':>10}{'speedup':>9}")
+    for name, generate in ADVERSARIAL.items():
+        source = generate(int(args.size * 1e6))
+        current = parse_time(meltdown, source, args.repeat)
+        assert current is not None
+        line = f"{name:<20}{megabytes(source):>8.2f}{current:>10.3f}"
+        if baseline is not None:
+            before = parse_time(baseline, source, args.repeat)
+            if before is None:
+                line += f"{'recursion':>10}{'-':>9}"
+            else:
+                line += f"{before:>10.3f}{before / current:>8.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
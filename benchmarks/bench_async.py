@@ -0,0 +1,86 @@
+"""How long other work waits on the event loop while big documents are
+rendered, rendering right on the loop, in a thread pool and in a process pool.
+
+uv run python -m benchmarks.bench_async --size 4000000
+"""
+
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from meltdown import AsyncMarkdown, render
+
+from .bench_suite import percentile
+from .corpus import synthetic_document
+
+# How often the probe wants to run, in seconds
+TICK = 0.001
+
+
+async def lags(work) -> list[float]:
+    """How late a task that wants to run every `TICK` is, while `work` runs."""
+    late = []
+    done = asyncio.Event()
+
+    async def probe():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK)
+            late.append(time.perf_counter() - start - TICK)
+
+    task = asyncio.create_task(probe())
+    await asyncio.sleep(0.05)
+    await work()
+    done.set()
+    await task
+    return late
+
+
+async def run(documents: list[str], mode: str) -> tuple[float, list[float]]:
+    if mode == "on the loop":
+
+        async def work():
+            for document in documents:
+                render(document)
+                # Other tasks only run between documents
+                await asyncio.sleep(0)
+
+        markdown = None
+    else:
+        executor = ThreadPoolExecutor(2) if mode == "threads" else None
+        markdown = AsyncMarkdown(executor, max_workers=2)
+        # Start the workers before measuring
+        await markdown.render("warm up")
+
+        async def work():
+            assert markdown is not None
+            await asyncio.gather(*(markdown.render(d) for d in documents))
+
+    start = time.perf_counter()
+    late = await lags(work)
+    seconds = time.perf_counter() - start
+    if markdown is not None:
+        markdown.close()
+        markdown.executor.shutdown()
+    return seconds, sorted(late)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--documents", type=int, default=4)
+    args = parser.parse_args()
+
+    documents = [synthetic_document(args.size, seed) for seed in range(args.documents)]
+    print(f"{'':<14}{'seconds':>9}{'lag p50 ms':>12}{'lag p99 ms':>12}{'max ms':>10}")
+    for mode in ["on the loop", "threads", "processes"]:
+        seconds, late = asyncio.run(run(documents, mode))
+        p50, p99 = percentile(late, 50) * 1000, percentile(late, 99) * 1000
+        print(
+            f"{mode:<14}{seconds:>9.2f}{p50:>12.2f}{p99:>12.2f}{late[-1] * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Throughput of render_many with a growing number of worker processes.
+
+uv run python -m benchmarks.bench_batch --documents 2000
+"""
+
+import argparse
+import os
+import time
+
+from meltdown import render_many
+
+from .corpus import megabytes, synthetic_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000)
+    parser.add_argument("--size", type=int, default=20_000, help="Bytes per document.")
+    parser.add_argument("--chunksize", type=int, default=16)
+    args = parser.parse_args()
+
+    sources = [synthetic_document(args.size, seed) for seed in range(args.documents)]
+    total = sum(megabytes(s) for s in sources)
+
+    print(f"{'workers':>8}{'seconds':>10}{'MB/s':>10}{'speedup':>9}")
+    single = None
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        for result in render_many(
+            sources, max_workers=workers, chunksize=args.chunksize
+        ):
+            assert result.error is None, result.error
+        seconds = time.perf_counter() - start
+        single = single or seconds
+        speedup = single / seconds
+        print(f"{workers:>8}{seconds:>10.2f}{total / seconds:>10.2f}{speedup:>8.1f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
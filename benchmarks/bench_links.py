@@ -0,0 +1,71 @@
+"""Finding the links and images of documents with extract_links, compared with
+parsing them and walking the tree, as a link checker would otherwise do.
+
+uv run python -m benchmarks.bench_links --size 2000000
+"""
+
+import argparse
+import time
+
+from meltdown import ImageNode, LinkNode, Node, UnorderedListNode, extract_links, parse
+
+from .corpus import blog_corpus, megabytes, synthetic_document
+
+
+def parse_only(documents: list[str]):
+    for document in documents:
+        parse(document)
+
+
+def parse_and_walk(documents: list[str]):
+    for document in documents:
+        urls = []
+        stack: list[Node] = list(parse(document).children)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, (LinkNode, ImageNode)):
+                urls.append(node.url)
+            if isinstance(node, UnorderedListNode):
+                stack.extend(node.items)
+            else:
+                stack.extend(getattr(node, "children", ()))
+
+
+def extract(documents: list[str]):
+    for document in documents:
+        [link.url for link in extract_links(document)]
+
+
+def best_of(repeat: int, work, documents: list[str]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work(documents)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=2_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    corpora = {
+        "blog": list(blog_corpus().values()),
+        "synthetic": [synthetic_document(args.size)],
+    }
+    print(f"{'corpus':<12}{'parse':>10}{'+ walk':>10}{'extract':>10}{'speedup':>9}")
+    for name, documents in corpora.items():
+        total = sum(megabytes(d) for d in documents)
+        parsing = best_of(args.repeat, parse_only, documents)
+        walking = best_of(args.repeat, parse_and_walk, documents)
+        extracting = best_of(args.repeat, extract, documents)
+        print(
+            f"{name:<12}{total / parsing:>8.2f}MB/s{total / walking:>6.2f}MB/s"
+            f"{total / extracting:>6.2f}MB/s{walking / extracting:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Parser throughput in MB/s on the blog corpus and on synthetic documents.
+
+Pass `--baseline` with the path to another `src/meltdown` folder to compare
+against it, for example a worktree of an older commit:
+
+    git worktree add /tmp/meltdown-old HEAD~1
+    uv run python -m benchmarks.bench_parse --baseline /tmp/meltdown-old/src/meltdown
+"""
+
+import argparse
+
+import meltdown
+
+from .corpus import (
+    blog_corpus,
+    load_meltdown,
+    long_spans_document,
+    measure,
+    megabytes,
+    synthetic_document,
+)
+
+
+def throughput(module, source: str, repeat: int) -> float:
+    seconds = measure(lambda: module.MarkdownParser().parse(source), repeat)
+    return megabytes(source) / seconds
+
+
+def inputs(sizes: list[float]) -> dict[str, str]:
+    documents = {"blog corpus": "\n\n".join(blog_corpus().values())}
+    for size in sizes:
+        documents[f"synthetic {size:g} MB"] = synthetic_document(int(size * 1e6))
+        documents[f"long spans {size:g} MB"] = long_spans_document(int(size * 1e6))
+    return documents
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=float,
+        nargs="+",
+        default=[0.1, 1, 4],
+        help="Sizes of the synthetic documents in MB.",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="Source folder of meltdown to compare.")
+    args = parser.parse_args()
+
+    baseline = load_meltdown(args.baseline) if args.baseline else None
+
+    print(f"{'input':<22}{'MB':>8}{'MB/s':>10}{'baseline':>10}{'speedup':>9}")
+    for name, source in inputs(args.sizes).items():
+        current = throughput(meltdown, source, args.repeat)
+        line = f"{name:<22}{megabytes(source):>8.2f}{current:>10.2f}"
+        if baseline is not None:
+            before = throughput(baseline, source, args.repeat)
+            line += f"{before:>10.2f}{current / before:>8.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""Render time of the table driven HtmlRenderer compared with the recursive
+visitor it replaced and with the compiled renderer, on the blog corpus,
+synthetic documents and deeply nested trees.
+
+    uv run python -m benchmarks.bench_render --depths 100 10000
+"""
+
+import argparse
+from typing import Self
+
+import meltdown
+from meltdown import (
+    BoldNode,
+    EmphNode,
+    HeaderNode,
+    LinkNode,
+    ListItemNode,
+    MarkdownTree,
+    Node,
+    ParagraphNode,
+    QuoteBlockNode,
+    Renderer,
+    StrikeThroughNode,
+    TextNode,
+    UnorderedListNode,
+)
+
+from .corpus import blog_corpus, measure, megabytes, synthetic_document
+
+
+class VisitorHtmlRenderer(meltdown.HtmlRenderer):
+    """The recursive double dispatch of the previous HtmlRenderer, every node
+    with children is rendered by joining the output of its children."""
+
+    def visit_tree(self: Self, node: MarkdownTree) -> str:
+        return "".join(c.accept(self) for c in node.children)
+
+    def visit_paragraph(self: Self, node: ParagraphNode) -> str:
+        child_content = "".join(c.accept(self) for c in node.children)
+        return "<p>" + child_content + "</p>\n"
+
+    def visit_header(self: Self, node: HeaderNode) -> str:
+        child_content = "".join(c.accept(self) for c in node.children)
+        return f"<h{node.header_size}>" + child_content + f"</h{node.header_size}>\n"
+
+    def visit_quote_block(self: Self, node: QuoteBlockNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<blockquote>" + inner + "</blockquote>"
+
+    def visit_list_item(self: Self, node: ListItemNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<li>" + inner + "</li>\n"
+
+    def visit_unordered_list(self: Self, node: UnorderedListNode) -> str:
+        inner = "".join(c.accept(self) for c in node.items)
+        return "<ul>\n" + inner + "</ul>\n"
+
+    def visit_emph(self: Self, node: EmphNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<em>" + inner + "</em>"
+
+    def visit_strikethrough(self: Self, node: StrikeThroughNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<del>" + inner + "</del>"
+
+    def visit_bold(self: Self, node: BoldNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<strong>" + inner + "</strong>"
+
+    def visit_link(self: Self, node: LinkNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return f'<a href="{node.url}">{inner}</a>'
+
+
+def nested_tree(depth: int, paragraphs: int) -> MarkdownTree:
+    """Paragraphs of bold, emphasis, strikethrough and links nested `depth`
+    levels deep, with some text at every level. The parser doesn't produce
+    such trees, so they are built directly."""
+    wrappers = [
+        BoldNode,
+        EmphNode,
+        StrikeThroughNode,
+        lambda children: LinkNode("https://example.com", children),
+    ]
+    blocks: list[Node] = []
+    for _ in range(paragraphs):
+        node: Node = TextNode("innermost")
+        for level in range(depth):
+            node = wrappers[level % 4]([TextNode("level "), node, TextNode(" end")])
+        blocks.append(ParagraphNode([node]))
+    return MarkdownTree({}, blocks)
+
+
+def render_time(renderer: Renderer, tree: MarkdownTree, repeat: int):
+    try:
+        return measure(lambda: renderer.render(tree), repeat)
+    except RecursionError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=float, default=1, help="Synthetic MB.")
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs="+",
+        default=[10, 100, 10_000],
+        help="Nesting depths of the nested trees.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    trees = {
+        "blog corpus": meltdown.parse("\n\n".join(blog_corpus().values())),
+        f"synthetic {args.size:g} MB": meltdown.parse(
+            synthetic_document(int(args.size * 1e6))
+        ),
+    }
+    for depth in args.depths:
+        trees[f"nested depth {depth}"] = nested_tree(depth, max(1, 20_000 // depth))
+
+    print(
+        f"{'input':<22}{'HTML MB':>8}{'visitor ms':>12}{'table ms':>10}"
+        f"{'compiled ms':>13}{'speedup':>9}"
+    )
+    compiled = meltdown.compile_renderer()
+    for name, tree in trees.items():
+        output = meltdown.HtmlRenderer().render(tree)
+        assert compiled.render(tree) == output
+        current = render_time(meltdown.HtmlRenderer(), tree, args.repeat)
+        fastest = render_time(compiled, tree, args.repeat)
+        before = render_time(VisitorHtmlRenderer(), tree, args.repeat)
+        assert current is not None and fastest is not None
+        line = f"{name:<22}{megabytes(output):>8.2f}"
+        if before is None:
+            line += f"{'recursion':>12}"
+        else:
+            line += f"{before * 1000:>12.1f}"
+        line += f"{current * 1000:>10.1f}{fastest * 1000:>13.1f}"
+        if before is not None:
+            line += f"{before / fastest:>8.1f}x"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
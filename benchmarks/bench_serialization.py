@@ -0,0 +1,49 @@
+"""Size and speed of the binary encoding of trees compared to pickle.
+
+uv run python -m benchmarks.bench_serialization --size 1000000
+"""
+
+import argparse
+import pickle
+from functools import partial
+
+from meltdown import MarkdownParser, MarkdownTree
+
+from .corpus import blog_corpus, measure, synthetic_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    documents = {
+        "blog": "\n\n".join(blog_corpus().values()),
+        f"synthetic {args.size}": synthetic_document(args.size),
+    }
+    print(f"{'document':>18}{'format':>10}{'kB':>10}{'dump ms':>10}{'load ms':>10}")
+    for name, source in documents.items():
+        tree = MarkdownParser().parse(source)
+        formats = [
+            ("bytes", MarkdownTree.to_bytes, MarkdownTree.from_bytes),
+            (
+                "with map",
+                partial(MarkdownTree.to_bytes, include_source_map=True),
+                MarkdownTree.from_bytes,
+            ),
+            ("pickle", pickle.dumps, pickle.loads),
+        ]
+        for label, dump, load in formats:
+            data = dump(tree)
+            assert load(data) == tree
+            dumping = measure(partial(dump, tree), args.repeat) * 1000
+            loading = measure(partial(load, data), args.repeat) * 1000
+            kilobytes = len(data) / 1000
+            print(
+                f"{name:>18}{label:>10}{kilobytes:>10.0f}{dumping:>10.1f}{loading:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""Throughput, latency and peak memory of parsing, rendering and dumping, on
+the blog corpus and on synthetic documents of 1 KB up to 100 MB, saved as JSON
+so that runs can be compared:
+
+    uv run python -m benchmarks.bench_suite --output before.json
+    # ... change something ...
+    uv run python -m benchmarks.bench_suite --compare before.json
+
+Sizes take K, M and G suffixes, like `--sizes 1K 1M 100M`. `--mix` sets the
+kinds of blocks and the inline markup of the synthetic documents, like
+`--mix fences=0,markup=6`. With `--compare`, every result whose throughput,
+median latency or peak memory got worse by more than `--threshold` percent is
+flagged, and the exit status is 1 if there are any. The p99 latency is shown
+as well, but it is too noisy on a busy machine to flag anything.
+
+Small sizes are measured over many documents of that size, so that the
+latency percentiles mean something. The peak memory is measured with
+tracemalloc in a separate run, as tracing slows everything down. It's what the
+operation allocates on top of its input, the tree for parsing and the HTML or
+the dump for the others.
+"""
+
+import argparse
+import gc
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime
+from importlib import metadata
+
+from meltdown import MarkdownParser, MarkdownTree
+
+from .corpus import REALISTIC, Mix, blog_corpus, megabytes, synthetic_document
+
+FORMAT_VERSION = 1
+# Synthetic documents measured per size, at most, to get enough latencies
+DOCUMENTS = 100
+# Bytes of synthetic documents per size, at least, if there are enough of them
+VOLUME = 1_000_000
+
+
+def _parse(source: str) -> MarkdownTree:
+    return MarkdownParser().parse(source)
+
+
+def _render(tree: MarkdownTree) -> str:
+    return tree.render()
+
+
+def _dump(tree: MarkdownTree) -> str:
+    return tree.dump()
+
+
+# Operation -> how to prepare its input from the source, and the operation.
+OPERATIONS: dict[str, tuple[Callable[[str], object], Callable]] = {
+    "parse": (str, _parse),
+    "render": (_parse, _render),
+    "dump": (_parse, _dump),
+}
+
+
+@dataclass(slots=True)
+class Result:
+    input: str
+    operation: str
+    documents: int
+    megabytes: float
+    # Of the fastest run over all documents
+    mb_per_s: float
+    # Percentiles of the time per document in milliseconds, over all runs
+    latency_ms: dict[str, float]
+    # The highest peak of a single document
+    peak_memory_mb: float
+
+
+def size(text: str) -> int:
+    """Bytes from a size like "100K" or "2.5M"."""
+    multiplier = {"K": 1e3, "M": 1e6, "G": 1e9}.get(text[-1:].upper())
+    if multiplier is None:
+        return int(text)
+    return int(float(text[:-1]) * multiplier)
+
+
+def size_name(size: int) -> str:
+    for suffix, multiplier in [("G", 1e9), ("M", 1e6), ("K", 1e3)]:
+        if size >= multiplier:
+            return f"{size / multiplier:g}{suffix}"
+    return str(size)
+
+
+def inputs(sizes: list[int], mix: Mix) -> dict[str, list[str]]:
+    documents = {"blog corpus": list(blog_corpus().values())}
+    for bytes_ in sizes:
+        count = max(1, min(DOCUMENTS, VOLUME // bytes_))
+        documents[f"synthetic {size_name(bytes_)}"] = [
+            synthetic_document(bytes_, seed, mix) for seed in range(count)
+        ]
+    return documents
+
+
+def percentile(ordered: list[float], percent: float) -> float:
+    """The nearest rank percentile of sorted values."""
+    rank = math.ceil(percent / 100 * len(ordered))
+    return ordered[min(len(ordered) - 1, max(0, rank - 1))]
+
+
+def peak_memory(operation: Callable, item: object) -> int:
+    tracemalloc.start()
+    try:
+        operation(item)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def measure(
+    name: str, sources: list[str], operation: str, repeat: int, budget: float
+) -> Result:
+    """Run an operation over all documents `repeat` times, or fewer if that
+    takes longer than `budget` seconds, but at least once."""
+    prepare, function = OPERATIONS[operation]
+    items = [prepare(source) for source in sources]
+    # Don't pay for the garbage of the previous measurement
+    gc.collect()
+    latencies = []
+    fastest = math.inf
+    started = time.perf_counter()
+    for _ in range(repeat):
+        total = 0.0
+        for item in items:
+            start = time.perf_counter()
+            function(item)
+            seconds = time.perf_counter() - start
+            latencies.append(seconds)
+            total += seconds
+        fastest = min(fastest, total)
+        if time.perf_counter() - started > budget:
+            break
+
+    latencies.sort()
+    volume = sum(megabytes(source) for source in sources)
+    return Result(
+        input=name,
+        operation=operation,
+        documents=len(sources),
+        megabytes=volume,
+        mb_per_s=volume / fastest,
+        latency_ms={
+            label: percentile(latencies, percent) * 1000
+            for label, percent in [("p50", 50), ("p90", 90), ("p99", 99), ("max", 100)]
+        },
+        peak_memory_mb=max(peak_memory(function, item) for item in items) / 1e6,
+    )
+
+
+def environment(mix: Mix) -> dict:
+    try:
+        version = metadata.version("meltdown")
+    except metadata.PackageNotFoundError:
+        version = None
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "format": FORMAT_VERSION,
+        "date": datetime.now(UTC).isoformat(timespec="seconds"),
+        "meltdown": version,
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "machine": platform.platform(),
+        "mix": asdict(mix),
+    }
+
+
+def print_result(result: Result) -> None:
+    latency = result.latency_ms
+    print(
+        f"{result.input:<18}{result.operation:<8}{result.documents:>6}"
+        f"{result.megabytes:>9.2f}{result.mb_per_s:>9.2f}"
+        f"{latency['p50']:>10.3f}{latency['p90']:>10.3f}{latency['p99']:>10.3f}"
+        f"{result.peak_memory_mb:>10.2f}"
+    )
+
+
+def compare(baseline: dict, results: list[Result], mix: Mix, threshold: float) -> int:
+    """Print how every result changed against the baseline and return the
+    number of regressions."""
+    if baseline.get("format") != FORMAT_VERSION:
+        raise SystemExit("The baseline was saved in another format.")
+    if baseline["mix"] != asdict(mix):
+        print("\nThe baseline was run with another mix:", baseline["mix"])
+    before = {(r["input"], r["operation"]): r for r in baseline["results"]}
+
+    def change(old: float, new: float) -> float:
+        return (new / old - 1) * 100 if old else 0.0
+
+    regressions = 0
+    print(f"\n{'input':<18}{'op':<8}{'MB/s':>9}{'p50':>9}{'p99':>9}{'memory':>9}")
+    for result in results:
+        old = before.get((result.input, result.operation))
+        if old is None:
+            continue
+        throughput = change(old["mb_per_s"], result.mb_per_s)
+        median = change(old["latency_ms"]["p50"], result.latency_ms["p50"])
+        tail = change(old["latency_ms"]["p99"], result.latency_ms["p99"])
+        memory = change(old["peak_memory_mb"], result.peak_memory_mb)
+        # Less throughput is worse, more latency and memory are
+        regressed = max(-throughput, median, memory) > threshold
+        regressions += regressed
+        print(
+            f"{result.input:<18}{result.operation:<8}{throughput:>+8.1f}%"
+            f"{median:>+8.1f}%{tail:>+8.1f}%{memory:>+8.1f}%"
+            + ("  REGRESSION" if regressed else "")
+        )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=size,
+        nargs="+",
+        default=[size(s) for s in ["1K", "10K", "100K", "1M", "10M"]],
+        help="Sizes of the synthetic documents, up to 100M and more.",
+    )
+    parser.add_argument(
+        "--mix",
+        type=Mix.parse,
+        default=REALISTIC,
+        help="Weights of paragraphs, headers, lists, fences and quotes and the "
+        "number of marked up words per sentence, like fences=0,markup=6.",
+    )
+    parser.add_argument(
+        "--operations", nargs="+", choices=list(OPERATIONS), default=list(OPERATIONS)
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=10,
+        help="Seconds after which no more runs of a measurement are started.",
+    )
+    parser.add_argument("--output", help="Save the results to this JSON file.")
+    parser.add_argument("--compare", help="Compare with results saved before.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10,
+        help="Percent by which a result may get worse before it's flagged.",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(
+        f"{'input':<18}{'op':<8}{'docs':>6}{'MB':>9}{'MB/s':>9}"
+        f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak MB':>10}"
+    )
+    results = []
+    for name, sources in inputs(args.sizes, args.mix).items():
+        for operation in args.operations:
+            result = measure(name, sources, operation, args.repeat, args.budget)
+            print_result(result)
+            results.append(result)
+
+    if args.output:
+        report = environment(args.mix) | {"results": [asdict(r) for r in results]}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if baseline is not None and compare(baseline, results, args.mix, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
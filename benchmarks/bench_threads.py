@@ -0,0 +1,53 @@
+"""Throughput of one parser shared by a growing number of threads.
+
+uv run python -m benchmarks.bench_threads --documents 400
+
+With the GIL the threads take turns, so the throughput stays flat at best. On
+a free-threaded build (python3.13t and later, where `sys._is_gil_enabled()`
+is false) they parse in parallel and it should grow with the threads, up to
+the number of cores.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from meltdown import MarkdownParser
+
+from .corpus import megabytes, synthetic_document
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=400)
+    parser.add_argument("--size", type=int, default=20_000, help="Bytes per document.")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sources = [synthetic_document(args.size, seed) for seed in range(args.documents)]
+    total = sum(megabytes(s) for s in sources)
+    shared = MarkdownParser()
+    expected = [shared.parse(source).dump() for source in sources]
+
+    is_gil_enabled = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'on' if is_gil_enabled else 'off'}")
+    print(f"{'threads':>8}{'seconds':>10}{'MB/s':>10}{'speedup':>9}")
+    single = None
+    threads = 1
+    while threads <= args.max_threads:
+        with ThreadPoolExecutor(threads) as executor:
+            start = time.perf_counter()
+            trees = list(executor.map(shared.parse, sources))
+            seconds = time.perf_counter() - start
+        # Sharing the parser must not change a single tree
+        assert [tree.dump() for tree in trees] == expected
+        single = single or seconds
+        speedup = single / seconds
+        print(f"{threads:>8}{seconds:>10.2f}{total / seconds:>10.2f}{speedup:>8.1f}x")
+        threads *= 2
+
+
+if __name__ == "__main__":
+    main()
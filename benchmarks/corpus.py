@@ -0,0 +1,176 @@
+"""Inputs and helpers shared by the benchmarks."""
+
+import importlib.util
+import os
+import random
+import re
+import sys
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, fields
+from functools import cache
+from pathlib import Path
+from types import ModuleType
+
+BLOG_FOLDER = Path(__file__).parent.parent / "tests" / "blog"
+
+
+def blog_corpus() -> dict[str, str]:
+    """All blog posts from the test suite, keyed by their filename."""
+    return {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(BLOG_FOLDER.glob("*.md"))
+    }
+
+
+@cache
+def vocabulary() -> list[str]:
+    """The vocabulary of the blog corpus, to make synthetic prose from."""
+    text = " ".join(blog_corpus().values()).lower()
+    return sorted(set(re.findall(r"[a-z]{2,}", text)))
+
+
+@dataclass(frozen=True, slots=True)
+class Mix:
+    """Relative weights of the kinds of blocks in a synthetic document and the
+    number of words with inline markup in each sentence."""
+
+    paragraphs: float = 6
+    headers: float = 1
+    lists: float = 1
+    fences: float = 1
+    quotes: float = 1
+    markup: int = 2
+
+    @classmethod
+    def parse(cls, text: str) -> "Mix":
+        """A mix from "name=value" pairs separated by commas, like
+        "fences=0,markup=5", the other fields keep their defaults."""
+        values = {}
+        for pair in filter(None, text.split(",")):
+            name, _, value = pair.partition("=")
+            values[name.strip()] = value
+        unknown = values.keys() - {field.name for field in fields(cls)}
+        if unknown:
+            raise ValueError(f"Unknown mix fields: {', '.join(sorted(unknown))}")
+        default = cls()
+        return cls(
+            paragraphs=float(values.get("paragraphs", default.paragraphs)),
+            headers=float(values.get("headers", default.headers)),
+            lists=float(values.get("lists", default.lists)),
+            fences=float(values.get("fences", default.fences)),
+            quotes=float(values.get("quotes", default.quotes)),
+            markup=int(values.get("markup", default.markup)),
+        )
+
+
+REALISTIC = Mix()
+
+
+def _sentence(rng: random.Random, markup: int) -> str:
+    words = rng.choices(vocabulary(), k=rng.randint(6, 18))
+    for i in rng.sample(range(len(words)), k=min(markup, len(words))):
+        match rng.randrange(6):
+            case 0:
+                words[i] = f"**{words[i]}**"
+            case 1:
+                words[i] = f"*{words[i]}*"
+            case 2:
+                words[i] = f"`{words[i]}`"
+            case 3:
+                url = "https://example.com/" + "/".join(rng.choices(vocabulary(), k=8))
+                words[i] = f"[{words[i]}]({url})"
+            case 4:
+                words[i] = f"~~{words[i]}~~"
+            case _:
+                pass
+    return " ".join(words).capitalize() + "."
+
+
+def _block(rng: random.Random, mix: Mix) -> str:
+    weights = (mix.paragraphs, mix.headers, mix.lists, mix.fences, mix.quotes)
+    match rng.choices(range(5), weights)[0]:
+        case 1:
+            return "#" * rng.randint(1, 3) + " " + _sentence(rng, mix.markup)
+        case 2:
+            return "\n".join(
+                "- " + _sentence(rng, mix.markup) for _ in range(rng.randint(2, 6))
+            )
+        case 3:
+            lines = [
+                "    " * rng.randrange(3) + " ".join(rng.choices(vocabulary(), k=8))
+                for _ in range(rng.randint(3, 30))
+            ]
+            return "```python\n" + "\n".join(lines) + "\n```"
+        case 4:
+            return "> " + _sentence(rng, mix.markup)
+        case _:
+            return "\n".join(
+                _sentence(rng, mix.markup) for _ in range(rng.randint(1, 6))
+            )
+
+
+def synthetic_document(size: int, seed: int = 0, mix: Mix = REALISTIC) -> str:
+    """A document of roughly `size` characters with a frontmatter and a mix of
+    headers, paragraphs, lists, quotes and code blocks, by default a realistic
+    one."""
+    rng = random.Random(seed)
+    parts = ["---", "title: A synthetic document", "date: 2025-01-01", "---", ""]
+    length = sum(len(p) + 1 for p in parts)
+    while length < size:
+        block = _block(rng, mix)
+        parts.append(block + "\n")
+        length += len(block) + 2
+    return "\n".join(parts)
+
+
+def long_spans_document(size: int, seed: int = 0) -> str:
+    """A document dominated by long runs the parser scans in one go: a big
+    frontmatter, long inline code spans, long link urls and fence info
+    strings."""
+    rng = random.Random(seed)
+    fields = [
+        f"field{i}: " + " ".join(rng.choices(vocabulary(), k=40)) for i in range(200)
+    ]
+    parts = ["---", *fields, "---", ""]
+    length = sum(len(p) + 1 for p in parts)
+    while length < size:
+        words = rng.choices(vocabulary(), k=300)
+        code = " ".join(words)
+        url = "https://example.com/" + "/".join(words)
+        info = "python " + "-".join(words[:50])
+        block = f"`{code}` and [a link]({url})\n\n```{info}\nx = 1\n```\n"
+        parts.append(block)
+        length += len(block) + 1
+    return "\n".join(parts)
+
+
+def load_meltdown(source_folder: str) -> ModuleType:
+    """Import a second copy of meltdown from another source tree (e.g. a git
+    worktree of an older commit) so two versions can be compared side by
+    side."""
+    init = os.path.join(source_folder, "__init__.py")
+    name = "meltdown_baseline"
+    spec = importlib.util.spec_from_file_location(
+        name, init, submodule_search_locations=[source_folder]
+    )
+    if spec is None or spec.loader is None:
+        raise ImportError(f"No meltdown package found at {source_folder}")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """The best wall clock time in seconds out of `repeat` runs."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def megabytes(text: str) -> float:
+    return len(text.encode("utf-8")) / 1_000_000
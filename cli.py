@@ -1,25 +1,135 @@
 import argparse
+import contextlib
+import sys
 
-from meltdown import parse
+from meltdown import (
+    BuildReport,
+    HtmlRenderer,
+    MarkdownParser,
+    RenderCache,
+    SiteBuilder,
+    SiteWatcher,
+    Stats,
+    parse_file,
+    render,
+)
 
 
 def main():
+    if sys.argv[1:2] == ["build"]:
+        build(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["watch"]:
+        watch(sys.argv[2:])
+        return
+
     parser = argparse.ArgumentParser(
         prog="meltdown-dev-cli",
         description="A cli for developers trying meltdown",
+        epilog="Run 'meltdown-dev-cli build --help' or 'meltdown-dev-cli watch "
+        "--help' to convert whole directories.",
     )
     parser.add_argument("filename", help="Name of the file being parsed and converted.")
     parser.add_argument(
         "--dump", action="store_true", help="Print the dump instead of the html."
     )
+    parser.add_argument(
+        "--cache",
+        metavar="DIR",
+        help="Cache the rendered html in this directory and reuse it if the "
+        "file didn't change.",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="Print how long each phase of parsing and rendering took to stderr.",
+    )
     args = parser.parse_args()
-    with open(args.filename) as f:
-        doc = parse(f.read())
 
-    if args.dump:
-        print(doc.dump())
+    if args.stats:
+        stats = Stats()
+        tree = MarkdownParser(stats=stats).parse_file(args.filename)
+        if args.dump:
+            print(tree.dump())
+        else:
+            print(tree.render(HtmlRenderer(stats=stats)))
+        print(stats.report(), file=sys.stderr)
+    elif args.dump:
+        print(parse_file(args.filename).dump())
+    elif args.cache:
+        # The cache is keyed by the content, so it has to be read anyway
+        with open(args.filename, encoding="utf-8") as f:
+            content = f.read()
+        print(render(content, cache=RenderCache(directory=args.cache)))
     else:
-        print(doc.render())
+        print(parse_file(args.filename).render())
+
+
+def build(arguments: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="meltdown-dev-cli build",
+        description="Convert every markdown file in a directory tree to html, "
+        "skipping the files that didn't change since the last build.",
+    )
+    parser.add_argument("source", help="Directory with the markdown files.")
+    parser.add_argument("output", help="Directory the html files are written to.")
+    parser.add_argument(
+        "--workers", type=int, help="Number of worker processes (default: all cores)."
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Convert all files, changed or not."
+    )
+    args = parser.parse_args(arguments)
+
+    builder = SiteBuilder(args.source, args.output, max_workers=args.workers)
+    report = builder.build(force=args.force)
+    for relative, error in sorted(report.errors.items()):
+        print(f"{relative}: {error}", file=sys.stderr)
+    print(report.summary())
+    if report.errors:
+        sys.exit(1)
+
+
+def watch(arguments: list[str]):
+    parser = argparse.ArgumentParser(
+        prog="meltdown-dev-cli watch",
+        description="Like build, but then keep watching the markdown files and "
+        "convert them again whenever they change, until interrupted.",
+    )
+    parser.add_argument("source", help="Directory with the markdown files.")
+    parser.add_argument("output", help="Directory the html files are written to.")
+    parser.add_argument(
+        "--workers", type=int, help="Number of worker processes (default: all cores)."
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="Check the files for changes periodically instead of using inotify.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=0.1,
+        metavar="SECONDS",
+        help="Wait until nothing changed for this long before converting "
+        "(default: 0.1).",
+    )
+    args = parser.parse_args(arguments)
+
+    def report(report: BuildReport):
+        for relative, error in sorted(report.errors.items()):
+            print(f"{relative}: {error}", file=sys.stderr)
+        print(report.summary(), flush=True)
+
+    watcher = SiteWatcher(
+        args.source,
+        args.output,
+        max_workers=args.workers,
+        debounce=args.debounce,
+        use_inotify=not args.poll,
+    )
+    with contextlib.suppress(KeyboardInterrupt):
+        watcher.run(report)
 
 
 if __name__ == "__main__":
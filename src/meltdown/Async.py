@@ -0,0 +1,207 @@
+"""Parsing and rendering from asyncio code, in worker processes or threads, so
+that big documents don't block the event loop."""
+
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import threading
+from collections.abc import AsyncGenerator, Callable, Generator, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Self
+from weakref import WeakKeyDictionary
+
+from .Batch import ParseResult, Source, _read
+from .HtmlRenderer import HtmlRenderer
+from .MarkdownParser import MarkdownParser
+from .Nodes import MarkdownTree, Renderer
+
+
+class AsyncMarkdown:
+    """Parses and renders documents in an executor and waits for them without
+    blocking the event loop.
+
+    Unless an executor is passed, a process pool with `max_workers` processes
+    is created (started by a fork server, where there is one), and shut down
+    by `close()`. Processes keep the event loop responsive however big the
+    documents are, while threads share the GIL with it, so the loop runs only
+    between the thread's time slices. Threads on the other hand need no
+    pickling, so any renderer works with them, and `render_iter` streams with
+    them.
+
+    At most `max_concurrency` documents are handed to the executor at once,
+    by default `max_workers` or one per core. The others wait in the event
+    loop, where cancelling them is free. A document that is cancelled after
+    it was handed over is still parsed to the end, but its result is dropped.
+    """
+
+    def __init__(
+        self: Self,
+        executor: Executor | None = None,
+        *,
+        max_workers: int | None = None,
+        max_concurrency: int | None = None,
+    ):
+        self._owns_executor = executor is None
+        if executor is None:
+            # Forking a process with threads, like most servers, can deadlock
+            # the child, a fork server is forked before there are any.
+            if "forkserver" in multiprocessing.get_all_start_methods():
+                context = multiprocessing.get_context("forkserver")
+            else:
+                context = multiprocessing.get_context()
+            executor = ProcessPoolExecutor(max_workers, mp_context=context)
+        self.executor = executor
+        self.max_concurrency = max_concurrency or max_workers or os.cpu_count() or 1
+        # Semaphores belong to one event loop, an instance might be used from
+        # several, one after the other or in different threads.
+        self._semaphores: WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    async def parse(self: Self, source: Source) -> MarkdownTree:
+        """Parse a document, a string of markdown or the path of a UTF-8 file."""
+        result = await self._run(_parse, source)
+        assert result.tree is not None
+        return result.tree
+
+    async def render(
+        self: Self, source: Source, renderer: Renderer | None = None
+    ) -> str:
+        """Parse and render a document, only the HTML comes back from the
+        worker. With processes the renderer has to be picklable."""
+        return await self._run(_render, source, renderer or HtmlRenderer())
+
+    async def render_iter(
+        self: Self, source: Source, renderer: Renderer | None = None
+    ) -> AsyncGenerator[str]:
+        """Yield the HTML of a document a top level block at a time, like
+        `Renderer.render_iter`.
+
+        With a thread pool the document is parsed and rendered as it is
+        consumed, a few blocks at a time, so the first chunks come long before
+        a big document is done. Other executors render the whole document
+        first, as a generator can't be sent to another process.
+        """
+        renderer = renderer or HtmlRenderer()
+        if not isinstance(self.executor, ThreadPoolExecutor):
+            for chunk in await self._run(_render_chunks, source, renderer):
+                yield chunk
+            return
+
+        chunks = _stream(source, renderer)
+        pending: Future | None = None
+        try:
+            while True:
+                async with self._semaphore():
+                    pending = self.executor.submit(_next_chunks, chunks)
+                    batch = await asyncio.wrap_future(pending)
+                if not batch:
+                    return
+                for chunk in batch:
+                    yield chunk
+        finally:
+            # Closes the file, in the worker, after it's done with the stream
+            if pending is not None and not pending.done():
+                pending.add_done_callback(lambda _: chunks.close())
+            else:
+                with contextlib.suppress(RuntimeError):
+                    # Unless the executor is shut down already
+                    self.executor.submit(chunks.close)
+
+    def close(self: Self) -> None:
+        """Shut down the executor, if it was created by this instance."""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def __aenter__(self: Self) -> Self:
+        return self
+
+    async def __aexit__(self: Self, *exc_info: object) -> None:
+        self.close()
+
+    async def _run[R](self: Self, function: Callable[..., R], *arguments: object) -> R:
+        async with self._semaphore():
+            return await asyncio.wrap_future(self.executor.submit(function, *arguments))
+
+    def _semaphore(self: Self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+
+_default: AsyncMarkdown | None = None
+_default_lock = threading.Lock()
+
+
+def _default_instance() -> AsyncMarkdown:
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = AsyncMarkdown()
+        return _default
+
+
+async def parse_async(source: Source) -> MarkdownTree:
+    """Parse a document without blocking the event loop, in a process pool
+    shared by all callers, see `AsyncMarkdown` for more control."""
+    return await _default_instance().parse(source)
+
+
+async def render_async(source: Source, renderer: Renderer | None = None) -> str:
+    """Parse and render a document without blocking the event loop, in a
+    process pool shared by all callers, see `AsyncMarkdown` for more control.
+    """
+    return await _default_instance().render(source, renderer)
+
+
+# The functions that run in the workers, which share one parser
+
+_parser = MarkdownParser()
+
+
+def _parse(source: Source) -> ParseResult:
+    # A ParseResult, as it sends the tree back in its compact encoding
+    path, text = _read(source)
+    return ParseResult(0, path, _parser.parse(text))
+
+
+def _render(source: Source, renderer: Renderer) -> str:
+    _, text = _read(source)
+    return _parser.parse(text).render(renderer)
+
+
+def _render_chunks(source: Source, renderer: Renderer) -> list[str]:
+    _, text = _read(source)
+    return list(renderer.render_iter(_parser.parse(text)))
+
+
+# How much HTML a thread renders before handing it to the event loop.
+_STREAM_BATCH = 1 << 16
+
+
+def _stream(source: Source, renderer: Renderer) -> Generator[str]:
+    if isinstance(source, str):
+        stream = _parser.parse_iter(source.splitlines(keepends=True))
+        yield from renderer.render_iter(stream)
+        return
+    with open(source, encoding="utf-8") as f:
+        yield from renderer.render_iter(_parser.parse_iter(f))
+
+
+def _next_chunks(chunks: Iterator[str]) -> list[str]:
+    """The next chunks of a stream, about `_STREAM_BATCH` characters of them,
+    or none at the end."""
+    batch = []
+    size = 0
+    for chunk in chunks:
+        batch.append(chunk)
+        size += len(chunk)
+        if size >= _STREAM_BATCH:
+            break
+    return batch
@@ -0,0 +1,285 @@
+"""Parsing and rendering many documents at once, spread over a pool of worker
+processes (or threads), and reading just their frontmatter or links."""
+
+import os
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass
+from itertools import batched
+from pathlib import Path
+from typing import Self
+
+from .HtmlRenderer import HtmlRenderer
+from .Links import Link, extract_links
+from .MarkdownParser import MarkdownParser
+from .Nodes import MarkdownTree, Renderer
+
+type Source = str | os.PathLike[str]
+
+
+@dataclass(slots=True)
+class ParseResult:
+    index: int
+    path: Path | None
+    tree: MarkdownTree | None
+    error: str | None = None
+
+    # Trees come back from worker processes in their binary encoding, which is
+    # a lot smaller and faster to load than a pickle of the nodes. Without the
+    # source map, which would about double it.
+    def __getstate__(self: Self) -> tuple:
+        encoded = None if self.tree is None else self.tree.to_bytes()
+        return self.index, self.path, encoded, self.error
+
+    def __setstate__(self: Self, state: tuple) -> None:
+        self.index, self.path, encoded, self.error = state
+        self.tree = None if encoded is None else MarkdownTree.from_bytes(encoded)
+
+
+@dataclass(slots=True)
+class RenderResult:
+    index: int
+    path: Path | None
+    metadata: dict[str, str]
+    html: str | None
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class FrontmatterResult:
+    index: int
+    path: Path | None
+    metadata: dict[str, str] | None
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class LinksResult:
+    index: int
+    path: Path | None
+    links: list[Link] | None
+    error: str | None = None
+
+
+def read_frontmatter(source: Source) -> dict[str, str]:
+    """Read only the frontmatter of a document, without parsing the rest of it.
+    Strings are taken as markdown and path-like objects are read as UTF-8
+    files, but only as far as the end of the frontmatter.
+    """
+    parser = MarkdownParser()
+    if isinstance(source, str):
+        return parser.parse_frontmatter(source)
+    with open(source, encoding="utf-8") as f:
+        return parser.parse_frontmatter(f)
+
+
+def parse_many(
+    sources: Iterable[Source],
+    *,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+) -> Iterator[ParseResult]:
+    """Parse many documents in parallel.
+
+    Strings are parsed as markdown and path-like objects are read as UTF-8
+    files. Unless an executor is passed, a process pool with `max_workers`
+    processes is used for the duration of the call. The documents are sent to
+    the workers in chunks of `chunksize` and the results are yielded in input
+    order, or as soon as they are done if `ordered` is false. A document that
+    fails doesn't stop the others, its result carries the error instead.
+
+    Whole trees have to be sent back from the worker processes, in their
+    binary encoding (see `MarkdownTree.to_bytes`), if only the HTML is needed
+    `render_many` is a lot cheaper. Trees from worker processes have no source
+    map, so they can't be reparsed.
+    """
+    return _run_many(
+        _parse_chunk, (), sources, executor, max_workers, chunksize, ordered
+    )
+
+
+def render_many(
+    sources: Iterable[Source],
+    renderer: Renderer | None = None,
+    *,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+) -> Iterator[RenderResult]:
+    """Parse and render many documents in parallel, like `parse_many` but only
+    the metadata and HTML of each document come back from the workers.
+
+    The renderer is sent to the worker processes, so it has to be picklable,
+    which means custom renderers have to be defined at module level.
+    """
+    return _run_many(
+        _render_chunk,
+        (renderer or HtmlRenderer(),),
+        sources,
+        executor,
+        max_workers,
+        chunksize,
+        ordered,
+    )
+
+
+def read_frontmatter_many(
+    sources: Iterable[Source],
+    *,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 64,
+    ordered: bool = True,
+) -> Iterator[FrontmatterResult]:
+    """Read the frontmatter of many documents in parallel, like `parse_many`
+    but with `read_frontmatter`. To index a whole directory tree:
+
+        read_frontmatter_many(Path("posts").rglob("*.md"))
+    """
+    return _run_many(
+        _frontmatter_chunk, (), sources, executor, max_workers, chunksize, ordered
+    )
+
+
+def extract_links_many(
+    sources: Iterable[Source],
+    *,
+    executor: Executor | None = None,
+    max_workers: int | None = None,
+    chunksize: int = 16,
+    ordered: bool = True,
+) -> Iterator[LinksResult]:
+    """Find the links and images of many documents in parallel, like
+    `parse_many` but with `extract_links`. To check those of a whole site:
+
+        extract_links_many(Path("posts").rglob("*.md"))
+    """
+    return _run_many(
+        _links_chunk, (), sources, executor, max_workers, chunksize, ordered
+    )
+
+
+def _run_many[R](
+    task: Callable[..., list[R]],
+    arguments: tuple,
+    sources: Iterable[Source],
+    executor: Executor | None,
+    max_workers: int | None,
+    chunksize: int,
+    ordered: bool,
+) -> Iterator[R]:
+    owns_executor = executor is None
+    if executor is None:
+        executor = ProcessPoolExecutor(max_workers)
+
+    # Only a few chunks per worker are in flight at any time, so that sources
+    # can be a lazy iterable and results don't pile up in memory.
+    window = 2 * (max_workers or os.cpu_count() or 1)
+    chunks = batched(enumerate(sources), chunksize)
+
+    def submit() -> Future[list[R]] | None:
+        chunk = next(chunks, None)
+        if chunk is None:
+            return None
+        return executor.submit(task, chunk, *arguments)
+
+    try:
+        if ordered:
+            queue: deque[Future[list[R]]] = deque()
+            while len(queue) < window and (future := submit()) is not None:
+                queue.append(future)
+            while queue:
+                results = queue.popleft().result()
+                if (future := submit()) is not None:
+                    queue.append(future)
+                yield from results
+        else:
+            pending: set[Future[list[R]]] = set()
+            while len(pending) < window and (future := submit()) is not None:
+                pending.add(future)
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for finished in done:
+                    if (future := submit()) is not None:
+                        pending.add(future)
+                    yield from finished.result()
+    finally:
+        if owns_executor:
+            executor.shutdown(cancel_futures=True)
+
+
+def _read(source: Source) -> tuple[Path | None, str]:
+    if isinstance(source, str):
+        return None, source
+    path = Path(source)
+    return path, path.read_text(encoding="utf-8")
+
+
+def _error(error: Exception) -> str:
+    return f"{type(error).__name__}: {error}"
+
+
+def _parse_chunk(chunk: tuple[tuple[int, Source], ...]) -> list[ParseResult]:
+    parser = MarkdownParser()
+    results = []
+    for index, source in chunk:
+        path = None
+        try:
+            path, text = _read(source)
+            results.append(ParseResult(index, path, parser.parse(text)))
+        except Exception as e:
+            results.append(ParseResult(index, path, None, _error(e)))
+    return results
+
+
+def _render_chunk(
+    chunk: tuple[tuple[int, Source], ...], renderer: Renderer
+) -> list[RenderResult]:
+    parser = MarkdownParser()
+    results = []
+    for index, source in chunk:
+        path = None
+        try:
+            path, text = _read(source)
+            tree = parser.parse(text)
+            results.append(
+                RenderResult(index, path, tree.metadata, tree.render(renderer))
+            )
+        except Exception as e:
+            results.append(RenderResult(index, path, {}, None, _error(e)))
+    return results
+
+
+def _frontmatter_chunk(
+    chunk: tuple[tuple[int, Source], ...],
+) -> list[FrontmatterResult]:
+    results = []
+    for index, source in chunk:
+        path = None if isinstance(source, str) else Path(source)
+        try:
+            results.append(FrontmatterResult(index, path, read_frontmatter(source)))
+        except Exception as e:
+            results.append(FrontmatterResult(index, path, None, _error(e)))
+    return results
+
+
+def _links_chunk(chunk: tuple[tuple[int, Source], ...]) -> list[LinksResult]:
+    results = []
+    for index, source in chunk:
+        path = None
+        try:
+            path, text = _read(source)
+            results.append(LinksResult(index, path, list(extract_links(text))))
+        except Exception as e:
+            results.append(LinksResult(index, path, None, _error(e)))
+    return results
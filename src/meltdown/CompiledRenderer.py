@@ -0,0 +1,278 @@
+"""Compiling a renderer into a single function that renders a whole tree, with
+the tags of its visit methods written right into the code."""
+
+import copy
+import html
+from collections.abc import Callable, Sequence
+from typing import Any, Self
+
+from .HtmlRenderer import HtmlRenderer, _dispatch_table
+from .Nodes import (
+    BoldNode,
+    CodeBlockNode,
+    CodeNode,
+    CommentNode,
+    EmphNode,
+    HeaderNode,
+    ImageNode,
+    LinkNode,
+    ListItemNode,
+    MarkdownTree,
+    MarkdownVisitor,
+    Node,
+    ParagraphNode,
+    QuoteBlockNode,
+    Renderer,
+    StrikeThroughNode,
+    TextNode,
+    UnorderedListNode,
+)
+
+# Node type -> visit method and the field with the children, most common first,
+# as that's the order the generated code checks the types in.
+_NODE_TYPES: dict[type[Node], tuple[str, str | None]] = {
+    TextNode: ("visit_text", None),
+    ParagraphNode: ("visit_paragraph", "children"),
+    EmphNode: ("visit_emph", "children"),
+    BoldNode: ("visit_bold", "children"),
+    CodeNode: ("visit_code", None),
+    LinkNode: ("visit_link", "children"),
+    StrikeThroughNode: ("visit_strikethrough", "children"),
+    HeaderNode: ("visit_header", "children"),
+    ListItemNode: ("visit_list_item", "children"),
+    UnorderedListNode: ("visit_unordered_list", "items"),
+    CodeBlockNode: ("visit_code_block", None),
+    QuoteBlockNode: ("visit_quote_block", "children"),
+    ImageNode: ("visit_image", None),
+    CommentNode: ("visit_comment", None),
+}
+
+# What the default methods of HtmlRenderer append, for those that aren't just
+# a pair of fixed tags.
+_DEFAULTS = {
+    "visit_text": ['append(escape(node.text.replace("\\n", " ")))'],
+    "visit_code": ['append("<code>" + escape(node.code) + "</code>")'],
+    "visit_comment": ['append("<!--" + node.comment + "-->")'],
+    "visit_header": [
+        "size = node.header_size",
+        'append(f"<h{size}>")',
+        'stack.append((iter(node.children), f"</h{size}>\\n"))',
+        "break",
+    ],
+    "visit_link": [
+        "append(f'<a href=\"{node.url}\">')",
+        'stack.append((iter(node.children), "</a>"))',
+        "break",
+    ],
+}
+
+# Methods whose tags depend on the fields of the node, they can't be probed.
+_NOT_PROBED = frozenset(("visit_header", "visit_link"))
+
+
+class _Probe(Node):
+    """Stands in for a child while finding out what a visit method does with
+    its children, it renders as a marker that's unlikely to occur anywhere."""
+
+    def __init__(self: Self, number: int):
+        self.marker = f"\0meltdown-probe-{number}\0"
+
+    def accept(self: Self, visitor: MarkdownVisitor) -> str:
+        return self.marker
+
+    def dump(self: Self, indent: int = 0) -> str:
+        return ""
+
+
+def _wrapper_tags(
+    method: Callable[[Node], str], node_type: Any
+) -> tuple[str, str] | None:
+    """The opening and closing tag, if the method renders a node by wrapping
+    the output of its children in two fixed strings, or None otherwise."""
+    first, second = _Probe(1), _Probe(2)
+    try:
+        empty = method(node_type([]))
+        one = method(node_type([first]))
+        two = method(node_type([first, second]))
+    except Exception:
+        return None
+    if not isinstance(one, str):
+        return None
+
+    opening, marker, closing = one.partition(first.marker)
+    if marker == "" or empty != opening + closing:
+        return None
+    if two != opening + first.marker + second.marker + closing:
+        return None
+    return opening, closing
+
+
+def _probing_copy(renderer: Renderer) -> Renderer:
+    """A copy of the renderer to call with the probes, which doesn't add them
+    to the stats of the original."""
+    probing = copy.copy(renderer)
+    if probing.stats is not None:
+        probing.stats = None
+    return probing
+
+
+def _generate(renderer: Renderer) -> tuple[str, dict]:
+    """The source of the render function for the renderer and the globals it
+    needs."""
+    is_html = isinstance(renderer, HtmlRenderer)
+    probing = _probing_copy(renderer)
+    namespace: dict = {"escape": html.escape, "accept": _accept(renderer)}
+    lines = [
+        "def render(nodes):",
+        "    output = []",
+        "    append = output.append",
+        '    stack = [(iter(nodes), "")]',
+        "    while stack:",
+        "        children, closing = stack[-1]",
+        "        for node in children:",
+        "            node_type = type(node)",
+    ]
+    keyword = "if"
+    for node_type, (name, field) in _NODE_TYPES.items():
+        namespace[node_type.__name__] = node_type
+        method = getattr(renderer, name)
+        is_default = is_html and getattr(type(renderer), name) is getattr(
+            HtmlRenderer, name
+        )
+
+        body: list[str]
+        tags = None
+        if field is not None and name not in _NOT_PROBED:
+            tags = _wrapper_tags(getattr(probing, name), node_type)
+        if tags is not None:
+            opening, closing = tags
+            body = [
+                f"append({opening!r})",
+                f"stack.append((iter(node.{field}), {closing!r}))",
+                "break",
+            ]
+        elif is_default and name in _DEFAULTS:
+            body = _DEFAULTS[name]
+        else:
+            namespace[name] = method
+            body = [f"append({name}(node))"]
+
+        lines.append(f"            {keyword} node_type is {node_type.__name__}:")
+        lines.extend(f"                {line}" for line in body)
+        keyword = "elif"
+
+    if is_html:
+        # The default methods added the probes to the dispatch table of the
+        # class, where they have no business.
+        _dispatch_table(type(renderer)).visits.pop(_Probe, None)
+
+    lines += [
+        "            else:",
+        "                # Subclasses of the nodes and unknown nodes",
+        "                append(accept(node))",
+        "        else:",
+        "            stack.pop()",
+        "            append(closing)",
+        '    return "".join(output)',
+    ]
+    return "\n".join(lines) + "\n", namespace
+
+
+def _accept(renderer: Renderer) -> Callable[[Node], str]:
+    return lambda node: node.accept(renderer)
+
+
+class CompiledRenderer(Renderer):
+    """A renderer that produces the same output as the one it's compiled from,
+    only faster. See `compile_renderer`."""
+
+    def __init__(self: Self, renderer: Renderer):
+        self.renderer = renderer
+        self.source, namespace = _generate(renderer)
+        exec(
+            compile(self.source, f"<compiled {type(renderer).__name__}>", "exec"),
+            namespace,
+        )
+        self._render_nodes: Callable[[Sequence[Node]], str] = namespace["render"]
+        # Whatever an overridden visit_tree does around the blocks can't be
+        # compiled, such a renderer renders whole trees on its own.
+        self._visit_tree: Callable[[MarkdownTree], str] | None = None
+        if type(renderer).visit_tree is not HtmlRenderer.visit_tree:
+            self._visit_tree = renderer.visit_tree
+
+    def identity(self: Self) -> str:
+        return self.renderer.identity()
+
+    # The generated code can't be pickled, it's generated again instead.
+    def __getstate__(self: Self) -> Renderer:
+        return self.renderer
+
+    def __setstate__(self: Self, renderer: Renderer) -> None:
+        self.__init__(renderer)
+
+    def render(self: Self, doc: MarkdownTree) -> str:
+        return self.visit_tree(doc)
+
+    def visit_tree(self: Self, node: MarkdownTree) -> str:
+        if self._visit_tree is not None:
+            return self._visit_tree(node)
+        return self._render_nodes(node.children)
+
+    def visit_paragraph(self: Self, node: ParagraphNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_header(self: Self, node: HeaderNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_code_block(self: Self, node: CodeBlockNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_quote_block(self: Self, node: QuoteBlockNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_unordered_list(self: Self, node: UnorderedListNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_list_item(self: Self, node: ListItemNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_emph(self: Self, node: EmphNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_strikethrough(self: Self, node: StrikeThroughNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_bold(self: Self, node: BoldNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_code(self: Self, node: CodeNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_link(self: Self, node: LinkNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_image(self: Self, node: ImageNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_text(self: Self, node: TextNode) -> str:
+        return self._render_nodes((node,))
+
+    def visit_comment(self: Self, node: CommentNode) -> str:
+        return self._render_nodes((node,))
+
+
+def compile_renderer(renderer: Renderer | None = None) -> CompiledRenderer:
+    """Compile a renderer (by default the `HtmlRenderer`) into one function
+    that renders a whole tree without recursion, for when the same renderer
+    renders lots of documents.
+
+    Visit methods of nodes with children that only wrap the output of the
+    children in fixed tags, like a `visit_bold` that returns "<b>" + ... +
+    "</b>", get those tags inlined, whatever they are written like. To find
+    them, each of those methods is called a few times with made up nodes
+    while compiling. All other overrides are called as usual, as are the
+    methods for subclasses of the nodes, like the zero copy ones. An
+    overridden `visit_tree` renders whole trees with the renderer itself, only
+    `render_iter` and the visit methods of the nodes are compiled then.
+    """
+    return CompiledRenderer(renderer or HtmlRenderer())
@@ -0,0 +1,87 @@
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Self
+
+from .FlatTree import _KINDS, _kind_of
+from .Nodes import (
+    CodeBlockNode,
+    CodeNode,
+    CommentNode,
+    HeaderNode,
+    ImageNode,
+    LinkNode,
+    Node,
+    TextNode,
+    UnorderedListNode,
+)
+
+_TEXT = _KINDS[TextNode]
+_CODE = _KINDS[CodeNode]
+_CODE_BLOCK = _KINDS[CodeBlockNode]
+_IMAGE = _KINDS[ImageNode]
+_LINK = _KINDS[LinkNode]
+_COMMENT = _KINDS[CommentNode]
+
+
+@dataclass(slots=True)
+class DocumentIndex:
+    """What site generators usually walk a tree for: the level and text of
+    each header, for tables of contents, the url of each link, the url and
+    alt text of each image, and how many words and characters of text there
+    are, for reading times. `MarkdownParser(index=True)` builds it while it
+    parses, a block at a time.
+
+    The text is the text and code of the document, without comments, urls
+    and alt texts. Words are separated by whitespace, and a header, quote,
+    paragraph, list item or code block ends the word.
+    """
+
+    headers: list[tuple[int, str]] = field(default_factory=list)
+    links: list[str] = field(default_factory=list)
+    images: list[tuple[str, str]] = field(default_factory=list)
+    words: int = 0
+    characters: int = 0
+
+    @classmethod
+    def of(cls: type[Self], blocks: Iterable[Node]) -> Self:
+        index = cls()
+        for block in blocks:
+            index.add(block)
+        return index
+
+    def add(self: Self, block: Node) -> None:
+        """Add a top level block, after those added before."""
+        if isinstance(block, UnorderedListNode):
+            for item in block.items:
+                self._add_text(item)
+        elif isinstance(block, HeaderNode):
+            self.headers.append((block.header_size, self._add_text(block)))
+        else:
+            self._add_text(block)
+
+    def _add_text(self: Self, node: Node) -> str:
+        """Add the links and images in a node and count its text, which is
+        returned."""
+        pieces = []
+        stack = [node]
+        while stack:
+            # Any, as the kind tells what type of node it is
+            node: Any = stack.pop()
+            kind = _KINDS.get(type(node))
+            if kind is None:
+                kind = _kind_of(node)
+            if kind == _TEXT:
+                pieces.append(node.text)
+            elif kind in (_CODE, _CODE_BLOCK):
+                pieces.append(node.code)
+            elif kind == _IMAGE:
+                self.images.append((node.url, node.description))
+            elif kind != _COMMENT:
+                if kind == _LINK:
+                    self.links.append(node.url)
+                # In reverse, so that they are popped in order
+                stack.extend(reversed(node.children))
+        text = "".join(pieces)
+        self.words += len(text.split())
+        self.characters += len(text)
+        return text
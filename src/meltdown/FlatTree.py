@@ -0,0 +1,214 @@
+from array import array
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Self
+
+from .Nodes import (
+    BoldNode,
+    CodeBlockNode,
+    CodeNode,
+    CommentNode,
+    EmphNode,
+    HeaderNode,
+    ImageNode,
+    LinkNode,
+    ListItemNode,
+    MarkdownTree,
+    Node,
+    ParagraphNode,
+    QuoteBlockNode,
+    StrikeThroughNode,
+    TextNode,
+    UnorderedListNode,
+)
+
+# The kind of a node is its index in here.
+NODE_TYPES: tuple[type[Node], ...] = (
+    ParagraphNode,
+    HeaderNode,
+    CodeBlockNode,
+    QuoteBlockNode,
+    UnorderedListNode,
+    ListItemNode,
+    EmphNode,
+    StrikeThroughNode,
+    BoldNode,
+    CodeNode,
+    LinkNode,
+    ImageNode,
+    TextNode,
+    CommentNode,
+)
+_KINDS: dict[type[Node], int] = {
+    node_type: kind for kind, node_type in enumerate(NODE_TYPES)
+}
+
+# Nodes that only have children and no other fields.
+_CONTAINERS = (
+    ParagraphNode,
+    QuoteBlockNode,
+    ListItemNode,
+    EmphNode,
+    StrikeThroughNode,
+    BoldNode,
+)
+_PARENTS = frozenset((*_CONTAINERS, HeaderNode, LinkNode, UnorderedListNode))
+
+NONE = -1
+
+
+def _kind_of(node: Node) -> int:
+    kind = _KINDS.get(type(node))
+    if kind is None:
+        # Subclasses like the zero copy nodes are stored as their base
+        kind = next(k for t, k in _KINDS.items() if isinstance(node, t))
+    return kind
+
+
+@dataclass(slots=True)
+class FlatTree:
+    """A compact form of a MarkdownTree that stores the nodes in a handful of
+    arrays instead of one object per node.
+
+    The nodes are stored in preorder, a node is followed by all of its
+    descendants and `ends[i]` is the index right after the last of them. For
+    each node `kinds` holds its index in `NODE_TYPES`, `values` and `extras`
+    hold its fields as indexes into `strings` (or the size of a header), and
+    unused fields are `NONE`. Equal strings are only stored once.
+
+    The strings are stored themselves, not as offsets into the source, as the
+    nodes don't know where in the source they came from, only the zero copy
+    ones do, and trees built by hand or decoded from bytes have no source at
+    all.
+
+    `node(i)` turns a node and its descendants back into the regular node
+    classes, when needed.
+    """
+
+    metadata: dict[str, str]
+    kinds: array = field(default_factory=lambda: array("B"))
+    ends: array = field(default_factory=lambda: array("L"))
+    values: array = field(default_factory=lambda: array("l"))
+    extras: array = field(default_factory=lambda: array("l"))
+    strings: list[str] = field(default_factory=list)
+
+    @classmethod
+    def from_tree(cls: type[Self], tree: MarkdownTree) -> Self:
+        flat = cls(dict(tree.metadata))
+        interned: dict[str, int] = {}
+
+        def intern(string: str | None) -> int:
+            if string is None:
+                return NONE
+            index = interned.get(string)
+            if index is None:
+                index = interned[string] = len(flat.strings)
+                flat.strings.append(string)
+            return index
+
+        # An explicit stack, deep documents would exceed the recursion limit.
+        # A node is pushed with -1 to be added, and again with its index to
+        # set its end once all of its descendants were added.
+        stack: list[tuple[Node, int]] = [
+            (child, -1) for child in reversed(tree.children)
+        ]
+        while stack:
+            node, index = stack.pop()
+            if index != -1:
+                flat.ends[index] = len(flat.kinds)
+                continue
+
+            kind = _kind_of(node)
+            value = extra = NONE
+            children: Sequence[Node] = ()
+            if isinstance(node, _CONTAINERS):
+                children = node.children
+            elif isinstance(node, TextNode):
+                value = intern(node.text)
+            elif isinstance(node, CodeNode):
+                value = intern(node.code)
+            elif isinstance(node, CommentNode):
+                value = intern(node.comment)
+            elif isinstance(node, CodeBlockNode):
+                value, extra = intern(node.code), intern(node.language)
+            elif isinstance(node, ImageNode):
+                value, extra = intern(node.url), intern(node.description)
+            elif isinstance(node, LinkNode):
+                value, children = intern(node.url), node.children
+            elif isinstance(node, HeaderNode):
+                value, children = node.header_size, node.children
+            elif isinstance(node, UnorderedListNode):
+                children = node.items
+
+            stack.append((node, len(flat.kinds)))
+            stack.extend((child, -1) for child in reversed(children))
+            flat.kinds.append(kind)
+            flat.ends.append(0)
+            flat.values.append(value)
+            flat.extras.append(extra)
+        return flat
+
+    def to_tree(self: Self) -> MarkdownTree:
+        return MarkdownTree(dict(self.metadata), [self.node(i) for i in self.roots()])
+
+    def __len__(self: Self) -> int:
+        return len(self.kinds)
+
+    def roots(self: Self) -> list[int]:
+        """The indexes of the top level blocks."""
+        return self._siblings(0, len(self.kinds))
+
+    def children(self: Self, index: int) -> list[int]:
+        """The indexes of the direct children of a node."""
+        return self._siblings(index + 1, self.ends[index])
+
+    def _siblings(self: Self, start: int, end: int) -> list[int]:
+        indexes = []
+        ends = self.ends
+        while start < end:
+            indexes.append(start)
+            start = ends[start]
+        return indexes
+
+    def type_of(self: Self, index: int) -> type[Node]:
+        return NODE_TYPES[self.kinds[index]]
+
+    def string(self: Self, index: int) -> str | None:
+        """The text, code, comment or url of a node."""
+        value = self.values[index]
+        if value == NONE or self.type_of(index) is HeaderNode:
+            return None
+        return self.strings[value]
+
+    def node(self: Self, index: int) -> Node:
+        """Build the regular node at `index`, with all of its descendants."""
+        # Nodes are built after their children, so in reverse preorder, with
+        # the finished nodes on a stack, first child on top.
+        built: list[Node] = []
+        for i in range(self.ends[index] - 1, index - 1, -1):
+            node_type = NODE_TYPES[self.kinds[i]]
+            value, extra = self.values[i], self.extras[i]
+            children: list[Node] = []
+            if node_type in _PARENTS:
+                child = i + 1
+                while child < self.ends[i]:
+                    children.append(built.pop())
+                    child = self.ends[child]
+
+            if node_type in _CONTAINERS:
+                node = node_type(children)  # type: ignore[call-arg]
+            elif node_type is HeaderNode:
+                node = HeaderNode(value, children)
+            elif node_type is LinkNode:
+                node = LinkNode(self.strings[value], children)
+            elif node_type is UnorderedListNode:
+                node = UnorderedListNode(children)  # type: ignore[arg-type]
+            elif node_type is CodeBlockNode:
+                language = None if extra == NONE else self.strings[extra]
+                node = CodeBlockNode(language, self.strings[value])
+            elif node_type is ImageNode:
+                node = ImageNode(self.strings[value], self.strings[extra])
+            else:
+                node = node_type(self.strings[value])  # type: ignore[call-arg]
+            built.append(node)
+        return built[0]
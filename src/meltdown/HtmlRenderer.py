@@ -1,5 +1,8 @@
 import html
-from typing import Self
+from collections.abc import Callable, Iterator, Sequence
+from functools import cache
+from time import perf_counter
+from typing import Any, Self
 
 from .Nodes import (
     BoldNode,
@@ -12,6 +15,7 @@ from .Nodes import (
     LinkNode,
     ListItemNode,
     MarkdownTree,
+    Node,
     ParagraphNode,
     QuoteBlockNode,
     Renderer,
@@ -19,19 +23,210 @@ from .Nodes import (
     TextNode,
     UnorderedListNode,
 )
+from .Stats import Stats
+
+# The opening tag, the children and the closing tag of a node with children.
+type _Opened = tuple[str, Sequence[Node], str]
+
+
+def _open_paragraph(node: ParagraphNode) -> _Opened:
+    return "<p>", node.children, "</p>\n"
+
+
+def _open_header(node: HeaderNode) -> _Opened:
+    return f"<h{node.header_size}>", node.children, f"</h{node.header_size}>\n"
+
+
+def _open_quote_block(node: QuoteBlockNode) -> _Opened:
+    return "<blockquote>", node.children, "</blockquote>"
+
+
+def _open_list_item(node: ListItemNode) -> _Opened:
+    return "<li>", node.children, "</li>\n"
+
+
+def _open_unordered_list(node: UnorderedListNode) -> _Opened:
+    return "<ul>\n", node.items, "</ul>\n"
+
+
+def _open_emph(node: EmphNode) -> _Opened:
+    return "<em>", node.children, "</em>"
+
+
+def _open_strikethrough(node: StrikeThroughNode) -> _Opened:
+    return "<del>", node.children, "</del>"
+
+
+def _open_bold(node: BoldNode) -> _Opened:
+    return "<strong>", node.children, "</strong>"
+
+
+def _open_link(node: LinkNode) -> _Opened:
+    # FIXME: escape url
+    return f'<a href="{node.url}">', node.children, "</a>"
+
+
+def _render_text(_: "HtmlRenderer", node: TextNode) -> str:
+    """The default visit_text without the method lookup, text is the most
+    common node by far."""
+    return html.escape(node.text.replace("\n", " "))
+
+
+# Node type -> the visit method that renders it and, for nodes with children,
+# how the default one opens it.
+_OPENERS: dict[type[Node], tuple[str, Callable[[Any], _Opened]]] = {
+    ParagraphNode: ("visit_paragraph", _open_paragraph),
+    HeaderNode: ("visit_header", _open_header),
+    QuoteBlockNode: ("visit_quote_block", _open_quote_block),
+    ListItemNode: ("visit_list_item", _open_list_item),
+    UnorderedListNode: ("visit_unordered_list", _open_unordered_list),
+    EmphNode: ("visit_emph", _open_emph),
+    StrikeThroughNode: ("visit_strikethrough", _open_strikethrough),
+    BoldNode: ("visit_bold", _open_bold),
+    LinkNode: ("visit_link", _open_link),
+}
+_LEAVES: dict[type[Node], str] = {
+    CodeBlockNode: "visit_code_block",
+    CodeNode: "visit_code",
+    ImageNode: "visit_image",
+    TextNode: "visit_text",
+    CommentNode: "visit_comment",
+}
+
+
+class _DispatchTable:
+    """How a renderer class renders each type of node: nodes with children
+    whose visit method isn't overridden are opened in place, all others are
+    handed to their visit method."""
+
+    __slots__ = ("openers", "visits")
+
+    def __init__(self: Self, cls: type["HtmlRenderer"]):
+        self.openers: dict[type[Node], Callable[[Any], _Opened]] = {}
+        self.visits: dict[type[Node], Callable[[Any, Any], str]] = {}
+        for node_type, (name, opener) in _OPENERS.items():
+            method = getattr(cls, name)
+            if method is getattr(HtmlRenderer, name):
+                self.openers[node_type] = opener
+            else:
+                self.visits[node_type] = method
+        for node_type, name in _LEAVES.items():
+            self.visits[node_type] = getattr(cls, name)
+        if self.visits[TextNode] is HtmlRenderer.visit_text:
+            self.visits[TextNode] = _render_text
+
+    def resolve(self: Self, node_type: type[Node]) -> None:
+        """Add a subclass of a known node type, like the zero copy nodes, with
+        the handler of its base. Unknown types go through their accept."""
+        for base, opener in list(self.openers.items()):
+            if issubclass(node_type, base):
+                self.openers[node_type] = opener
+                return
+        for base, visit in list(self.visits.items()):
+            if issubclass(node_type, base):
+                self.visits[node_type] = visit
+                return
+        self.visits[node_type] = lambda renderer, node: node.accept(renderer)
+
+
+@cache
+def _dispatch_table(cls: type["HtmlRenderer"]) -> _DispatchTable:
+    return _DispatchTable(cls)
 
 
 class HtmlRenderer(Renderer):
+    """Renders without recursion, however deeply the nodes are nested, by
+    walking the tree with an explicit stack and a table of how each type of
+    node is rendered, into a single buffer.
+
+    Overridden `visit_*` methods of subclasses are called for the nodes they
+    render, the default ones of nodes with children all go through `_render`.
+
+    With `stats` the count and time of every type of node are added to it,
+    for overridden methods that is the time of the whole method.
+    """
+
+    def _render(self: Self, opening: str, nodes: Sequence[Node], closing: str) -> str:
+        if self.stats is not None:
+            return self._render_with_stats(opening, nodes, closing, self.stats)
+        table = _dispatch_table(type(self))
+        openers, visits = table.openers, table.visits
+        output = [opening]
+        append = output.append
+        # The children still to be rendered of every open node, with its
+        # closing tag, the innermost on top.
+        stack: list[tuple[Iterator[Node], str]] = [(iter(nodes), closing)]
+        while stack:
+            children, closing = stack[-1]
+            for node in children:
+                node_type = type(node)
+                opener = openers.get(node_type)
+                if opener is not None:
+                    opening, grandchildren, inner_closing = opener(node)
+                    append(opening)
+                    stack.append((iter(grandchildren), inner_closing))
+                    break
+                visit = visits.get(node_type)
+                if visit is None:
+                    table.resolve(node_type)
+                    # Handle it again, now that its type is known
+                    stack.append((iter((node,)), ""))
+                    break
+                append(visit(self, node))
+            else:
+                stack.pop()
+                append(closing)
+        return "".join(output)
+
+    def _render_with_stats(
+        self: Self, opening: str, nodes: Sequence[Node], closing: str, stats: Stats
+    ) -> str:
+        """Like `_render`, but timing every node, kept apart so that rendering
+        without stats doesn't pay for it."""
+        table = _dispatch_table(type(self))
+        openers, visits = table.openers, table.visits
+        output = [opening]
+        append = output.append
+        # Like in `_render`, with the type of each open node and when it was
+        # opened, the outermost has no type.
+        stack: list[tuple[Iterator[Node], str, str | None, float]] = [
+            (iter(nodes), closing, None, 0.0)
+        ]
+        while stack:
+            children, closing, name, start = stack[-1]
+            for node in children:
+                node_type = type(node)
+                opener = openers.get(node_type)
+                if opener is not None:
+                    started = perf_counter()
+                    opening, grandchildren, inner_closing = opener(node)
+                    append(opening)
+                    name = node_type.__name__
+                    stack.append((iter(grandchildren), inner_closing, name, started))
+                    break
+                visit = visits.get(node_type)
+                if visit is None:
+                    table.resolve(node_type)
+                    stack.append((iter((node,)), "", None, 0.0))
+                    break
+                started = perf_counter()
+                append(visit(self, node))
+                stats.record("render", node_type.__name__, perf_counter() - started)
+            else:
+                stack.pop()
+                append(closing)
+                if name is not None:
+                    stats.record("render", name, perf_counter() - start)
+        return "".join(output)
+
     def visit_tree(self: Self, node: MarkdownTree) -> str:
-        return "".join(c.accept(self) for c in node.children)
+        return self._render("", node.children, "")
 
     def visit_paragraph(self: Self, node: ParagraphNode) -> str:
-        child_content = "".join(c.accept(self) for c in node.children)
-        return "<p>" + child_content + "</p>\n"
+        return self._render(*_open_paragraph(node))
 
     def visit_header(self: Self, node: HeaderNode) -> str:
-        child_content = "".join(c.accept(self) for c in node.children)
-        return f"<h{node.header_size}>" + child_content + f"</h{node.header_size}>\n"
+        return self._render(*_open_header(node))
 
     def visit_code_block(self: Self, node: CodeBlockNode) -> str:
         output = "<pre"
@@ -43,36 +238,28 @@ class HtmlRenderer(Renderer):
         return output
 
     def visit_quote_block(self: Self, node: QuoteBlockNode) -> str:
-        inner = "".join(c.accept(self) for c in node.children)
-        return "<blockquote>" + inner + "</blockquote>"
+        return self._render(*_open_quote_block(node))
 
     def visit_list_item(self: Self, node: ListItemNode) -> str:
-        inner = "".join(c.accept(self) for c in node.children)
-        return "<li>" + inner + "</li>\n"
+        return self._render(*_open_list_item(node))
 
     def visit_unordered_list(self: Self, node: UnorderedListNode) -> str:
-        inner = "".join(c.accept(self) for c in node.items)
-        return "<ul>\n" + inner + "</ul>\n"
+        return self._render(*_open_unordered_list(node))
 
     def visit_emph(self: Self, node: EmphNode) -> str:
-        inner = "".join(c.accept(self) for c in node.children)
-        return "<em>" + inner + "</em>"
+        return self._render(*_open_emph(node))
 
     def visit_strikethrough(self: Self, node: StrikeThroughNode) -> str:
-        inner = "".join(c.accept(self) for c in node.children)
-        return "<del>" + inner + "</del>"
+        return self._render(*_open_strikethrough(node))
 
     def visit_bold(self: Self, node: BoldNode) -> str:
-        inner = "".join(c.accept(self) for c in node.children)
-        return "<strong>" + inner + "</strong>"
+        return self._render(*_open_bold(node))
 
     def visit_code(self: Self, node: CodeNode) -> str:
         return f"<code>{html.escape(node.code)}</code>"
 
     def visit_link(self: Self, node: LinkNode) -> str:
-        # FIXME: escape url
-        inner = "".join(c.accept(self) for c in node.children)
-        return f'<a href="{node.url}">{inner}</a>'
+        return self._render(*_open_link(node))
 
     def visit_image(self: Self, node: ImageNode) -> str:
         # FIXME: escape url
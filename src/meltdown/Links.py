@@ -0,0 +1,71 @@
+"""The links and images of a document, found without building its tree."""
+
+from collections.abc import Iterator
+from dataclasses import dataclass, field
+from typing import NamedTuple, Self
+
+from .MarkdownParser import MarkdownParser, ParseContext
+from .Nodes import Node
+
+
+class Link(NamedTuple):
+    # "link" or "image"
+    kind: str
+    url: str
+    # The markdown between the brackets of a link, the alt text of an image
+    text: str
+    # Where the "[" of the link or the "![" of the image is in the source
+    offset: int
+
+
+@dataclass(slots=True)
+class _ExtractContext(ParseContext):
+    # Those of the current block
+    links: list[Link] = field(default_factory=list)
+
+
+class _LinkExtractor(MarkdownParser):
+    """A parser that only skips over the rich text, collecting the links and
+    images in it, the blocks are parsed as usual."""
+
+    def _parse_rich_text(self: Self, ctx: ParseContext) -> list[Node]:
+        self._skip_rich_text(ctx)
+        return []
+
+    def _skipped_image(
+        self: Self, ctx: ParseContext, url: str, alt: str, offset: int
+    ) -> None:
+        assert isinstance(ctx, _ExtractContext)
+        ctx.links.append(Link("image", url, alt, offset))
+
+    def _skipped_link(
+        self: Self, ctx: ParseContext, url: str, offset: int, text_end: int
+    ) -> None:
+        assert isinstance(ctx, _ExtractContext)
+        # It goes before the images inside of it, which were found first
+        links = ctx.links
+        position = len(links)
+        while position > 0 and links[position - 1].offset > offset:
+            position -= 1
+        text = ctx.source[offset + 1 : text_end]
+        links.insert(position, Link("link", url, text, offset))
+
+
+_extractor = _LinkExtractor()
+
+
+def extract_links(source: str) -> Iterator[Link]:
+    """Yield the links and images of a document as `(kind, url, text,
+    offset)` tuples, in the order they appear in the source.
+
+    They are the same ones `parse` puts into the tree, none in code blocks,
+    code spans or comments, but no nodes are built for the text, which makes
+    it several times faster.
+    """
+    ctx = _ExtractContext(source)
+    _extractor._parse_frontmatter(ctx)
+    while not ctx.is_eof():
+        _extractor._parse_block(ctx)
+        if ctx.links:
+            yield from ctx.links
+            ctx.links.clear()
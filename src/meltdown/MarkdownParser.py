@@ -1,6 +1,15 @@
+import mmap
+import os
+import re
 import string
+from bisect import bisect_right
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from functools import cache, partial
+from time import perf_counter
 from typing import Self
 
+from .DocumentIndex import DocumentIndex
 from .Nodes import (
     BoldNode,
     CodeBlockNode,
@@ -9,458 +18,1146 @@ from .Nodes import (
     EmphNode,
     HeaderNode,
     ImageNode,
+    LazyHeaderNode,
+    LazyListItemNode,
+    LazyParagraphNode,
+    LazyQuoteBlockNode,
     LinkNode,
     ListItemNode,
+    MarkdownStream,
     MarkdownTree,
     Node,
     ParagraphNode,
     QuoteBlockNode,
+    SourceCodeBlockNode,
+    SourceCodeNode,
+    SourceCommentNode,
+    SourceMap,
+    SourceTextNode,
     StrikeThroughNode,
     TextNode,
     UnorderedListNode,
+    _is_parsed,
 )
+from .Stats import Stats
+
+
+# Consuming a run of characters is one of the most common things the parser
+# does, so instead of walking the source one character at a time the whole run
+# is found by a compiled character class and returned as a single slice.
+@cache
+def _run_of(symbols: str) -> re.Pattern[str]:
+    return re.compile(f"[{re.escape(symbols)}]*")
+
+
+@cache
+def _run_of_all_but(symbols: str) -> re.Pattern[str]:
+    return re.compile(f"[^{re.escape(symbols)}]*")
+
+
+# The characters that can start or end any inline formatting, everything else
+# in rich text is plain text.
+_MARKUP_CHARS = frozenset("*_~`[!]<\n")
+_PLAIN_TEXT = re.compile(r"[^*_~`\[!\]<\n]*")
+
+_ALLOWED_ADJACENT = frozenset(string.whitespace + string.punctuation)
+
+# What can't hold the markup of a span, nor end its block
+_TEXT = r"[^*_~`\[!\]<\n]"
+
+
+@cache
+def _plain_run(
+    stop_newline: bool, inside_link: bool, bold: bool, emph: bool, strike: bool
+) -> re.Pattern[str]:
+    """A run of what `_parse_rich_text` treats as text, or as code, which can't
+    hold links either, with these flags set. It ends on what might mean
+    something, so that only that has to be looked at one by one.
+
+    Spans of only text are part of the run as well, where their flag isn't
+    set, as opening and closing them sets it and clears it again."""
+    pattern = rf"{_TEXT}+|`[^`\n\0]*`|`|~(?!~)|!(?!\[)|<(?!!--)"
+    # Inside of a link a "[" is text, and outside of one a "]" is
+    pattern += r"|\[" if inside_link else r"|\]"
+    if not stop_newline:
+        pattern += r"|\n(?![\n#])"
+    if not bold:
+        pattern += rf"|\*\*{_TEXT}*\*\*"
+    if not emph:
+        # Before another star the closing one would open a bold span
+        pattern += rf"|\*{_TEXT}+\*(?!\*)"
+    if not strike:
+        pattern += rf"|~~{_TEXT}*~~"
+    return re.compile(f"(?:{pattern})*")
+
+
+# The flags of a `ParseContext` that rich text is parsed in: stop_newline,
+# inside_emph, inside_bold, inside_code, inside_strikethrough and inside_link
+type _InlineState = tuple[bool, bool, bool, bool, bool, bool]
+
+# How far past its end the parser might look while parsing a block.
+_LOOKAHEAD = 8
+
+# The shortest string a zero copy node is used for, below that a copy takes
+# less memory than the offsets.
+_MIN_SHARED_LENGTH = 40
+
+# Files are parsed in pieces of about this many bytes, cut at blank lines.
+_FILE_PIECE_SIZE = 1 << 16
+_BLANK_LINE = re.compile(rb"\n\r?\n")
+
+# Finds the part of a code block that is left after stripping whitespace.
+_STRIPPED = re.compile(r"\s*(\S(?:.*\S)?)?", re.DOTALL)
+
+
+@dataclass(slots=True)
+class ParseContext:
+    """Everything that changes while one document is parsed: the source, the
+    position in it, the inline spans the parser is inside of and what it has
+    found out about the blocks so far. Every parse gets a new one, so one
+    parser can parse any number of documents at once, in any threads."""
+
+    source: str
+    index: int = 0
+    stop_newline: bool = False
+    inside_emph: bool = False
+    inside_bold: bool = False
+    inside_code: bool = False
+    inside_strikethrough: bool = False
+    inside_link: bool = False
+    # Closer -> the position from where on it was searched for in vain
+    unclosed: dict[str, int] = field(default_factory=dict)
+    # Where the first top level block with such an opener starts, as all of
+    # it has to be parsed again once the closer might be there
+    unclosed_from: int | None = None
+    # Stop symbols -> the last search for them, from where to where it went
+    stops: dict[str, tuple[int, int]] = field(default_factory=dict)
+    # The span of each top level block, and how far the parser had looked
+    # when it was done with it
+    spans: list[tuple[int, int]] = field(default_factory=list)
+    reach: int = 0
+    reaches: list[int] = field(default_factory=list)
+    # Where the finished blocks are indexed, if they are
+    document_index: DocumentIndex | None = None
+
+    def source_map(self: Self) -> SourceMap:
+        return SourceMap(self.source, self.spans, self.reaches, self.unclosed_from)
+
+    def add_span(self: Self, start_index: int) -> None:
+        self.reach = max(self.reach, self.index)
+        self.spans.append((start_index, self.index))
+        self.reaches.append(self.reach)
+
+    def is_eof(self: Self) -> bool:
+        return self.index >= len(self.source)
+
+    def find(self: Self, closer: str) -> int:
+        """Find the next `closer` at or after the current position without
+        consuming anything, returns -1 if there is none.
+
+        Misses are remembered, as an opener without a closer is parsed as text
+        and a document with many of them would otherwise search the rest of
+        the source again for every single one.
+        """
+        missing_from = self.unclosed.get(closer)
+        if missing_from is not None and self.index >= missing_from:
+            return -1
+
+        index = self.source.find(closer, self.index)
+        if index == -1:
+            self.unclosed[closer] = self.index
+            if self.unclosed_from is None:
+                # The current block starts after the end of the last one
+                self.unclosed_from = self.spans[-1][1] if self.spans else 0
+        return index
+
+    def stop_at(self: Self, stop_symbols: str, index: int) -> int:
+        """The position of the first of the `stop_symbols` at or after `index`,
+        or the end of the source.
+
+        The last search for each is remembered, as a search from anywhere it
+        went over ends at the same spot, otherwise every one of many openers
+        on a line without their closer would search to the end of the line.
+        """
+        start, end = self.stops.get(stop_symbols, (0, -1))
+        if not start <= index <= end:
+            match = _run_of_all_but(stop_symbols).match(self.source, index)
+            assert match is not None
+            end = match.end()
+            self.stops[stop_symbols] = (index, end)
+            if end > self.reach:
+                self.reach = end
+        return end
+
+    def consume_while(self: Self, symbols: str) -> str:
+        return self.consume_span(_run_of(symbols))
+
+    def consume_till(self: Self, stop_symbols: str) -> str:
+        return self.consume_span(_run_of_all_but(stop_symbols))
+
+    def consume_span(self: Self, pattern: re.Pattern[str]) -> str:
+        start_index = self.index
+        self.skip(pattern)
+        return self.source[start_index : self.index]
+
+    def skip(self: Self, pattern: re.Pattern[str]) -> None:
+        # The patterns can always match the empty string, so they never fail.
+        match = pattern.match(self.source, self.index)
+        assert match is not None
+        self.index = match.end()
+        # Callers might rewind after scanning, remember how far they looked
+        if self.index > self.reach:
+            self.reach = self.index
+
+    def consume(self: Self) -> str:
+        if self.is_eof():
+            return "\0"
+
+        char = self.source[self.index]
+        self.index += 1
+        return char
+
+    def match(self: Self, target: str) -> bool:
+        for n, c in enumerate(target):
+            if c != self.peekn(n):
+                return False
+
+        for _ in target:
+            self.consume()
+
+        return True
+
+    def peek(self: Self) -> str:
+        if self.is_eof():
+            return "\0"
+
+        return self.source[self.index]
+
+    def peekn(self: Self, n: int) -> str:
+        if self.index + n >= len(self.source):
+            return "\0"
+
+        return self.source[self.index + n]
+
+    def previous(self: Self) -> str:
+        if self.index == 0:
+            return "\0"
+
+        return self.source[self.index - 1]
 
 
 class MarkdownParser:
+    """Parses markdown into trees. A parser holds only its configuration, the
+    state of each parse is kept in a `ParseContext` of its own, so a single
+    parser can be shared by all threads."""
+
+    def __init__(
+        self: Self,
+        zero_copy: bool = False,
+        stats: Stats | None = None,
+        index: bool = False,
+        lazy: bool = False,
+    ):
+        """With `zero_copy` the text of longer text, code and comment nodes
+        isn't copied out of the source, the nodes keep the source and their
+        offsets into it instead (see `SourceTextNode` and friends). That saves
+        memory for documents kept around after parsing, but every node keeps
+        the whole source alive.
+
+        With `stats` the time spent in each phase of parsing and the number
+        of nodes of each type are added to it. Without, nothing is measured.
+
+        With `index` the trees (and streams) get a `DocumentIndex` of their
+        headers, links, images and words, built as each block is parsed.
+
+        With `lazy` only the blocks are parsed right away. The rich text of
+        paragraphs, headers, quotes and list items is only skipped over, to
+        find where the block ends, and parsed the first time the children of
+        the block are read or rendered (see `LazyParagraphNode` and friends).
+        Looking at a few blocks of a long document then costs little more
+        than finding its blocks. An index needs all children, so it makes
+        parsing lazily pointless.
+        """
+        self.zero_copy = zero_copy
+        self.stats = stats
+        self.index = index
+        self.lazy = lazy
+
     def parse(self: Self, source: str):
-        self._source = source
-        self._index = 0
-        self._stop_newline: bool = False
-        self._inside_emph: bool = False
-        self._inside_bold: bool = False
-        self._inside_code: bool = False
-        self._inside_strikethrough: bool = False
-        self._inside_link: bool = False
+        ctx = ParseContext(source)
+        if self.index:
+            ctx.document_index = DocumentIndex()
+        metadata = self._parse_frontmatter(ctx)
+        blocks = self._parse_blocks(ctx)
+
+        return MarkdownTree(metadata, blocks, ctx.source_map(), ctx.document_index)
+
+    def reparse(
+        self: Self, tree: MarkdownTree, offset: int, deleted: int, inserted: str
+    ) -> MarkdownTree:
+        """Parse the document again after an edit, which replaced `deleted`
+        characters at `offset` with `inserted`. The result is the same as a
+        full parse of the new source, but only the top level blocks around the
+        edit are parsed again, all others are reused from `tree`.
+        """
+        source_map = tree.source_map
+        if source_map is None:
+            raise ValueError("The tree has no source map to reparse it with.")
+        old_source = source_map.source
+        if not (offset >= 0 and deleted >= 0 and offset + deleted <= len(old_source)):
+            raise ValueError("The edit is out of the bounds of the document.")
+
+        source = old_source[:offset] + inserted + old_source[offset + deleted :]
+        delta = len(inserted) - deleted
+        spans = source_map.spans
+        old_reaches = source_map.reaches
+
+        # Blocks might have looked past their end, even into the edit, so the
+        # first block to parse again is the first one that looked at anything
+        # less than a few characters before the edit.
+        first = bisect_right(old_reaches, offset - _LOOKAHEAD)
+        restart = spans[first - 1][1] if first > 0 else 0
+
+        # Openers without a closer searched the whole rest of the document, an
+        # edit after them might have closed them.
+        unclosed_from = source_map.unclosed_from
+        if unclosed_from is not None and unclosed_from <= restart:
+            return self.parse(source)
+
+        ctx = ParseContext(source, index=restart)
+        children = tree.children[:first]
+        ctx.spans = spans[:first]
+        ctx.reaches = old_reaches[:first]
+        ctx.reach = ctx.reaches[-1] if first > 0 else 0
+        # After the reach, as the frontmatter might look ahead as well
+        metadata = self._parse_frontmatter(ctx) if first == 0 else tree.metadata
+
+        # As soon as a block ends at the same spot as an old block after the
+        # edit, everything that follows has to parse the same as before.
+        old_ends = {end: i for i, (_, end) in enumerate(spans[first:], first)}
+        reused = None
+        parse_block = self._parse_block if self.stats is None else self._timed_block
+        while not ctx.is_eof():
+            start_index = ctx.index
+            block = parse_block(ctx)
+            if block is not None:
+                children.append(block)
+                ctx.add_span(start_index)
+
+            if ctx.index > offset + len(inserted):
+                reused = old_ends.get(ctx.index - delta)
+                if reused is not None:
+                    break
+
+        source_map = ctx.source_map()
+        if reused is not None:
+            children += tree.children[reused + 1 :]
+            source_map.spans += [(s + delta, e + delta) for s, e in spans[reused + 1 :]]
+            for reach in old_reaches[reused + 1 :]:
+                ctx.reach = max(ctx.reach, reach + delta)
+                source_map.reaches.append(ctx.reach)
+
+            # The old openers without closers in the reused blocks are still
+            # unclosed. Those in the blocks parsed again are found again, if
+            # they are still unclosed, but it's fine to err on the early side.
+            if unclosed_from is not None:
+                if unclosed_from >= spans[reused][1]:
+                    unclosed_from += delta
+                else:
+                    unclosed_from = restart
+                if source_map.unclosed_from is not None:
+                    unclosed_from = min(unclosed_from, source_map.unclosed_from)
+                source_map.unclosed_from = unclosed_from
+
+        # The reused blocks have to be indexed again, too
+        index = DocumentIndex.of(children) if self.index else None
+        return MarkdownTree(metadata, children, source_map, index)
+
+    def parse_iter(self: Self, lines: Iterable[str]) -> MarkdownStream:
+        """Parse a document from a file object or any other iterable of lines
+        (with their line endings) and yield the top level blocks as soon as
+        they are complete.
+
+        The frontmatter is parsed right away and available on the returned
+        stream before the first block. Only the blocks that aren't finished yet
+        are held in memory. A block that can't be finished before the end of
+        the input, like an unclosed code block, is buffered until the end.
+        """
+        chunks = self._parse_chunks(lines)
+        metadata, blocks = next(chunks)
+        index = DocumentIndex() if self.index else None
+        return MarkdownStream(
+            metadata, self._chain_blocks(blocks, chunks, index), index
+        )
+
+    def parse_file(self: Self, path: str | os.PathLike[str]) -> MarkdownTree:
+        """Parse a UTF-8 file without reading all of it into memory first.
+
+        The file is memory mapped and cut at blank lines into pieces, which
+        are decoded and parsed one after the other like with `parse_iter`, so
+        the whole text of the file is never in memory at once. Line endings
+        are translated like when reading a file in text mode. The tree has no
+        source map, so it can't be reparsed.
+        """
+        stream = self.parse_iter(self._file_pieces(path))
+        return MarkdownTree(stream.metadata, list(stream), index=stream.index)
+
+    def _file_pieces(self: Self, path: str | os.PathLike[str]) -> Iterator[str]:
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be mapped
+                yield ""
+                return
 
-        metadata = self._parse_frontmatter()
-        blocks = self._parse_blocks()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                start = 0
+                while start < len(data):
+                    blank_line = _BLANK_LINE.search(data, start + _FILE_PIECE_SIZE)
+                    end = blank_line.end() if blank_line else len(data)
+                    piece = data[start:end].decode("utf-8")
+                    yield piece.replace("\r\n", "\n").replace("\r", "\n")
+                    start = end
+
+    def parse_frontmatter(self: Self, source: str | Iterable[str]) -> dict[str, str]:
+        """Parse only the frontmatter of a document, given as a string or as a
+        file object or any other iterable of lines (with their line endings).
+
+        Lines are read no further than the end of the frontmatter, so the rest
+        of a file is never read, unless the frontmatter isn't closed.
+        """
+        if isinstance(source, str):
+            return self._parse_frontmatter(ParseContext(source))
+
+        head: list[str] = []
+        started = False
+        for line in source:
+            head.append(line)
+            if line == "\n" or not line.endswith("\n"):
+                continue
+
+            # The head is parsed again only for lines that might decide the
+            # frontmatter: the first one, the closing one or a malformed one.
+            content = line.lstrip(" ")
+            if started and (
+                content.strip() == ""
+                or (":" in content and not content.startswith("---"))
+            ):
+                continue
+
+            started = True
+            ctx = ParseContext("".join(head))
+            metadata = self._parse_frontmatter(ctx)
+            if "---" not in ctx.unclosed:
+                return metadata
+
+        return self._parse_frontmatter(ParseContext("".join(head)))
+
+    def _chain_blocks(
+        self: Self,
+        blocks: list[Node],
+        chunks: Iterator[tuple[dict[str, str], list[Node]]],
+        index: DocumentIndex | None,
+    ) -> Iterator[Node]:
+        # Indexed only as they are yielded, a chunk might be parsed twice
+        for block in blocks:
+            if index is not None:
+                index.add(block)
+            yield block
+        for _, blocks in chunks:
+            for block in blocks:
+                if index is not None:
+                    index.add(block)
+                yield block
+
+    def _parse_chunks(
+        self: Self, pieces: Iterable[str]
+    ) -> Iterator[tuple[dict[str, str], list[Node]]]:
+        """Cut the input at blank lines into chunks that parse the same on
+        their own as they do as part of the whole document, and yield the
+        frontmatter and blocks of each. The first chunk is always yielded,
+        even for an empty input.
+
+        Between blocks the parser carries no state except for the position,
+        and a blank line ends every block, so a chunk ending in a blank line is
+        safe to parse on its own, unless some opener in it searched for its
+        closer in vain. Such a closer might still come, so the chunk is kept
+        until a piece containing one of the missing closers arrives.
+        """
+        pending: list[str] = []
+        missing: set[str] = set()
+        is_first = True
+        # The frontmatter skips the newlines at the start, they are kept with
+        # whatever follows them.
+        only_newlines = True
+        for piece in pieces:
+            pending.append(piece)
+            only_newlines = only_newlines and piece.count("\n") == len(piece)
+            if missing and any(closer in piece for closer in missing):
+                missing.clear()
+
+            ends_with_blank_line = piece.endswith("\n\n") or (
+                piece == "\n" and len(pending) > 1 and pending[-2].endswith("\n")
+            )
+            if missing or only_newlines or not ends_with_blank_line:
+                continue
+
+            ctx = self._chunk_context("".join(pending), is_first)
+            metadata, blocks = self._parse_chunk(ctx, is_first, False)
+            if ctx.unclosed:
+                missing = set(ctx.unclosed)
+                continue
 
-        return MarkdownTree(metadata, blocks)
+            yield metadata, blocks
+            pending.clear()
+            is_first = False
+
+        ctx = self._chunk_context("".join(pending), is_first)
+        yield self._parse_chunk(ctx, is_first, True)
+
+    def _chunk_context(self: Self, chunk: str, is_first: bool) -> ParseContext:
+        if is_first:
+            return ParseContext(chunk)
+        # The newline stands in for the end of the previous chunk, which the
+        # first block of this one might look back at.
+        return ParseContext("\n" + chunk)
+
+    def _parse_chunk(
+        self: Self, ctx: ParseContext, is_first: bool, is_last: bool
+    ) -> tuple[dict[str, str], list[Node]]:
+        metadata = self._parse_frontmatter(ctx) if is_first else {}
+        return metadata, self._parse_blocks(ctx, is_last)
+
+    def _parse_frontmatter(self: Self, ctx: ParseContext) -> dict[str, str]:
+        if self.stats is None:
+            return self._read_frontmatter(ctx)
+        start = perf_counter()
+        metadata = self._read_frontmatter(ctx)
+        self.stats.record("parse", "frontmatter", perf_counter() - start)
+        return metadata
 
-    def _parse_frontmatter(self: Self) -> dict[str, str]:
+    def _read_frontmatter(self: Self, ctx: ParseContext) -> dict[str, str]:
         """A incomplete yaml like frontmatter parser but it only supports top
         level fields."""
 
         metadata = {}
-        start_index = self._index
-        self._consume_while(["\n"])
-        if not self._match("---"):
+        start_index = ctx.index
+        ctx.consume_while("\n")
+        if not ctx.match("---"):
             return metadata
 
-        self._consume_while(["\n", " "])
+        ctx.consume_while("\n ")
 
-        while not self._match("---") and not self._is_eof():
-            line = self._consume_till(["\n", "\0"])
-            self._consume_while(["\n", " "])
+        while not ctx.match("---") and not ctx.is_eof():
+            line = ctx.consume_till("\n\0")
+            ctx.consume_while("\n ")
             if line.strip() == "":
                 continue
 
             parts = line.split(":", 1)
             if len(parts) != 2:
                 # Malformed frontmatter, rewind and parse as paragraph
-                self._index = start_index
+                ctx.index = start_index
                 return {}
 
             metadata[parts[0].strip()] = parts[1].strip()
 
-        if self._is_eof():
+        if ctx.is_eof():
             # Malformed frontmatter, rewind and parse as paragraph
-            self._index = start_index
+            ctx.unclosed["---"] = start_index
+            ctx.unclosed_from = start_index
+            ctx.index = start_index
             return {}
 
         return metadata
 
-    def _parse_blocks(self: Self) -> list[Node]:
+    def _parse_blocks(
+        self: Self, ctx: ParseContext, is_last: bool = True
+    ) -> list[Node]:
+        stats = self.stats
+        start = perf_counter() if stats is not None else 0.0
+        parse_block = self._parse_block if stats is None else self._timed_block
         children: list[Node] = []
-        while not self._is_eof():
-            self._stop_newline = False
-            self._inside_emph = False
-            self._inside_bold = False
-            self._inside_code = False
-            self._inside_strikethrough = False
-            self._inside_link: bool = False
-
-            # Skip newlines
-            self._consume_while(["\n"])
-
-            if self._isHeaderStart():
-                counter = 0
-                while self._match("#"):
-                    counter += 1
-                if self._match(" "):
-                    children.append(self._parse_header(counter))
-                    continue
-                else:
-                    children.append(self._parse_paragraph())
-                    continue
-
-            if self._match("```"):
-                counter = 3
-                while self._match("`"):
-                    counter += 1
-
-                children += self._parse_code_block(counter)
-                continue
-
-            if self._match(">"):
-                children.append(self._parse_quote_block())
-                continue
-
-            if self._peek() in ["*", "-"] and self._peekn(1) in [" ", "\t"]:
-                symbol = self._peek()
-                children.append(self._parse_unordered_list(symbol))
-                continue
-
-            paragraph = self._parse_paragraph()
-            if paragraph.children != []:
-                children.append(paragraph)
-
+        while not ctx.is_eof():
+            start_index = ctx.index
+            block = parse_block(ctx, is_last)
+            if block is not None:
+                children.append(block)
+                ctx.add_span(start_index)
+                if ctx.document_index is not None:
+                    ctx.document_index.add(block)
+        if stats is not None:
+            stats.record("parse", "blocks", perf_counter() - start)
         return children
 
-    def _parse_header(self: Self, header_size: int) -> HeaderNode:
-        self._stop_newline = True
-        children = self._parse_rich_text()
-        self._stop_newline = False
-        return HeaderNode(header_size, children)
-
-    def _parse_code_block(self, fence_size: int) -> list[Node]:
+    def _timed_block(
+        self: Self, ctx: ParseContext, is_last: bool = True
+    ) -> Node | None:
+        """Like `_parse_block`, but adds its time and nodes to the stats."""
+        assert self.stats is not None
+        start = perf_counter()
+        block = self._parse_block(ctx, is_last)
+        if block is not None:
+            seconds = perf_counter() - start
+            self.stats.record("parse", type(block).__name__, seconds)
+            counts: dict[str, int] = {}
+            stack = [block]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, UnorderedListNode):
+                    children = node.items
+                elif not _is_parsed(node):
+                    # Nothing to count before the lazy block is read
+                    children = ()
+                else:
+                    children = getattr(node, "children", ())
+                for child in children:
+                    name = type(child).__name__
+                    counts[name] = counts.get(name, 0) + 1
+                stack.extend(children)
+            for name, count in counts.items():
+                self.stats.record("parse", name, 0.0, count)
+        return block
+
+    def _parse_block(
+        self: Self, ctx: ParseContext, is_last: bool = True
+    ) -> Node | None:
+        ctx.stop_newline = False
+        ctx.inside_emph = False
+        ctx.inside_bold = False
+        ctx.inside_code = False
+        ctx.inside_strikethrough = False
+        ctx.inside_link = False
+
+        # Skip newlines
+        ctx.consume_while("\n")
+        if not is_last and ctx.is_eof():
+            # Whatever comes next belongs to the next chunk
+            return None
+
+        if self._isHeaderStart(ctx):
+            counter = 0
+            while ctx.match("#"):
+                counter += 1
+            if ctx.match(" "):
+                return self._parse_header(ctx, counter)
+            else:
+                return self._parse_paragraph(ctx)
+
+        if ctx.match("```"):
+            counter = 3
+            while ctx.match("`"):
+                counter += 1
+
+            return self._parse_code_block(ctx, counter)
+
+        if ctx.match(">"):
+            return self._parse_quote_block(ctx)
+
+        if ctx.peek() in ["*", "-"] and ctx.peekn(1) in [" ", "\t"]:
+            symbol = ctx.peek()
+            return self._parse_unordered_list(ctx, symbol)
+
+        paragraph = self._parse_paragraph(ctx)
+        # Lazy paragraphs have text, so they have children
+        if _is_parsed(paragraph) and paragraph.children == []:
+            return None
+        return paragraph
+
+    def _parse_header(self: Self, ctx: ParseContext, header_size: int) -> HeaderNode:
+        ctx.stop_newline = True
+        if self.lazy:
+            header = LazyHeaderNode(header_size, self._defer_rich_text(ctx))
+        else:
+            header = HeaderNode(header_size, self._parse_rich_text(ctx))
+        ctx.stop_newline = False
+        return header
+
+    def _parse_code_block(self, ctx: ParseContext, fence_size: int) -> Node:
         fence = "`" * fence_size
-        start_index = self._index
+        start_index = ctx.index
 
-        language = self._consume_till(["\n", "\0"]).strip()
-        if not self._match("\n"):
-            return [TextNode(fence + language)]
+        language = ctx.consume_till("\n\0").strip()
+        if not ctx.match("\n"):
+            return TextNode(fence + language)
 
         if language == "":
             language = None
 
-        code = ""
-        while not self._is_eof() and not self._match(fence):
-            code += self._consume()
-
-        if self._is_eof():
+        end_index = ctx.find(fence)
+        if end_index == -1:
             # Rewind and parse as paragraph
-            self._index = start_index
-            rest = self._parse_paragraph()
+            ctx.index = start_index
+            rest = self._parse_paragraph(ctx)
             rest.children = [TextNode(fence)] + rest.children
-            return [rest]
-
-        return [CodeBlockNode(language, code.strip())]
-
-    def _parse_quote_block(self: Self) -> QuoteBlockNode:
+            return rest
+
+        code_start = ctx.index
+        ctx.index = end_index + len(fence)
+        if self.zero_copy and end_index - code_start >= _MIN_SHARED_LENGTH:
+            stripped = _STRIPPED.match(ctx.source, code_start, end_index)
+            assert stripped is not None
+            start, end = stripped.span(1)
+            if start == -1:
+                start = end = code_start
+            return SourceCodeBlockNode(language, ctx.source, start, end)
+
+        code = ctx.source[code_start:end_index]
+        return CodeBlockNode(language, code.strip())
+
+    def _parse_quote_block(self: Self, ctx: ParseContext) -> QuoteBlockNode:
         # FIXME: This should be able to handle headers, recursion and code
         # blocks
 
-        self._stop_newline = True
-        children = self._parse_rich_text()
-        self._stop_newline = False
-        self._match("\n")
-        return QuoteBlockNode(children)
-
-    def _parse_unordered_list(self: Self, symbol: str) -> UnorderedListNode:
+        ctx.stop_newline = True
+        if self.lazy:
+            quote = LazyQuoteBlockNode(self._defer_rich_text(ctx))
+        else:
+            quote = QuoteBlockNode(self._parse_rich_text(ctx))
+        ctx.stop_newline = False
+        ctx.match("\n")
+        return quote
+
+    def _parse_unordered_list(
+        self: Self, ctx: ParseContext, symbol: str
+    ) -> UnorderedListNode:
         items: list[ListItemNode] = []
-        self._stop_newline = True
-        while self._peek() == symbol and self._peekn(1) in [" ", "\t"]:
-            self._consume()
-            self._consume()
-            children = self._parse_rich_text()
-            items.append(ListItemNode(children))
-            self._match("\n")
-        self._stop_newline = False
+        ctx.stop_newline = True
+        while ctx.peek() == symbol and ctx.peekn(1) in [" ", "\t"]:
+            ctx.consume()
+            ctx.consume()
+            if self.lazy:
+                items.append(LazyListItemNode(self._defer_rich_text(ctx)))
+            else:
+                items.append(ListItemNode(self._parse_rich_text(ctx)))
+            ctx.match("\n")
+        ctx.stop_newline = False
         return UnorderedListNode(items)
 
-    def _parse_paragraph(self: Self) -> ParagraphNode:
-        children = self._parse_rich_text()
+    def _parse_paragraph(self: Self, ctx: ParseContext) -> ParagraphNode:
+        if self.lazy:
+            start_index = ctx.index
+            pending = self._defer_rich_text(ctx)
+            if ctx.index == start_index:
+                # Whether the paragraph is dropped depends on its children,
+                # which are quickly parsed if there's no text
+                return ParagraphNode(self._parse_rich_text(ctx))
+            return LazyParagraphNode(pending)
+        children = self._parse_rich_text(ctx)
         return ParagraphNode(children)
 
-    def _parse_rich_text(self: Self) -> list[Node]:
+    def _defer_rich_text(self: Self, ctx: ParseContext) -> Callable[[], list[Node]]:
+        """Skip over the rich text, returns what parses it later on."""
+        state: _InlineState = (
+            ctx.stop_newline,
+            ctx.inside_emph,
+            ctx.inside_bold,
+            ctx.inside_code,
+            ctx.inside_strikethrough,
+            ctx.inside_link,
+        )
+        start_index = ctx.index
+        self._skip_rich_text(ctx)
+        return partial(self._parse_deferred, ctx.source, start_index, state)
+
+    def _parse_deferred(
+        self: Self, source: str, start_index: int, state: _InlineState
+    ) -> list[Node]:
+        # The flags the parse was in when it got to the text
+        ctx = ParseContext(source, start_index, *state)
+        return self._parse_rich_text(ctx)
+
+    def _parse_rich_text(self: Self, ctx: ParseContext) -> list[Node]:
+        """The inline content up to the end of the block, or up to the closer
+        of a span it is inside of.
+
+        Spans (bold, emphasis, strikethrough and links) are parsed without
+        recursion, however deeply they are nested. All nodes of the block are
+        collected in one list, and the spans that are still open are kept on
+        a stack with the token that opened them and where their children
+        start. Each child is preceded by a text of its opening token, which
+        is kept if the span is never closed, and replaced by the span node,
+        with the children after it, otherwise.
+        """
+        stats = self.stats
+        start = perf_counter() if stats is not None else 0.0
         children: list[Node] = []
-
-        def end_current_text():
-            text = self._source[start_index:end_index]
-            if text == "":
-                return
-            children.append(TextNode(text))
-
-        start_index = self._index
-        end_index = self._index
-        while not self._is_eof():
-            end_index = self._index
-
-            if self._peek() == "*":
-                # Bold, two stars
-                if self._peekn(1) == "*":
-                    if self._inside_bold:
-                        break
-                    self._consume()
-                    self._consume()
-                    end_current_text()
-                    children += self._parse_bold("**")
-                    start_index = self._index
-                    end_index = self._index
+        open_spans: list[tuple[str, int]] = []
+        start_index = ctx.index
+        end_index = ctx.index
+        while True:
+            opener = None
+            while not ctx.is_eof():
+                end_index = ctx.index
+
+                char = ctx.source[ctx.index]
+                if char not in _MARKUP_CHARS:
+                    # Most characters are just text, so jump straight to the
+                    # next one that might mean something.
+                    ctx.skip(_PLAIN_TEXT)
+                    end_index = ctx.index - 1
                     continue
 
-                else:
-                    # Emphasis, only one star
-                    if self._inside_emph:
+                if char == "*":
+                    # Bold, two stars
+                    if ctx.peekn(1) == "*":
+                        if ctx.inside_bold:
+                            break
+                        opener = "**"
                         break
-                    self._consume()
-                    end_current_text()
-                    children += self._parse_emph("*")
-                    start_index = self._index
-                    end_index = self._index
-                    continue
 
-            if self._peek() == "_":
-                allowed_adjecent = string.whitespace + string.punctuation
-                if self._peekn(1) == "_":
-                    if self._inside_bold and self._peekn(2) in allowed_adjecent:
+                    else:
+                        # Emphasis, only one star
+                        if ctx.inside_emph:
+                            break
+                        opener = "*"
                         break
 
-                    if self._previous() in allowed_adjecent:
-                        self._consume()
-                        self._consume()
-                        end_current_text()
-                        children += self._parse_bold("__")
-                        start_index = self._index
-                        end_index = self._index
-                        continue
-                else:
-                    if self._inside_emph and self._peekn(1) in allowed_adjecent:
+                if char == "_":
+                    if ctx.peekn(1) == "_":
+                        if ctx.inside_bold and ctx.peekn(2) in _ALLOWED_ADJACENT:
+                            break
+
+                        if ctx.previous() in _ALLOWED_ADJACENT:
+                            opener = "__"
+                            break
+                    else:
+                        if ctx.inside_emph and ctx.peekn(1) in _ALLOWED_ADJACENT:
+                            break
+
+                        if ctx.previous() in _ALLOWED_ADJACENT:
+                            opener = "_"
+                            break
+
+                if char == "~" and ctx.peekn(1) == "~":
+                    if ctx.inside_strikethrough:
                         break
+                    opener = "~~"
+                    break
 
-                    if self._previous() in allowed_adjecent:
-                        self._consume()
-                        end_current_text()
-                        children += self._parse_emph("_")
-                        start_index = self._index
-                        end_index = self._index
-                        continue
+                if char == "`":
+                    if ctx.inside_code:
+                        break
+                    ctx.consume()
+                    if end_index > start_index:
+                        children.append(self._text_node(ctx, start_index, end_index))
+                    children.append(self._parse_code(ctx))
+                    start_index = ctx.index
+                    end_index = ctx.index
+                    continue
 
-            if self._peek() == "~" and self._peekn(1) == "~":
-                if self._inside_strikethrough:
+                if (not ctx.inside_link) and char == "[":
+                    opener = "["
                     break
-                self._consume()
-                self._consume()
-                end_current_text()
-                children += self._parse_strikethrough()
-                start_index = self._index
-                end_index = self._index
-                continue
 
-            if self._peek() == "`":
-                if self._inside_code:
+                if ctx.match("!["):
+                    if end_index > start_index:
+                        children.append(self._text_node(ctx, start_index, end_index))
+                    children += self._parse_image(ctx)
+                    start_index = ctx.index
+                    end_index = ctx.index
+                    continue
+
+                if ctx.inside_link and char == "]":
                     break
-                self._consume()
-                end_current_text()
-                children.append(self._parse_code())
-                start_index = self._index
-                end_index = self._index
-                continue
 
-            if (not self._inside_link) and self._match("["):
-                end_current_text()
-                children += self._parse_link()
-                start_index = self._index
-                end_index = self._index
-                continue
+                if ctx.match("<!--"):
+                    if end_index > start_index:
+                        children.append(self._text_node(ctx, start_index, end_index))
+                    children.append(self._parse_comment(ctx))
+                    start_index = ctx.index
+                    end_index = ctx.index
+                    continue
 
-            if self._match("!["):
-                end_current_text()
-                children += self._parse_image()
-                start_index = self._index
-                end_index = self._index
-                continue
+                if char == "\n":
+                    if ctx.stop_newline:
+                        break
 
-            if self._inside_link and self._peek() == "]":
-                break
+                    if ctx.peekn(1) == "\n":
+                        break
 
-            if self._match("<!--"):
-                end_current_text()
-                children.append(self._parse_comment())
-                start_index = self._index
-                end_index = self._index
+                    if ctx.peekn(1) == "#":
+                        break
+
+                ctx.consume()
+
+            if opener is not None:
+                # Open a span, its children follow
+                ctx.index += len(opener)
+                if end_index > start_index:
+                    children.append(self._text_node(ctx, start_index, end_index))
+                self._open_span(ctx, opener)
+                children.append(TextNode(opener))
+                open_spans.append((opener, len(children)))
+                start_index = ctx.index
+                end_index = ctx.index
                 continue
 
-            if self._peek() == "\n":
-                if self._stop_newline:
+            # The innermost span (or the whole block) ended
+            if ctx.is_eof():
+                end_index += 1
+            if end_index > start_index:
+                children.append(self._text_node(ctx, start_index, end_index))
+            if not open_spans:
+                if stats is not None:
+                    stats.record("parse", "inline", perf_counter() - start)
+                return children
+
+            token, first_child = open_spans.pop()
+            span = self._close_span(ctx, token, children, first_child)
+            if span is not None:
+                # Replaces the text of the opening token and the children
+                del children[first_child - 1 :]
+                children.append(span)
+            start_index = ctx.index
+            end_index = ctx.index
+
+    def _skip_rich_text(self: Self, ctx: ParseContext) -> None:
+        """Move past the inline content like `_parse_rich_text`, leaving the
+        same flags set, but without building any nodes.
+
+        It follows the same rules step by step, as spans that aren't closed
+        change where others, and even the block, end. But it only keeps track
+        of where the spans start, and it jumps over text, code and spans of
+        only text with a regex. The images and links it skips over are passed
+        to `_skipped_image` and `_skipped_link`.
+        """
+        source = ctx.source
+        index = ctx.index
+        # The open spans with where their token starts
+        open_spans: list[tuple[str, int]] = []
+        while True:
+            opener = None
+            plain_run = _plain_run(
+                ctx.stop_newline,
+                ctx.inside_link,
+                ctx.inside_bold,
+                ctx.inside_emph,
+                ctx.inside_strikethrough,
+            )
+            while True:
+                match = plain_run.match(source, index)
+                assert match is not None
+                index = match.end()
+                if index == len(source):
                     break
-
-                if self._peekn(1) == "\n":
+                char = source[index]
+                following = source[index + 1 : index + 2]
+
+                if char == "*":
+                    if following == "*":
+                        if ctx.inside_bold:
+                            break
+                        opener = "**"
+                        break
+                    if ctx.inside_emph:
+                        break
+                    opener = "*"
                     break
 
-                if self._peekn(1) == "#":
+                if char == "_":
+                    previous = source[index - 1] if index > 0 else ""
+                    if following == "_":
+                        after = source[index + 2 : index + 3]
+                        if ctx.inside_bold and after in _ALLOWED_ADJACENT:
+                            break
+                        if previous in _ALLOWED_ADJACENT:
+                            opener = "__"
+                            break
+                    else:
+                        if ctx.inside_emph and following in _ALLOWED_ADJACENT:
+                            break
+                        if previous in _ALLOWED_ADJACENT:
+                            opener = "_"
+                            break
+                    index += 1
+                    continue
+
+                if char == "~":
+                    if ctx.inside_strikethrough:
+                        break
+                    opener = "~~"
                     break
 
-            self._consume()
+                if char == "[":
+                    opener = "["
+                    break
 
-        if end_index is None:
-            end_index = len(self._source) - 1
-        if self._is_eof():
-            end_index += 1
-        if end_index > start_index:
-            text = self._source[start_index:end_index]
-            children.append(TextNode(text))
-        return children
+                if char == "!":
+                    # A "![", as the run takes any other "!", of an image or
+                    # of as much of a broken one as is text
+                    alt_end = ctx.stop_at("]\n\0", index + 2)
+                    if not source.startswith("](", alt_end):
+                        index += 2
+                        continue
+                    url_end = ctx.stop_at(") \n\t\0", alt_end + 2)
+                    if not source.startswith(")", url_end):
+                        index = alt_end + 2
+                        continue
+                    url = source[alt_end + 2 : url_end]
+                    self._skipped_image(ctx, url, source[index + 2 : alt_end], index)
+                    index = url_end + 1
+                    continue
 
-    def _parse_bold(self: Self, start_token: str) -> list[Node]:
-        self._inside_bold = True
-        children = self._parse_rich_text()
+                if char == "<":
+                    ctx.index = index + len("<!--")
+                    end = ctx.find("-->")
+                    index = ctx.index if end == -1 else end + len("-->")
+                    continue
 
-        if self._match(start_token):
-            self._inside_bold = False
-            return [BoldNode(children)]
+                # A "]" closing a link or a newline ending the block
+                break
 
-        return [TextNode(start_token)] + children
+            if opener is not None:
+                open_spans.append((opener, index))
+                index += len(opener)
+                self._open_span(ctx, opener)
+                continue
 
-    def _parse_emph(self: Self, start_token: str) -> list[Node]:
-        self._inside_emph = True
-        children = self._parse_rich_text()
+            # The innermost span (or the whole block) ended
+            if not open_spans:
+                ctx.index = index
+                # Anything the parser skips over stops at the end of its line
+                line_end = source.find("\n", index)
+                ctx.reach = max(ctx.reach, len(source) if line_end == -1 else line_end)
+                return
 
-        if self._match(start_token):
-            self._inside_emph = False
-            return [EmphNode(children)]
+            token, start = open_spans.pop()
+            if token != "[" and not source.startswith(token, index):
+                continue
+            ctx.index = index
+            # Without children, which are all that a node of it would hold
+            span = self._close_span(ctx, token, [], 0)
+            if isinstance(span, LinkNode):
+                self._skipped_link(ctx, span.url, start, index)
+            index = ctx.index
+
+    def _skipped_image(
+        self: Self, ctx: ParseContext, url: str, alt: str, offset: int
+    ) -> None:
+        pass
+
+    def _skipped_link(
+        self: Self, ctx: ParseContext, url: str, offset: int, text_end: int
+    ) -> None:
+        pass
+
+    def _open_span(self: Self, ctx: ParseContext, token: str) -> None:
+        if token in ("**", "__"):
+            ctx.inside_bold = True
+        elif token in ("*", "_"):
+            ctx.inside_emph = True
+        elif token == "~~":
+            ctx.inside_strikethrough = True
+        else:
+            ctx.inside_link = True
+
+    def _close_span(
+        self: Self,
+        ctx: ParseContext,
+        token: str,
+        children: list[Node],
+        first_child: int,
+    ) -> Node | None:
+        """Try to consume the closer of the span opened by `token`, whose
+        children start at `first_child`, returns None if it isn't closed. Spans
+        that stay open remain the text of their tokens, and the flag that
+        they are inside of stays set, too."""
+        if token == "[":
+            return self._close_link(ctx, children, first_child)
+
+        if not ctx.match(token):
+            return None
+        if token in ("**", "__"):
+            ctx.inside_bold = False
+            return BoldNode(children[first_child:])
+        if token in ("*", "_"):
+            ctx.inside_emph = False
+            return EmphNode(children[first_child:])
+        ctx.inside_strikethrough = False
+        return StrikeThroughNode(children[first_child:])
+
+    def _close_link(
+        self: Self, ctx: ParseContext, children: list[Node], first_child: int
+    ) -> Node | None:
+        if not ctx.match("]"):
+            return None
+
+        if not ctx.match("("):
+            children.append(TextNode("]"))
+            return None
 
-        return [TextNode(start_token)] + children
+        # Parsing the url
+        stop_symbols = ") \n\t\0"
+        url = ctx.consume_till(stop_symbols)
 
-    def _parse_strikethrough(self: Self) -> list[Node]:
-        self._inside_strikethrough = True
-        children = self._parse_rich_text()
+        if not ctx.match(")"):
+            # Reset parsing position
+            ctx.index -= len(url)
+            children.append(TextNode("]("))
+            return None
 
-        if self._match("~~"):
-            self._inside_strikethrough = False
-            return [StrikeThroughNode(children)]
+        ctx.inside_link = False
+        return LinkNode(url, children[first_child:])
 
-        return [TextNode("~~")] + children
+    def _text_node(self: Self, ctx: ParseContext, start: int, end: int) -> TextNode:
+        if self.zero_copy and end - start >= _MIN_SHARED_LENGTH:
+            return SourceTextNode(ctx.source, start, end)
+        return TextNode(ctx.source[start:end])
 
-    def _parse_code(self: Self) -> Node:
-        start_index = self._index
-        stop_symbols = ["`", "\n", "\0"]
-        code = self._consume_till(stop_symbols)
+    def _parse_code(self: Self, ctx: ParseContext) -> Node:
+        start_index = ctx.index
+        stop_symbols = "`\n\0"
+        ctx.skip(_run_of_all_but(stop_symbols))
+        end_index = ctx.index
 
-        if not self._match("`"):
+        if not ctx.match("`"):
             # Malformed input, rewind
-            self._index = start_index
+            ctx.index = start_index
             return TextNode("`")
 
-        return CodeNode(code)
+        if self.zero_copy and end_index - start_index >= _MIN_SHARED_LENGTH:
+            return SourceCodeNode(ctx.source, start_index, end_index)
+        return CodeNode(ctx.source[start_index:end_index])
 
-    def _parse_link(self: Self) -> list[Node]:
-        # Parsing the text to of the link
-        self._inside_link = True
-        children = self._parse_rich_text()
+    def _parse_image(self: Self, ctx: ParseContext) -> list[Node]:
+        source = ctx.source
+        alt_end = ctx.stop_at("]\n\0", ctx.index)
+        alt = source[ctx.index : alt_end]
 
-        if not self._match("]"):
-            return [TextNode("[")] + children
-
-        if not self._match("("):
-            return [TextNode("[")] + children + [TextNode("]")]
-
-        # Parsing the url
-        stop_symbols = [")", " ", "\n", "\t", "\0"]
-        url = self._consume_till(stop_symbols)
-
-        if not self._match(")"):
-            # Reset parsing position
-            self._index -= len(url)
-            return [TextNode("[")] + children + [TextNode("](")]
-
-        self._inside_link = False
-        return [LinkNode(url, children)]
-
-    def _parse_image(self: Self) -> list[Node]:
-        alt_stop_symbols = ["]", "\n", "\0"]
-        alt = self._consume_till(alt_stop_symbols)
-
-        if not self._match("]("):
-            # resetting the parsing position
-            self._index -= len(alt)
+        if not source.startswith("](", alt_end):
+            # The position stays right after the "!["
             return [TextNode("![")]
 
         # Parsing the url
-        url_stop_symbols = [")", " ", "\n", "\t", "\0"]
-        url = self._consume_till(url_stop_symbols)
+        url_end = ctx.stop_at(") \n\t\0", alt_end + 2)
 
-        if not self._match(")"):
-            # resetting the parsing position
-            self._index -= len(url)
+        if not source.startswith(")", url_end):
+            ctx.index = alt_end + 2
             return [TextNode("![" + alt + "](")]
 
-        return [ImageNode(url, alt)]
+        ctx.index = url_end + 1
+        return [ImageNode(source[alt_end + 2 : url_end], alt)]
 
-    def _parse_comment(self: Self) -> Node:
-        start_index = self._index
-        comment = ""
-        while not self._match("-->"):
-            if self._is_eof():
-                # Rewind
-                self._index = start_index
-                return TextNode("<!--")
+    def _parse_comment(self: Self, ctx: ParseContext) -> Node:
+        end_index = ctx.find("-->")
+        if end_index == -1:
+            return TextNode("<!--")
 
-            comment += self._consume()
+        start_index = ctx.index
+        ctx.index = end_index + len("-->")
+        if self.zero_copy and end_index - start_index >= _MIN_SHARED_LENGTH:
+            return SourceCommentNode(ctx.source, start_index, end_index)
+        return CommentNode(ctx.source[start_index:end_index])
 
-        return CommentNode(comment)
-
-    def _isHeaderStart(self: Self) -> bool:
-        if self._peek() != "#":
+    def _isHeaderStart(self: Self, ctx: ParseContext) -> bool:
+        if ctx.peek() != "#":
             return False
 
         size = 0
-        while self._peekn(size) == "#":
+        while ctx.peekn(size) == "#":
             size += 1
 
         if size > 6:
             return False
 
-        return self._peekn(size) == " "
-
-    def _is_eof(self: Self) -> bool:
-        return self._index >= len(self._source)
-
-    def _consume_while(self: Self, symbols: list[str]) -> str:
-        out = ""
-        while self._peek() in symbols:
-            out += self._consume()
-        return out
-
-    def _consume_till(self: Self, stop_symbols: list[str]) -> str:
-        out = ""
-        while self._peek() not in stop_symbols:
-            out += self._consume()
-        return out
-
-    def _consume(self: Self) -> str:
-        if self._is_eof():
-            return "\0"
-
-        char = self._source[self._index]
-        self._index += 1
-        return char
-
-    def _match(self: Self, target: str) -> bool:
-        for n, c in enumerate(target):
-            if c != self._peekn(n):
-                return False
-
-        for _ in target:
-            self._consume()
-
-        return True
-
-    def _peek(self: Self) -> str:
-        if self._is_eof():
-            return "\0"
-
-        return self._source[self._index]
-
-    def _peekn(self: Self, n: int) -> str:
-        if self._index + n >= len(self._source):
-            return "\0"
-
-        return self._source[self._index + n]
-
-    def _previous(self: Self) -> str:
-        if self._index == 0:
-            return "\0"
-
-        return self._source[self._index - 1]
+        return ctx.peekn(size) == " "
@@ -1,6 +1,15 @@
+import io
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Self, TypeVar
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field, fields
+from typing import IO, TYPE_CHECKING, ClassVar, Self, TypeVar, cast
+
+from .Stats import Stats
+
+if TYPE_CHECKING:
+    from _typeshed import DataclassInstance
+
+    from .DocumentIndex import DocumentIndex
 
 T = TypeVar("T")
 
@@ -15,10 +24,27 @@ class Node(ABC):
         pass
 
 
+@dataclass(slots=True)
+class SourceMap:
+    """Where the top level blocks of a tree came from. The span of a block
+    covers the block and the blank lines in front of it, its reach is (at
+    least) the furthest position the parser looked at up to and including
+    that block."""
+
+    source: str
+    spans: list[tuple[int, int]]
+    reaches: list[int]
+    # Where the first block with an opener that searched for its closer in
+    # vain starts, if there is one
+    unclosed_from: int | None = None
+
+
 @dataclass(slots=True)
 class MarkdownTree:
     metadata: dict[str, str]
     children: list[Node]
+    source_map: SourceMap | None = field(default=None, repr=False, compare=False)
+    index: "DocumentIndex | None" = field(default=None, repr=False, compare=False)
 
     def accept(self: Self, visitor: "MarkdownVisitor[T]") -> T:
         return visitor.visit_tree(self)
@@ -30,11 +56,61 @@ class MarkdownTree:
         return out
 
     def render(self: Self, renderer: "Renderer | None" = None) -> str:
-        if renderer is None:
-            from .HtmlRenderer import HtmlRenderer
+        return _or_default(renderer).render(self)
+
+    def render_iter(self: Self, renderer: "Renderer | None" = None) -> Iterator[str]:
+        return _or_default(renderer).render_iter(self)
+
+    def render_to(
+        self: Self, sink: "IO[str] | IO[bytes]", renderer: "Renderer | None" = None
+    ) -> None:
+        _or_default(renderer).render_to(self, sink)
+
+    def to_bytes(self: Self, *, include_source_map: bool = False) -> bytes:
+        """A compact binary encoding of the tree, a lot smaller and faster to
+        load than a pickle. The source map, which is needed to reparse the
+        tree, is left out unless `include_source_map` is set."""
+        from .Serialization import to_bytes
 
-            renderer = HtmlRenderer()
-        return renderer.render(self)
+        return to_bytes(self, include_source_map=include_source_map)
+
+    @classmethod
+    def from_bytes(cls: type[Self], data: bytes) -> "MarkdownTree":
+        """Decode a tree encoded by `to_bytes`, raises a ValueError if the data
+        isn't one, or one of another version of the format."""
+        from .Serialization import from_bytes
+
+        return from_bytes(data)
+
+
+@dataclass(slots=True)
+class MarkdownStream:
+    """A document that is still being parsed, iterating over it yields the top
+    level blocks as they become available."""
+
+    metadata: dict[str, str]
+    children: Iterator[Node]
+    # Complete once all blocks are parsed, if the parser builds one
+    index: "DocumentIndex | None" = None
+
+    def __iter__(self: Self) -> Iterator[Node]:
+        return self.children
+
+    def render_iter(self: Self, renderer: "Renderer | None" = None) -> Iterator[str]:
+        return _or_default(renderer).render_iter(self)
+
+    def render_to(
+        self: Self, sink: "IO[str] | IO[bytes]", renderer: "Renderer | None" = None
+    ) -> None:
+        _or_default(renderer).render_to(self, sink)
+
+
+def _or_default(renderer: "Renderer | None") -> "Renderer":
+    if renderer is None:
+        from .HtmlRenderer import HtmlRenderer
+
+        return HtmlRenderer()
+    return renderer
 
 
 @dataclass(slots=True)
@@ -230,6 +306,161 @@ class CommentNode(Node):
         return (" " * indent * 4) + f'CommentNode "{self.comment}"\n'
 
 
+class _Variant:
+    """The variants of the nodes below store a field in another way. They
+    behave like the node they derive from, `_base`, in every other way, they
+    even compare equal to it.
+
+    They have no slots of their own, the classes they are mixed into have
+    them, and nodes have an instance dictionary anyway."""
+
+    _base: "ClassVar[type[DataclassInstance]]"
+
+    def __eq__(self: Self, other: object) -> bool:
+        base = self._base
+        if not isinstance(other, base):
+            return NotImplemented
+        return all(
+            getattr(self, f.name) == getattr(other, f.name) for f in fields(base)
+        )
+
+
+# Zero copy variants of the leaf nodes, they keep the source and their offsets
+# into it and slice their string out of it every time it is read. Assigning a
+# new string makes them point into that instead.
+
+
+class _SourceString(_Variant):
+    source: str
+    start: int
+    end: int
+
+    def __init__(self: Self, source: str, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    def _point_into(self: Self, value: str) -> None:
+        self.source = value
+        self.start = 0
+        self.end = len(value)
+
+
+class SourceCodeBlockNode(_SourceString, CodeBlockNode):
+    __slots__ = ("source", "start", "end")
+    _base = CodeBlockNode
+
+    def __init__(self: Self, language: str | None, source: str, start: int, end: int):
+        self.language = language
+        super().__init__(source, start, end)
+
+    @property
+    def code(self: Self) -> str:
+        return self.source[self.start : self.end]
+
+    @code.setter
+    def code(self: Self, value: str) -> None:
+        self._point_into(value)
+
+
+class SourceCodeNode(_SourceString, CodeNode):
+    __slots__ = ("source", "start", "end")
+    _base = CodeNode
+
+    @property
+    def code(self: Self) -> str:
+        return self.source[self.start : self.end]
+
+    @code.setter
+    def code(self: Self, value: str) -> None:
+        self._point_into(value)
+
+
+class SourceTextNode(_SourceString, TextNode):
+    __slots__ = ("source", "start", "end")
+    _base = TextNode
+
+    @property
+    def text(self: Self) -> str:
+        return self.source[self.start : self.end]
+
+    @text.setter
+    def text(self: Self, value: str) -> None:
+        self._point_into(value)
+
+
+class SourceCommentNode(_SourceString, CommentNode):
+    __slots__ = ("source", "start", "end")
+    _base = CommentNode
+
+    @property
+    def comment(self: Self) -> str:
+        return self.source[self.start : self.end]
+
+    @comment.setter
+    def comment(self: Self, value: str) -> None:
+        self._point_into(value)
+
+
+# Lazy variants of the blocks with rich text, the parser only found where
+# their text is and parses it the first time their children are read (or
+# rendered). They pickle as the blocks they derive from. Threads that read the
+# children at the same time might both parse them, to the same nodes.
+
+
+def _is_parsed(node: Node) -> bool:
+    return getattr(node, "_pending", None) is None
+
+
+class _LazyChildren(_Variant):
+    _pending: Callable[[], list[Node]] | None
+    _children: list[Node]
+
+    def __init__(self: Self, pending: Callable[[], list[Node]]):
+        self._pending = pending
+
+    @property
+    def children(self: Self) -> list[Node]:
+        pending = self._pending
+        if pending is not None:
+            self._children = pending()
+            self._pending = None
+        return self._children
+
+    @children.setter
+    def children(self: Self, value: list[Node]) -> None:
+        self._children = value
+        self._pending = None
+
+    def __reduce__(self: Self) -> tuple:
+        base = self._base
+        return base, tuple(getattr(self, f.name) for f in fields(base))
+
+
+class LazyParagraphNode(_LazyChildren, ParagraphNode):
+    __slots__ = ("_pending", "_children")
+    _base = ParagraphNode
+
+
+class LazyHeaderNode(_LazyChildren, HeaderNode):
+    __slots__ = ("_pending", "_children")
+    _base = HeaderNode
+
+    def __init__(self: Self, header_size: int, pending: Callable[[], list[Node]]):
+        self.header_size = header_size
+        super().__init__(pending)
+
+
+class LazyQuoteBlockNode(_LazyChildren, QuoteBlockNode):
+    __slots__ = ("_pending", "_children")
+    _base = QuoteBlockNode
+
+
+class LazyListItemNode(_LazyChildren, ListItemNode):
+    __slots__ = ("_pending", "_children")
+    _base = ListItemNode
+
+
 class MarkdownVisitor[T](ABC):
     @abstractmethod
     def visit_tree(self: Self, node: MarkdownTree) -> T:
@@ -293,5 +524,54 @@ class MarkdownVisitor[T](ABC):
 
 
 class Renderer(MarkdownVisitor[str], ABC):
+    # Collects how long rendering each type of node takes, if set. Renderers
+    # that support it say so, like the `HtmlRenderer`.
+    stats: Stats | None = None
+    # Part of the identity, to be increased whenever a change to the code of a
+    # renderer changes its output, which the identity can't tell otherwise.
+    version: int = 0
+
+    def __init__(self: Self, stats: Stats | None = None):
+        self.stats = stats
+
     def render(self: Self, doc: MarkdownTree) -> str:
         return doc.accept(self)
+
+    def identity(self: Self) -> str:
+        """Identifies what output this renderer produces, caches use it as part
+        of their keys. By default it's the class, its `version` and the
+        instance attributes, renderers whose output depends on anything else
+        should override it. The stats are left out, they don't change the
+        output.
+
+        The attributes are included by their repr, which has to be the same in
+        every process, unlike the default one of objects with its address.
+        """
+        cls = type(self)
+        attributes = getattr(self, "__dict__", {})
+        config = sorted((k, v) for k, v in attributes.items() if k != "stats")
+        return f"{cls.__module__}.{cls.__qualname__}:{self.version}{config!r}"
+
+    def render_iter(self: Self, doc: MarkdownTree | MarkdownStream) -> Iterator[str]:
+        """Render the document one top level block at a time, which also works
+        for documents that are still being parsed.
+
+        The chunks are the output of the visit method of each block, so
+        overrides of those are honored, but visit_tree is never called.
+        """
+        for child in doc.children:
+            yield child.accept(self)
+
+    def render_to(
+        self: Self, doc: MarkdownTree | MarkdownStream, sink: IO[str] | IO[bytes]
+    ) -> None:
+        """Write the document into a text or binary file-like object block by
+        block, binary ones receive UTF-8."""
+        is_binary = isinstance(sink, io.RawIOBase | io.BufferedIOBase) or (
+            "b" in getattr(sink, "mode", "")
+        )
+        for chunk in self.render_iter(doc):
+            if is_binary:
+                cast(IO[bytes], sink).write(chunk.encode())
+            else:
+                cast(IO[str], sink).write(chunk)
@@ -0,0 +1,137 @@
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from importlib import metadata
+from pathlib import Path
+from threading import Lock
+from typing import Self
+
+from .HtmlRenderer import HtmlRenderer
+from .MarkdownParser import MarkdownParser
+from .Nodes import Renderer
+
+
+def _meltdown_version() -> str:
+    try:
+        return metadata.version("meltdown")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+@dataclass(slots=True)
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    disk_hits: int = 0
+    disk_writes: int = 0
+
+
+class RenderCache:
+    """A cache of rendered HTML, content addressed by a hash of the markdown
+    source, the renderer's identity and the meltdown version.
+
+    Recently used documents are kept in memory, up to `max_entries` of them.
+    If a `directory` is given, every rendered document is also stored there,
+    so it survives restarts and can be shared between processes. Changing the
+    renderer (or upgrading meltdown) changes the keys, so stale entries are
+    never returned, they just age out of memory and can be removed from disk
+    with `clear()`.
+    """
+
+    def __init__(
+        self: Self,
+        max_entries: int = 1024,
+        directory: str | os.PathLike[str] | None = None,
+    ):
+        self.max_entries = max_entries
+        self.directory = Path(directory) if directory is not None else None
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = Lock()
+        self._version = _meltdown_version()
+
+    def render(self: Self, source: str, renderer: Renderer | None = None) -> str:
+        """The rendered HTML of `source`, parsed and rendered only if it isn't
+        cached yet."""
+        if renderer is None:
+            renderer = HtmlRenderer()
+        key = self.key(source, renderer)
+
+        html = self._lookup(key)
+        if html is None:
+            html = MarkdownParser().parse(source).render(renderer)
+            self._store(key, html)
+        return html
+
+    def key(self: Self, source: str, renderer: Renderer) -> str:
+        digest = hashlib.sha256()
+        for part in (self._version, renderer.identity(), source):
+            digest.update(part.encode("utf-8", "surrogatepass"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def clear(self: Self):
+        """Drop all entries, from memory and from disk."""
+        with self._lock:
+            self._entries.clear()
+        if self.directory is not None:
+            for path in self.directory.glob("*/*.html"):
+                path.unlink(missing_ok=True)
+
+    def __len__(self: Self) -> int:
+        return len(self._entries)
+
+    def _lookup(self: Self, key: str) -> str | None:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+                return html
+
+        if self.directory is not None:
+            try:
+                html = self._path(key).read_text(encoding="utf-8")
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self.stats.hits += 1
+                    self.stats.disk_hits += 1
+                    self._remember(key, html)
+                return html
+
+        with self._lock:
+            self.stats.misses += 1
+        return None
+
+    def _store(self: Self, key: str, html: str):
+        with self._lock:
+            self._remember(key, html)
+
+        if self.directory is not None:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Written to a temporary file first, so concurrent readers never
+            # see half a document.
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=path.parent, delete=False
+            ) as f:
+                f.write(html)
+            os.replace(f.name, path)
+            with self._lock:
+                self.stats.disk_writes += 1
+
+    def _remember(self: Self, key: str, html: str):
+        self._entries[key] = html
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def _path(self: Self, key: str) -> Path:
+        assert self.directory is not None
+        return self.directory / key[:2] / f"{key[2:]}.html"
@@ -0,0 +1,322 @@
+"""A compact binary encoding of trees, to store them in caches and to send them
+to other processes.
+
+The encoding starts with `MAGIC` and the `VERSION` of the format, followed by
+the sections below. Counts and lengths are varints, and lists of numbers are
+columns: the typecode of the narrowest array type that fits all of them, their
+count and their little endian bytes.
+
+- flags, a byte, 1 if the tree has a source map
+- the string table: a column of the lengths of the strings in characters, and
+  the UTF-8 of all of them after each other, prefixed with its length
+- the metadata: a column of the indexes of its keys and values
+- the nodes in preorder: a column of their kinds (their index in
+  `FlatTree.NODE_TYPES`), one of the number of children of the nodes that
+  have them, one of the first field of the nodes with fields (a string index
+  or the size of a header) and one of the second field of those with two,
+  where -1 stands for None
+- the source map, if there is one: the source, a column of the starts and
+  ends of the spans, a column of the reaches and where the first block with an
+  unclosed opener starts, plus one, or 0 if there is none
+"""
+
+import sys
+from array import array
+from itertools import accumulate
+from typing import Any
+
+from .FlatTree import _KINDS, NODE_TYPES, NONE, _kind_of
+from .Nodes import (
+    BoldNode,
+    CodeBlockNode,
+    CodeNode,
+    CommentNode,
+    EmphNode,
+    HeaderNode,
+    ImageNode,
+    LinkNode,
+    ListItemNode,
+    MarkdownTree,
+    Node,
+    ParagraphNode,
+    QuoteBlockNode,
+    SourceMap,
+    StrikeThroughNode,
+    TextNode,
+    UnorderedListNode,
+)
+
+MAGIC = b"MLDN"
+VERSION = 1
+
+_HAS_SOURCE_MAP = 1
+# Narrowest first
+_TYPECODES = "bBhHiIqQ"
+
+_PARAGRAPH = _KINDS[ParagraphNode]
+_HEADER = _KINDS[HeaderNode]
+_CODE_BLOCK = _KINDS[CodeBlockNode]
+_QUOTE_BLOCK = _KINDS[QuoteBlockNode]
+_UNORDERED_LIST = _KINDS[UnorderedListNode]
+_LIST_ITEM = _KINDS[ListItemNode]
+_EMPH = _KINDS[EmphNode]
+_STRIKE_THROUGH = _KINDS[StrikeThroughNode]
+_BOLD = _KINDS[BoldNode]
+_CODE = _KINDS[CodeNode]
+_LINK = _KINDS[LinkNode]
+_IMAGE = _KINDS[ImageNode]
+_TEXT = _KINDS[TextNode]
+_COMMENT = _KINDS[CommentNode]
+# Kinds of the nodes that only have children and no other fields
+_CONTAINERS = frozenset(
+    (_PARAGRAPH, _QUOTE_BLOCK, _LIST_ITEM, _EMPH, _STRIKE_THROUGH, _BOLD)
+)
+_CONTAINER_TYPES: dict[int, Any] = {kind: NODE_TYPES[kind] for kind in _CONTAINERS}
+_PARENTS = _CONTAINERS | {_LINK, _HEADER, _UNORDERED_LIST}
+
+
+def to_bytes(tree: MarkdownTree, *, include_source_map: bool = False) -> bytes:
+    """Encode a tree with its metadata, and with its source map if asked to,
+    subclasses of the nodes like the zero copy ones are encoded as the node
+    they are a subclass of."""
+    kinds = array("B")
+    counts: list[int] = []
+    firsts: list[int] = []
+    seconds: list[int] = []
+    # String -> its index, in the order they were added
+    strings: dict[str, int] = {}
+    intern = strings.setdefault
+
+    metadata = []
+    for item in tree.metadata.items():
+        for string in item:
+            metadata.append(intern(string, len(strings)))
+
+    stack: list[Node] = tree.children[::-1]
+    while stack:
+        # Any, as the kind tells what type of node it is
+        node: Any = stack.pop()
+        kind = _KINDS.get(type(node))
+        if kind is None:
+            # Subclasses like the zero copy nodes are stored as their base
+            kind = _kind_of(node)
+        kinds.append(kind)
+        if kind == _TEXT:
+            firsts.append(intern(node.text, len(strings)))
+        elif kind in _CONTAINERS:
+            children = node.children
+            counts.append(len(children))
+            stack.extend(reversed(children))
+        elif kind == _CODE:
+            firsts.append(intern(node.code, len(strings)))
+        elif kind == _LINK:
+            assert isinstance(node, LinkNode)
+            firsts.append(intern(node.url, len(strings)))
+            counts.append(len(node.children))
+            stack.extend(reversed(node.children))
+        elif kind == _HEADER:
+            assert isinstance(node, HeaderNode)
+            firsts.append(node.header_size)
+            counts.append(len(node.children))
+            stack.extend(reversed(node.children))
+        elif kind == _UNORDERED_LIST:
+            assert isinstance(node, UnorderedListNode)
+            counts.append(len(node.items))
+            stack.extend(reversed(node.items))
+        elif kind == _CODE_BLOCK:
+            assert isinstance(node, CodeBlockNode)
+            firsts.append(intern(node.code, len(strings)))
+            language = node.language
+            seconds.append(NONE if language is None else intern(language, len(strings)))
+        elif kind == _IMAGE:
+            assert isinstance(node, ImageNode)
+            firsts.append(intern(node.url, len(strings)))
+            seconds.append(intern(node.description, len(strings)))
+        else:
+            assert isinstance(node, CommentNode)
+            firsts.append(intern(node.comment, len(strings)))
+
+    # It holds the whole source, which about doubles the size
+    source_map = tree.source_map if include_source_map else None
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    out.append(_HAS_SOURCE_MAP if source_map is not None else 0)
+    _write_column(out, [len(string) for string in strings])
+    _write_text(out, "".join(strings))
+    _write_column(out, metadata)
+    for column in (kinds, counts, firsts, seconds):
+        _write_column(out, column)
+
+    if source_map is not None:
+        _write_text(out, source_map.source)
+        _write_column(out, [offset for span in source_map.spans for offset in span])
+        _write_column(out, source_map.reaches)
+        unclosed_from = source_map.unclosed_from
+        _write_varint(out, 0 if unclosed_from is None else unclosed_from + 1)
+    return bytes(out)
+
+
+def from_bytes(data: bytes) -> MarkdownTree:
+    """Decode a tree encoded by `to_bytes`, raises a ValueError if the data
+    isn't one, or one of another version of the format."""
+    view = memoryview(data)
+    if bytes(view[: len(MAGIC)]) != MAGIC or len(view) < len(MAGIC) + 2:
+        raise ValueError("Not an encoded meltdown tree")
+    version, flags = view[len(MAGIC)], view[len(MAGIC) + 1]
+    if version != VERSION:
+        raise ValueError(
+            f"Unsupported version {version} of the encoding, expected {VERSION}"
+        )
+
+    offset = len(MAGIC) + 2
+    try:
+        lengths, offset = _read_column(view, offset)
+        text, offset = _read_text(view, offset)
+        ends = list(accumulate(lengths))
+        strings = [
+            text[end - length : end] for length, end in zip(lengths, ends, strict=True)
+        ]
+
+        metadata, offset = _read_column(view, offset)
+        keys = [strings[i] for i in metadata[::2]]
+        values = [strings[i] for i in metadata[1::2]]
+        columns = []
+        for _ in range(4):
+            column, offset = _read_column(view, offset)
+            columns.append(column)
+        tree = MarkdownTree(
+            dict(zip(keys, values, strict=True)), _build(strings, *columns)
+        )
+
+        if flags & _HAS_SOURCE_MAP:
+            source, offset = _read_text(view, offset)
+            offsets, offset = _read_column(view, offset)
+            reaches, offset = _read_column(view, offset)
+            unclosed_from, offset = _read_varint(view, offset)
+            spans = list(zip(offsets[::2], offsets[1::2], strict=True))
+            tree.source_map = SourceMap(
+                source,
+                spans,
+                reaches.tolist(),
+                None if unclosed_from == 0 else unclosed_from - 1,
+            )
+    except (IndexError, ValueError, StopIteration) as e:
+        raise ValueError(f"Corrupt encoded meltdown tree: {e!r}") from e
+    return tree
+
+
+def _build(
+    strings: list[str], kinds: array, counts: array, firsts: array, seconds: array
+) -> list[Node]:
+    """The top level nodes, built in reverse preorder, after their children,
+    which are on a stack with the first child on top."""
+    built: list[Any] = []
+    push = built.append
+    # Every field is taken from the end of its column
+    next_count = reversed(counts).__next__
+    next_first = reversed(firsts).__next__
+    next_second = reversed(seconds).__next__
+    # Locals, as this loop runs once per node
+    text, containers, parents = _TEXT, _CONTAINER_TYPES, _PARENTS
+    link, header, code = _LINK, _HEADER, _CODE
+    text_node, code_node = TextNode, CodeNode
+    for kind in reversed(kinds):
+        if kind == text:
+            push(text_node(strings[next_first()]))
+        elif kind in parents:
+            count = next_count()
+            start = len(built) - count
+            if start < 0:
+                raise ValueError("more children than nodes")
+            children = built[start:]
+            del built[start:]
+            children.reverse()
+            container = containers.get(kind)
+            if container is not None:
+                push(container(children))
+            elif kind == link:
+                push(LinkNode(strings[next_first()], children))
+            elif kind == header:
+                push(HeaderNode(next_first(), children))
+            else:
+                push(UnorderedListNode(children))
+        elif kind == code:
+            push(code_node(strings[next_first()]))
+        elif kind == _CODE_BLOCK:
+            source, language = strings[next_first()], next_second()
+            push(CodeBlockNode(None if language == NONE else strings[language], source))
+        elif kind == _IMAGE:
+            url, description = strings[next_first()], strings[next_second()]
+            push(ImageNode(url, description))
+        elif kind == _COMMENT:
+            push(CommentNode(strings[next_first()]))
+        else:
+            raise ValueError(f"unknown node kind {kind}")
+    built.reverse()
+    return built
+
+
+def _write_varint(out: bytearray, number: int) -> None:
+    while number >= 0x80:
+        out.append(number & 0x7F | 0x80)
+        number >>= 7
+    out.append(number)
+
+
+def _read_varint(view: memoryview, offset: int) -> tuple[int, int]:
+    number = shift = 0
+    while True:
+        byte = view[offset]
+        offset += 1
+        number |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return number, offset
+        shift += 7
+
+
+def _write_text(out: bytearray, text: str) -> None:
+    encoded = text.encode("utf-8", "surrogatepass")
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _read_text(view: memoryview, offset: int) -> tuple[str, int]:
+    length, offset = _read_varint(view, offset)
+    end = offset + length
+    if end > len(view):
+        raise IndexError("text past the end")
+    return str(view[offset:end], "utf-8", "surrogatepass"), end
+
+
+def _write_column(out: bytearray, numbers: "array | list[int]") -> None:
+    low = min(numbers, default=0)
+    high = max(numbers, default=0)
+    typecode = next(code for code in _TYPECODES if _fits(code, low, high))
+    column = array(typecode, numbers)
+    if sys.byteorder == "big":
+        column.byteswap()
+    out += typecode.encode()
+    _write_varint(out, len(column))
+    out += column.tobytes()
+
+
+def _fits(typecode: str, low: int, high: int) -> bool:
+    bits = array(typecode).itemsize * 8
+    if typecode.isupper():
+        return low >= 0 and high < 1 << bits
+    return -(1 << (bits - 1)) <= low and high < 1 << (bits - 1)
+
+
+def _read_column(view: memoryview, offset: int) -> tuple[array, int]:
+    typecode = chr(view[offset])
+    if typecode not in _TYPECODES:
+        raise ValueError(f"unknown column type {typecode!r}")
+    column = array(typecode)
+    count, offset = _read_varint(view, offset + 1)
+    end = offset + count * column.itemsize
+    if end > len(view):
+        raise IndexError("column past the end")
+    column.frombytes(view[offset:end])
+    if sys.byteorder == "big":
+        column.byteswap()
+    return column, end
@@ -0,0 +1,194 @@
+"""Building a static site, a whole directory tree of markdown files rendered to
+HTML files, skipping the ones that didn't change since the last build."""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections.abc import Iterator
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Self
+
+from .Batch import render_many
+from .HtmlRenderer import HtmlRenderer
+from .Nodes import Renderer
+from .RenderCache import _meltdown_version
+
+MANIFEST_NAME = ".meltdown-manifest.json"
+
+
+@dataclass(slots=True)
+class BuildReport:
+    rendered: int = 0
+    unchanged: int = 0
+    removed: int = 0
+    # Relative path of the source -> what went wrong
+    errors: dict[str, str] = field(default_factory=dict)
+    rendered_bytes: int = 0
+    seconds: float = 0.0
+
+    @property
+    def throughput(self: Self) -> float:
+        """Megabytes of markdown rendered per second."""
+        if self.seconds == 0:
+            return 0.0
+        return self.rendered_bytes / 1_000_000 / self.seconds
+
+    def summary(self: Self) -> str:
+        return (
+            f"{self.rendered} rendered, {self.unchanged} unchanged, "
+            f"{self.removed} removed, {len(self.errors)} failed "
+            f"in {self.seconds:.3f}s ({self.throughput:.2f} MB/s)"
+        )
+
+
+class SiteBuilder:
+    """Renders every `.md` file below `source_dir` to an `.html` file at the
+    same relative path below `output_dir`, in parallel like `render_many`.
+
+    A manifest in the output directory remembers the modification time, size
+    and hash of every source that was rendered. Sources whose time and size
+    (or failing that, hash) are unchanged are skipped on the next build, and
+    the output of sources that were deleted is removed. Changing the renderer
+    or upgrading meltdown renders everything again.
+    """
+
+    def __init__(
+        self: Self,
+        source_dir: str | os.PathLike[str],
+        output_dir: str | os.PathLike[str],
+        renderer: Renderer | None = None,
+        *,
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+    ):
+        self.source_dir = Path(source_dir)
+        self.output_dir = Path(output_dir)
+        self.renderer = renderer or HtmlRenderer()
+        self.executor = executor
+        self.max_workers = max_workers
+
+    def build(self: Self, force: bool = False) -> BuildReport:
+        """Render all sources that changed since the last build, or all of them
+        if `force` is set."""
+        start = time.perf_counter()
+        report = BuildReport()
+
+        config = {"version": _meltdown_version(), "renderer": self.renderer.identity()}
+        manifest = self._load_manifest()
+        old_files: dict[str, list] = {}
+        if not force and manifest.get("config") == config:
+            old_files = manifest.get("files", {})
+
+        files: dict[str, list] = {}
+        changed: list[tuple[str, str, list]] = []
+        # Listing the output once is a lot faster than checking every file
+        outputs = {relative for relative, _ in _walk(self.output_dir, ".html")}
+        for relative, source in sorted(_walk(self.source_dir, ".md")):
+            stat = source.stat()
+            path = source.path
+            entry = [stat.st_mtime_ns, stat.st_size, None]
+            old = old_files.get(relative)
+            if old is not None and _html_name(relative) in outputs:
+                if old[:2] == entry[:2]:
+                    files[relative] = old
+                    report.unchanged += 1
+                    continue
+                if old[1] == entry[1]:
+                    # Touched but maybe not changed
+                    entry[2] = _hash(path)
+                    if old[2] == entry[2]:
+                        files[relative] = entry
+                        report.unchanged += 1
+                        continue
+            changed.append((relative, path, entry))
+
+        if changed:
+            results = render_many(
+                # Strings would be taken as markdown
+                [Path(path) for _, path, _ in changed],
+                self.renderer,
+                executor=self.executor,
+                max_workers=self.max_workers,
+            )
+            for (relative, path, entry), result in zip(changed, results, strict=True):
+                if result.html is None:
+                    report.errors[relative] = result.error or "unknown error"
+                    continue
+                output = self.output_path(relative)
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                with open(output, "w", encoding="utf-8") as f:
+                    f.write(result.html)
+                if entry[2] is None:
+                    entry[2] = _hash(path)
+                files[relative] = entry
+                report.rendered += 1
+                report.rendered_bytes += entry[1]
+
+        for relative in manifest.get("files", {}).keys() - files.keys():
+            if relative in report.errors:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(self.output_path(relative))
+            report.removed += 1
+
+        self._save_manifest({"config": config, "files": files})
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def output_path(self: Self, relative: str) -> str:
+        """Where the HTML of the source at `relative` (with forward slashes)
+        is written to."""
+        return os.path.join(self.output_dir, _html_name(relative))
+
+    def _load_manifest(self: Self) -> dict:
+        try:
+            with open(self.output_dir / MANIFEST_NAME, encoding="utf-8") as f:
+                manifest = json.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_manifest(self: Self, manifest: dict):
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        # Written to a temporary file first, so an interrupted build never
+        # leaves half a manifest behind.
+        with tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=self.output_dir, delete=False
+        ) as f:
+            f.write(json.dumps(manifest))
+        os.replace(f.name, self.output_dir / MANIFEST_NAME)
+
+
+def _walk(
+    directory: str | os.PathLike[str], suffix: str
+) -> Iterator[tuple[str, os.DirEntry[str]]]:
+    """The relative path (with forward slashes) and entry of every file with
+    the suffix below `directory`. Walks with scandir, as pathlib is too slow
+    for sites with tens of thousands of files."""
+    stack = [("", os.fspath(directory))]
+    while stack:
+        prefix, folder = stack.pop()
+        try:
+            entries = os.scandir(folder)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    stack.append((f"{prefix}{entry.name}/", entry.path))
+                elif entry.name.endswith(suffix) and entry.is_file():
+                    yield f"{prefix}{entry.name}", entry
+
+
+def _html_name(relative: str) -> str:
+    return relative.removesuffix(".md") + ".html"
+
+
+def _hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+from threading import Lock
+from typing import Self
+
+
+@dataclass(slots=True)
+class Timing:
+    count: int = 0
+    seconds: float = 0.0
+
+
+class Stats:
+    """How often each phase of parsing and each type of node ran, and how long
+    they took in total, collected by every parser and renderer it is passed
+    to (see `MarkdownParser` and `HtmlRenderer`).
+
+    Parsing is split into the phases "frontmatter", "blocks" (all top level
+    blocks with their inline content) and "inline", and the time of each
+    type of top level block. Inline nodes are all parsed in one go, so their
+    types only have counts. Rendering has the count and time of each type of
+    node, including the nodes inside of it, like cProfile's cumulative time.
+
+    To export the numbers, read `as_dict()` after a run or override `record`,
+    which receives every single measurement.
+    """
+
+    def __init__(self: Self):
+        self.parsing: dict[str, Timing] = {}
+        self.rendering: dict[str, Timing] = {}
+        self._lock = Lock()
+
+    def record(
+        self: Self, section: str, name: str, seconds: float, count: int = 1
+    ) -> None:
+        """Add `count` runs of `name` that took `seconds` to the section,
+        either "parse" or "render"."""
+        timings = self.parsing if section == "parse" else self.rendering
+        with self._lock:
+            timing = timings.get(name)
+            if timing is None:
+                timing = timings[name] = Timing()
+            timing.count += count
+            timing.seconds += seconds
+
+    def merge(self: Self, other: "Stats") -> None:
+        """Add everything another collected, like the stats of other threads."""
+        for section, timings in other._sections():
+            for name, timing in list(timings.items()):
+                self.record(section, name, timing.seconds, timing.count)
+
+    def clear(self: Self) -> None:
+        with self._lock:
+            self.parsing.clear()
+            self.rendering.clear()
+
+    def as_dict(self: Self) -> dict[str, float]:
+        """All numbers with flat keys like "parse.inline.seconds" and
+        "render.TextNode.count", for metrics systems."""
+        result: dict[str, float] = {}
+        for section, timings in self._sections():
+            for name, timing in timings.items():
+                result[f"{section}.{name}.count"] = timing.count
+                result[f"{section}.{name}.seconds"] = timing.seconds
+        return result
+
+    def report(self: Self) -> str:
+        """A table of all numbers, the slowest first. Node types that only
+        have counts have no times."""
+        lines = []
+        for section, timings in self._sections():
+            if not timings:
+                continue
+            lines.append(f"{section:<22}{'count':>10}{'total ms':>12}{'mean us':>12}")
+            ordered = sorted(
+                timings.items(), key=lambda item: (-item[1].seconds, -item[1].count)
+            )
+            for name, timing in ordered:
+                line = f"  {name:<20}{timing.count:>10}"
+                if timing.seconds:
+                    mean = timing.seconds / timing.count * 1e6
+                    line += f"{timing.seconds * 1000:>12.3f}{mean:>12.2f}"
+                lines.append(line)
+        return "\n".join(lines)
+
+    def _sections(self: Self) -> list[tuple[str, dict[str, Timing]]]:
+        return [("parse", self.parsing), ("render", self.rendering)]
+
+    # The lock can't be pickled, e.g. when a renderer is sent to a worker
+    def __getstate__(self: Self) -> tuple:
+        return self.parsing, self.rendering
+
+    def __setstate__(self: Self, state: tuple) -> None:
+        self.parsing, self.rendering = state
+        self._lock = Lock()
@@ -0,0 +1,336 @@
+"""Watching a directory tree of markdown files and rendering the files that
+change again, as soon as they change."""
+
+import contextlib
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Executor
+from typing import Protocol, Self
+
+from .HtmlRenderer import HtmlRenderer
+from .MarkdownParser import MarkdownParser
+from .Nodes import MarkdownTree, Node, Renderer
+from .SiteBuilder import BuildReport, SiteBuilder, _walk
+
+# From <sys/inotify.h>
+_IN_MODIFY = 0x2
+_IN_CLOSE_WRITE = 0x8
+_IN_MOVED_FROM = 0x40
+_IN_MOVED_TO = 0x80
+_IN_CREATE = 0x100
+_IN_DELETE = 0x200
+_IN_DELETE_SELF = 0x400
+_IN_MOVE_SELF = 0x800
+_IN_Q_OVERFLOW = 0x4000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = (
+    _IN_MODIFY
+    | _IN_CLOSE_WRITE
+    | _IN_MOVED_FROM
+    | _IN_MOVED_TO
+    | _IN_CREATE
+    | _IN_DELETE
+    | _IN_DELETE_SELF
+    | _IN_MOVE_SELF
+)
+_EVENT = struct.Struct("iIII")
+
+
+class _Changes(Protocol):
+    def changes(self: Self, timeout: float) -> set[str] | None:
+        """Wait up to `timeout` seconds for changes and return the paths of the
+        files that changed, or None if it's unknown what changed."""
+        ...
+
+    def close(self: Self) -> None: ...
+
+
+class _Inotify:
+    """Changes reported by the Linux kernel, with a watch on every directory."""
+
+    def __init__(self: Self, directory: str):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._directories: dict[int, str] = {}
+        self._watch_tree(directory)
+
+    def _watch_tree(self: Self, directory: str) -> set[str]:
+        """Watch the directory and all below it, returns the files in there."""
+        files = set()
+        stack = [directory]
+        while stack:
+            folder = stack.pop()
+            descriptor = self._libc.inotify_add_watch(
+                self._fd, os.fsencode(folder), _WATCH_MASK
+            )
+            if descriptor < 0:
+                # Removed again in the meantime
+                continue
+            self._directories[descriptor] = folder
+            with contextlib.suppress(FileNotFoundError), os.scandir(folder) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        stack.append(entry.path)
+                    else:
+                        files.add(entry.path)
+        return files
+
+    def changes(self: Self, timeout: float) -> set[str] | None:
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return set()
+
+        data = os.read(self._fd, 1 << 16)
+        changed: set[str] | None = set()
+        offset = 0
+        while offset < len(data):
+            descriptor, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size : offset + _EVENT.size + length]
+            offset += _EVENT.size + length
+
+            if mask & _IN_Q_OVERFLOW:
+                changed = None
+                continue
+            folder = self._directories.get(descriptor)
+            if folder is None or changed is None:
+                continue
+            if mask & (_IN_DELETE_SELF | _IN_MOVE_SELF):
+                del self._directories[descriptor]
+                continue
+
+            path = os.path.join(folder, os.fsdecode(name.rstrip(b"\0")))
+            if not mask & _IN_ISDIR:
+                changed.add(path)
+            elif mask & (_IN_CREATE | _IN_MOVED_TO):
+                changed |= self._watch_tree(path)
+            else:
+                # A directory is gone, but which files were in it is unknown
+                changed = None
+        return changed
+
+    def close(self: Self) -> None:
+        os.close(self._fd)
+
+
+class _Polling:
+    """Changes found by comparing the modification time and size of every file
+    with those seen before, for systems without inotify."""
+
+    def __init__(self: Self, directory: str, interval: float):
+        self._directory = directory
+        self._interval = interval
+        self._seen = self._scan()
+
+    def _scan(self: Self) -> dict[str, tuple[int, int]]:
+        seen = {}
+        for _, entry in _walk(self._directory, ""):
+            with contextlib.suppress(FileNotFoundError):
+                stat = entry.stat()
+                seen[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return seen
+
+    def changes(self: Self, timeout: float) -> set[str] | None:
+        deadline = time.monotonic() + timeout
+        while True:
+            seen = self._scan()
+            changed = {
+                path
+                for path in seen.keys() | self._seen.keys()
+                if seen.get(path) != self._seen.get(path)
+            }
+            self._seen = seen
+            remaining = deadline - time.monotonic()
+            if changed or remaining <= 0:
+                return changed
+            time.sleep(min(self._interval, remaining))
+
+    def close(self: Self) -> None:
+        pass
+
+
+class SiteWatcher:
+    """Keeps the output of a `SiteBuilder` up to date while the sources are
+    being edited. Full builds use `executor` or `max_workers` like the builder.
+
+    Bursts of changes, like an editor saving several files, are collected
+    until nothing changed for `debounce` seconds and then handled together.
+    Only the changed files are rendered again, and the trees of the files
+    that were rendered are kept, so the next edit of a file only has to
+    reparse and render the blocks around the edit. Changes are reported by inotify,
+    or found by polling every `poll_interval` seconds where it's not
+    available (or `use_inotify` is false).
+    """
+
+    def __init__(
+        self: Self,
+        source_dir: str | os.PathLike[str],
+        output_dir: str | os.PathLike[str],
+        renderer: Renderer | None = None,
+        *,
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+        debounce: float = 0.1,
+        poll_interval: float = 0.5,
+        use_inotify: bool = True,
+    ):
+        self.builder = SiteBuilder(
+            source_dir,
+            output_dir,
+            renderer,
+            executor=executor,
+            max_workers=max_workers,
+        )
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.use_inotify = use_inotify
+        self._source_dir = os.path.abspath(source_dir)
+        self._parser = MarkdownParser()
+        self._trees: dict[str, MarkdownTree] = {}
+        # The top level blocks of each tree with their HTML
+        self._blocks: dict[str, list[tuple[Node, str]]] = {}
+
+    def run(
+        self: Self,
+        on_update: Callable[[BuildReport], object] | None = None,
+        stop: threading.Event | None = None,
+    ) -> None:
+        """Build the site and then watch it until `stop` is set, every build
+        and update is reported to `on_update`."""
+        stop = stop or threading.Event()
+        on_update = on_update or (lambda report: None)
+        changes = self._watch()
+        try:
+            on_update(self.builder.build())
+            while not stop.is_set():
+                changed = changes.changes(timeout=0.2)
+                if changed == set():
+                    continue
+
+                # Wait for the burst to end
+                while changed is not None:
+                    more = changes.changes(self.debounce)
+                    if more == set():
+                        break
+                    changed = None if more is None else changed | more
+                if changed is None:
+                    self._trees.clear()
+                    self._blocks.clear()
+                    on_update(self.builder.build())
+                else:
+                    on_update(self.update(changed))
+        finally:
+            changes.close()
+
+    def _watch(self: Self) -> _Changes:
+        if self.use_inotify:
+            try:
+                return _Inotify(self._source_dir)
+            except (OSError, AttributeError):
+                # Not on Linux or out of watches
+                pass
+        return _Polling(self._source_dir, self.poll_interval)
+
+    def update(self: Self, paths: set[str]) -> BuildReport:
+        """Render the markdown files among `paths` again, or remove their output
+        if they don't exist anymore."""
+        start = time.perf_counter()
+        report = BuildReport()
+        for path in sorted(paths):
+            path = os.path.abspath(path)
+            relative = os.path.relpath(path, self._source_dir)
+            if not relative.endswith(".md") or relative.startswith(".."):
+                continue
+            relative = relative.replace(os.sep, "/")
+            output = self.builder.output_path(relative)
+
+            try:
+                with open(path, encoding="utf-8") as f:
+                    source = f.read()
+            except FileNotFoundError:
+                self._trees.pop(relative, None)
+                self._blocks.pop(relative, None)
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(output)
+                report.removed += 1
+                continue
+            except (OSError, ValueError) as e:
+                report.errors[relative] = f"{type(e).__name__}: {e}"
+                continue
+
+            tree = self._parse(relative, source)
+            if tree is None:
+                report.unchanged += 1
+                continue
+            os.makedirs(os.path.dirname(output), exist_ok=True)
+            with open(output, "w", encoding="utf-8") as f:
+                f.write(self._render(relative, tree))
+            report.rendered += 1
+            report.rendered_bytes += len(source.encode("utf-8"))
+
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def _parse(self: Self, relative: str, source: str) -> MarkdownTree | None:
+        """Parse the new source of a file, reusing its old tree if there is one,
+        returns None if it didn't change at all."""
+        tree = self._trees.get(relative)
+        if tree is None or tree.source_map is None:
+            tree = self._parser.parse(source)
+        else:
+            old_source = tree.source_map.source
+            if old_source == source:
+                return None
+            tree = self._parser.reparse(tree, *_diff(old_source, source))
+        self._trees[relative] = tree
+        return tree
+
+    def _render(self: Self, relative: str, tree: MarkdownTree) -> str:
+        renderer = self.builder.renderer
+        if type(renderer).visit_tree is not HtmlRenderer.visit_tree:
+            return tree.render(renderer)
+
+        # The default visit_tree just joins the HTML of the blocks, so that of
+        # the blocks reused from the previous tree can be reused as well. The
+        # previous blocks are alive until the end, so their ids are unique.
+        previous = {id(node): html for node, html in self._blocks.get(relative, ())}
+        blocks = [
+            (child, previous.get(id(child)) or child.accept(renderer))
+            for child in tree.children
+        ]
+        self._blocks[relative] = blocks
+        return "".join(html for _, html in blocks)
+
+
+def _diff(old: str, new: str) -> tuple[int, int, str]:
+    """A single edit that turns `old` into `new`: the offset, how many
+    characters were deleted there and what was inserted instead. It spans
+    everything between the common prefix and the common suffix."""
+    # Binary searches, comparing slices is a lot faster than characters.
+    shortest = min(len(old), len(new))
+    low, high = 0, shortest
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[:middle] == new[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    low, high = 0, shortest - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old[len(old) - middle :] == new[len(new) - middle :]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+
+    return prefix, len(old) - prefix - suffix, new[prefix : len(new) - suffix]
@@ -1,5 +1,25 @@
 # from Nodes import *
+import os
+
+from .Async import AsyncMarkdown as AsyncMarkdown
+from .Async import parse_async as parse_async
+from .Async import render_async as render_async
+from .Batch import FrontmatterResult as FrontmatterResult
+from .Batch import LinksResult as LinksResult
+from .Batch import ParseResult as ParseResult
+from .Batch import RenderResult as RenderResult
+from .Batch import extract_links_many as extract_links_many
+from .Batch import parse_many as parse_many
+from .Batch import read_frontmatter as read_frontmatter
+from .Batch import read_frontmatter_many as read_frontmatter_many
+from .Batch import render_many as render_many
+from .CompiledRenderer import CompiledRenderer as CompiledRenderer
+from .CompiledRenderer import compile_renderer as compile_renderer
+from .DocumentIndex import DocumentIndex as DocumentIndex
+from .FlatTree import FlatTree as FlatTree
 from .HtmlRenderer import HtmlRenderer as HtmlRenderer
+from .Links import Link as Link
+from .Links import extract_links as extract_links
 from .MarkdownParser import MarkdownParser as MarkdownParser
 from .Nodes import BoldNode as BoldNode
 from .Nodes import CodeBlockNode as CodeBlockNode
@@ -8,17 +28,54 @@ from .Nodes import CommentNode as CommentNode
 from .Nodes import EmphNode as EmphNode
 from .Nodes import HeaderNode as HeaderNode
 from .Nodes import ImageNode as ImageNode
+from .Nodes import LazyHeaderNode as LazyHeaderNode
+from .Nodes import LazyListItemNode as LazyListItemNode
+from .Nodes import LazyParagraphNode as LazyParagraphNode
+from .Nodes import LazyQuoteBlockNode as LazyQuoteBlockNode
 from .Nodes import LinkNode as LinkNode
 from .Nodes import ListItemNode as ListItemNode
+from .Nodes import MarkdownStream as MarkdownStream
 from .Nodes import MarkdownTree as MarkdownTree
 from .Nodes import MarkdownVisitor as MarkdownVisitor
 from .Nodes import Node as Node
 from .Nodes import ParagraphNode as ParagraphNode
 from .Nodes import QuoteBlockNode as QuoteBlockNode
+from .Nodes import Renderer as Renderer
+from .Nodes import SourceCodeBlockNode as SourceCodeBlockNode
+from .Nodes import SourceCodeNode as SourceCodeNode
+from .Nodes import SourceCommentNode as SourceCommentNode
+from .Nodes import SourceMap as SourceMap
+from .Nodes import SourceTextNode as SourceTextNode
 from .Nodes import StrikeThroughNode as StrikeThroughNode
 from .Nodes import TextNode as TextNode
 from .Nodes import UnorderedListNode as UnorderedListNode
+from .RenderCache import CacheStats as CacheStats
+from .RenderCache import RenderCache as RenderCache
+from .SiteBuilder import BuildReport as BuildReport
+from .SiteBuilder import SiteBuilder as SiteBuilder
+from .Stats import Stats as Stats
+from .Stats import Timing as Timing
+from .Watch import SiteWatcher as SiteWatcher
+
+# Parsers keep no state between parses, so all threads can share one
+_parser = MarkdownParser()
 
 
 def parse(content: str) -> MarkdownTree:
-    return MarkdownParser().parse(content)
+    return _parser.parse(content)
+
+
+def parse_file(path: str | os.PathLike[str]) -> MarkdownTree:
+    return _parser.parse_file(path)
+
+
+def render(
+    content: str,
+    renderer: Renderer | None = None,
+    cache: RenderCache | None = None,
+) -> str:
+    """Parse and render a document in one go, if a cache is given the HTML of
+    documents that were rendered before is taken from there."""
+    if cache is not None:
+        return cache.render(content, renderer)
+    return parse(content).render(renderer)
@@ -0,0 +1,203 @@
+"""The recursive, per-character inline parser from before it learned to skip
+over plain text and to keep nested spans on a stack, kept around to check that
+the optimized one still builds exactly the same trees. Everything but the
+inline parsing is shared with `MarkdownParser`."""
+
+import string
+from typing import Self
+
+from meltdown import (
+    BoldNode,
+    EmphNode,
+    LinkNode,
+    MarkdownParser,
+    Node,
+    StrikeThroughNode,
+    TextNode,
+)
+from meltdown.MarkdownParser import ParseContext
+
+
+class ReferenceParser(MarkdownParser):
+    def _parse_rich_text(self: Self, ctx: ParseContext) -> list[Node]:
+        children: list[Node] = []
+
+        def end_current_text():
+            text = ctx.source[start_index:end_index]
+            if text == "":
+                return
+            children.append(TextNode(text))
+
+        start_index = ctx.index
+        end_index = ctx.index
+        while not ctx.is_eof():
+            end_index = ctx.index
+
+            if ctx.peek() == "*":
+                # Bold, two stars
+                if ctx.peekn(1) == "*":
+                    if ctx.inside_bold:
+                        break
+                    ctx.consume()
+                    ctx.consume()
+                    end_current_text()
+                    children += self._parse_bold(ctx, "**")
+                    start_index = ctx.index
+                    end_index = ctx.index
+                    continue
+
+                else:
+                    # Emphasis, only one star
+                    if ctx.inside_emph:
+                        break
+                    ctx.consume()
+                    end_current_text()
+                    children += self._parse_emph(ctx, "*")
+                    start_index = ctx.index
+                    end_index = ctx.index
+                    continue
+
+            if ctx.peek() == "_":
+                allowed_adjecent = string.whitespace + string.punctuation
+                if ctx.peekn(1) == "_":
+                    if ctx.inside_bold and ctx.peekn(2) in allowed_adjecent:
+                        break
+
+                    if ctx.previous() in allowed_adjecent:
+                        ctx.consume()
+                        ctx.consume()
+                        end_current_text()
+                        children += self._parse_bold(ctx, "__")
+                        start_index = ctx.index
+                        end_index = ctx.index
+                        continue
+                else:
+                    if ctx.inside_emph and ctx.peekn(1) in allowed_adjecent:
+                        break
+
+                    if ctx.previous() in allowed_adjecent:
+                        ctx.consume()
+                        end_current_text()
+                        children += self._parse_emph(ctx, "_")
+                        start_index = ctx.index
+                        end_index = ctx.index
+                        continue
+
+            if ctx.peek() == "~" and ctx.peekn(1) == "~":
+                if ctx.inside_strikethrough:
+                    break
+                ctx.consume()
+                ctx.consume()
+                end_current_text()
+                children += self._parse_strikethrough(ctx)
+                start_index = ctx.index
+                end_index = ctx.index
+                continue
+
+            if ctx.peek() == "`":
+                if ctx.inside_code:
+                    break
+                ctx.consume()
+                end_current_text()
+                children.append(self._parse_code(ctx))
+                start_index = ctx.index
+                end_index = ctx.index
+                continue
+
+            if (not ctx.inside_link) and ctx.match("["):
+                end_current_text()
+                children += self._parse_link(ctx)
+                start_index = ctx.index
+                end_index = ctx.index
+                continue
+
+            if ctx.match("!["):
+                end_current_text()
+                children += self._parse_image(ctx)
+                start_index = ctx.index
+                end_index = ctx.index
+                continue
+
+            if ctx.inside_link and ctx.peek() == "]":
+                break
+
+            if ctx.match("<!--"):
+                end_current_text()
+                children.append(self._parse_comment(ctx))
+                start_index = ctx.index
+                end_index = ctx.index
+                continue
+
+            if ctx.peek() == "\n":
+                if ctx.stop_newline:
+                    break
+
+                if ctx.peekn(1) == "\n":
+                    break
+
+                if ctx.peekn(1) == "#":
+                    break
+
+            ctx.consume()
+
+        if end_index is None:
+            end_index = len(ctx.source) - 1
+        if ctx.is_eof():
+            end_index += 1
+        if end_index > start_index:
+            text = ctx.source[start_index:end_index]
+            children.append(TextNode(text))
+        return children
+
+    def _parse_bold(self: Self, ctx: ParseContext, start_token: str) -> list[Node]:
+        ctx.inside_bold = True
+        children = self._parse_rich_text(ctx)
+
+        if ctx.match(start_token):
+            ctx.inside_bold = False
+            return [BoldNode(children)]
+
+        return [TextNode(start_token)] + children
+
+    def _parse_emph(self: Self, ctx: ParseContext, start_token: str) -> list[Node]:
+        ctx.inside_emph = True
+        children = self._parse_rich_text(ctx)
+
+        if ctx.match(start_token):
+            ctx.inside_emph = False
+            return [EmphNode(children)]
+
+        return [TextNode(start_token)] + children
+
+    def _parse_strikethrough(self: Self, ctx: ParseContext) -> list[Node]:
+        ctx.inside_strikethrough = True
+        children = self._parse_rich_text(ctx)
+
+        if ctx.match("~~"):
+            ctx.inside_strikethrough = False
+            return [StrikeThroughNode(children)]
+
+        return [TextNode("~~")] + children
+
+    def _parse_link(self: Self, ctx: ParseContext) -> list[Node]:
+        # Parsing the text to of the link
+        ctx.inside_link = True
+        children = self._parse_rich_text(ctx)
+
+        if not ctx.match("]"):
+            return [TextNode("[")] + children
+
+        if not ctx.match("("):
+            return [TextNode("[")] + children + [TextNode("]")]
+
+        # Parsing the url
+        stop_symbols = ") \n\t\0"
+        url = ctx.consume_till(stop_symbols)
+
+        if not ctx.match(")"):
+            # Reset parsing position
+            ctx.index -= len(url)
+            return [TextNode("[")] + children + [TextNode("](")]
+
+        ctx.inside_link = False
+        return [LinkNode(url, children)]
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from meltdown import (
+    Async,
+    AsyncMarkdown,
+    HtmlRenderer,
+    MarkdownParser,
+    TextNode,
+    parse,
+    parse_async,
+    render_async,
+)
+from tests.test_blog import get_test_cases
+
+
+class Blocking(HtmlRenderer):
+    """Doesn't render any text until it's released."""
+
+    def __init__(self: Self, released: threading.Event):
+        super().__init__()
+        self.released = released
+
+    def visit_text(self: Self, node: TextNode) -> str:
+        self.released.wait(5)
+        return super().visit_text(node)
+
+
+def test_threads():
+    path = Path(get_test_cases()[0])
+    source = path.read_text(encoding="utf-8")
+    expected = parse(source)
+
+    async def main(executor: ThreadPoolExecutor):
+        markdown = AsyncMarkdown(executor)
+        return await markdown.parse(path), await markdown.render(source)
+
+    with ThreadPoolExecutor(2) as executor:
+        tree, html = asyncio.run(main(executor))
+    assert tree == expected
+    assert html == expected.render()
+
+
+def test_processes():
+    paths = [Path(f) for f in get_test_cases()[:3]]
+
+    async def main():
+        async with AsyncMarkdown(max_workers=2) as markdown:
+            trees = await asyncio.gather(*(markdown.parse(p) for p in paths))
+            htmls = await asyncio.gather(*(markdown.render(p) for p in paths))
+            return trees, htmls
+
+    trees, htmls = asyncio.run(main())
+    for path, tree, html in zip(paths, trees, htmls, strict=True):
+        expected = parse(path.read_text(encoding="utf-8"))
+        assert tree == expected
+        # Left out when sending the tree back
+        assert tree.source_map is None
+        assert html == expected.render()
+
+
+@pytest.fixture
+def shared_default():
+    yield
+    # Its threads would be copied into the processes of later tests
+    if Async._default is not None:
+        Async._default.executor.shutdown()
+        Async._default = None
+
+
+@pytest.mark.usefixtures("shared_default")
+def test_shared_default():
+    async def main():
+        return await parse_async("# Hi"), await render_async("*hi*")
+
+    # Twice, on two event loops
+    for _ in range(2):
+        tree, html = asyncio.run(main())
+        assert tree == parse("# Hi")
+        assert html == "<p><em>hi</em></p>\n"
+
+
+@pytest.mark.parametrize("threads", [True, False])
+def test_render_iter(threads: bool):
+    path = Path(get_test_cases()[0])
+    tree = MarkdownParser().parse(path.read_text(encoding="utf-8"))
+    expected = list(HtmlRenderer().render_iter(tree))
+
+    async def main(executor: ThreadPoolExecutor | None):
+        async with AsyncMarkdown(executor, max_workers=1) as markdown:
+            return [chunk async for chunk in markdown.render_iter(path)]
+
+    if not threads:
+        assert asyncio.run(main(None)) == expected
+        return
+    with ThreadPoolExecutor(1) as executor:
+        assert asyncio.run(main(executor)) == expected
+
+
+def test_render_iter_streams_in_batches():
+    source = "\n\n".join(f"Paragraph {i} " + "text " * 200 for i in range(500))
+
+    async def main(executor: ThreadPoolExecutor):
+        chunks = AsyncMarkdown(executor).render_iter(source)
+        first = await anext(chunks)
+        await chunks.aclose()
+        return first
+
+    with ThreadPoolExecutor(1) as executor:
+        assert asyncio.run(main(executor)).startswith("<p>Paragraph 0 text")
+
+
+def test_cancelled_while_waiting_never_runs():
+    released = threading.Event()
+    renderer = Blocking(released)
+
+    async def main(executor: ThreadPoolExecutor):
+        markdown = AsyncMarkdown(executor, max_concurrency=1)
+        running = asyncio.create_task(markdown.render("first", renderer))
+        waiting = asyncio.create_task(markdown.render("second", renderer))
+        await asyncio.sleep(0.05)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        # The first one is still rendering
+        assert not running.done()
+        released.set()
+        return await running
+
+    with ThreadPoolExecutor(1) as executor:
+        assert asyncio.run(main(executor)) == "<p>first</p>\n"
+
+
+def test_errors_are_raised():
+    async def main(executor: ThreadPoolExecutor):
+        await AsyncMarkdown(executor).parse(Path("does/not/exist.md"))
+
+    with ThreadPoolExecutor(1) as executor, pytest.raises(FileNotFoundError):
+        asyncio.run(main(executor))
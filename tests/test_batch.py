@@ -0,0 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from meltdown import parse, parse_many, render_many
+from tests.test_blog import get_test_cases
+
+
+def test_render_many_processes():
+    paths = [Path(f) for f in get_test_cases()]
+    results = list(render_many(paths, max_workers=2, chunksize=2))
+
+    assert [r.index for r in results] == list(range(len(paths)))
+    for path, result in zip(paths, results, strict=True):
+        expected = parse(path.read_text(encoding="utf-8"))
+        assert result.path == path
+        assert result.error is None
+        assert result.metadata == expected.metadata
+        assert result.html == expected.render()
+
+
+def test_render_many_unordered_threads():
+    sources = [f"# Document {i}" for i in range(50)]
+    with ThreadPoolExecutor(4) as executor:
+        results = list(
+            render_many(sources, executor=executor, chunksize=3, ordered=False)
+        )
+
+    assert sorted(r.index for r in results) == list(range(50))
+    for result in results:
+        assert result.html == f"<h1>Document {result.index}</h1>\n"
+
+
+def test_parse_many_collects_errors():
+    sources = ["*Hi*", Path("does/not/exist.md"), "there"]
+    results = list(parse_many(sources, max_workers=2))
+
+    assert results[0].tree is not None
+    assert results[0].tree.render() == "<p><em>Hi</em></p>\n"
+    assert results[1].tree is None
+    assert results[1].error is not None
+    assert results[1].error.startswith("FileNotFoundError")
+    assert results[2].tree is not None
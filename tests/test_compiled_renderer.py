@@ -0,0 +1,134 @@
+import pickle
+from typing import Self
+
+import pytest
+
+from meltdown import (
+    BoldNode,
+    CodeBlockNode,
+    EmphNode,
+    HtmlRenderer,
+    MarkdownParser,
+    MarkdownTree,
+    QuoteBlockNode,
+    Stats,
+    compile_renderer,
+    render_many,
+)
+from meltdown.CompiledRenderer import _Probe
+from meltdown.HtmlRenderer import _dispatch_table
+from tests.test_blog import get_test_cases
+from tests.test_html_renderer import nested
+
+SOURCE = """\
+# A **bold** title
+
+Some *emph*, ~~struck~~ and **bold *nested*** text with `code` and a
+[link](https://example.com) and ![an image](a.png) <!-- a comment -->.
+
+- first **item**
+- second
+
+> quoted *text*
+
+```python
+print("<hi>")
+```
+"""
+
+
+class Tags(HtmlRenderer):
+    def visit_bold(self: Self, node: BoldNode) -> str:
+        output = "<b>"
+        for child in node.children:
+            output += child.accept(self)
+        output += "</b>"
+        return output
+
+    def visit_emph(self: Self, node: EmphNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return f"<i>{inner}</i>"
+
+
+class Highlighted(Tags):
+    def visit_code_block(self: Self, node: CodeBlockNode) -> str:
+        return f'<pre class="language-{node.language}">{node.code}</pre>'
+
+    def visit_quote_block(self: Self, node: QuoteBlockNode) -> str:
+        # Not a plain wrapper, it depends on the children
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<blockquote>" + inner.upper() + "</blockquote>"
+
+
+class Page(Tags):
+    def visit_tree(self: Self, node: MarkdownTree) -> str:
+        return "<main>" + super().visit_tree(node) + "</main>"
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_the_renderer(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        tree = MarkdownParser().parse(f.read())
+    assert compile_renderer().render(tree) == tree.render()
+
+
+def test_wrappers_are_inlined():
+    compiled = compile_renderer(Tags())
+    assert "append('<b>')" in compiled.source
+    assert "append('<i>')" in compiled.source
+    tree = MarkdownParser().parse(SOURCE)
+    assert compiled.render(tree) == tree.render(Tags())
+
+
+def test_other_overrides_are_called():
+    compiled = compile_renderer(Highlighted())
+    assert "append('<b>')" in compiled.source
+    assert "visit_code_block(node)" in compiled.source
+    assert "visit_quote_block(node)" in compiled.source
+    tree = MarkdownParser().parse(SOURCE)
+    assert compiled.render(tree) == tree.render(Highlighted())
+
+
+def test_zero_copy_nodes():
+    source = SOURCE.replace("Some", "Some text that is long enough to be shared, " * 3)
+    tree = MarkdownParser(zero_copy=True).parse(source)
+    assert compile_renderer(Tags()).render(tree) == tree.render(Tags())
+
+
+def test_blocks_render_like_the_renderer():
+    tree = MarkdownParser().parse(SOURCE)
+    compiled = compile_renderer(Tags())
+    assert list(compiled.render_iter(tree)) == list(Tags().render_iter(tree))
+
+
+def test_deep_nesting():
+    tree = nested(20_000)
+    # Inlined wrappers don't recurse, unlike the methods they come from
+    expected = tree.render()
+    for tag, replacement in [("strong>", "b>"), ("em>", "i>")]:
+        expected = expected.replace(tag, replacement)
+    assert compile_renderer(Tags()).render(tree) == expected
+
+
+def test_pickles_and_keeps_the_identity():
+    compiled = compile_renderer(Tags())
+    assert compiled.identity() == Tags().identity()
+    copy = pickle.loads(pickle.dumps(compiled))
+    assert copy.source == compiled.source
+    [result] = render_many([SOURCE], compiled, max_workers=1)
+    assert result.html == MarkdownParser().parse(SOURCE).render(Tags())
+
+
+def test_overridden_visit_tree_is_called():
+    tree = MarkdownParser().parse(SOURCE)
+    compiled = compile_renderer(Page())
+    assert compiled.render(tree) == tree.render(Page())
+    assert compiled.render(tree).startswith("<main>")
+    assert list(compiled.render_iter(tree)) == list(Page().render_iter(tree))
+
+
+def test_probing_leaves_no_trace():
+    stats = Stats()
+    compile_renderer(HtmlRenderer(stats=stats))
+    assert stats.rendering == {}
+    assert _Probe not in _dispatch_table(HtmlRenderer).visits
@@ -0,0 +1,47 @@
+import sys
+
+import pytest
+
+from meltdown import MarkdownParser
+from tests.reference_parser import ReferenceParser
+
+# Every repetition opens a span inside the previous one, which is never
+# closed, with the HTML of a repetition.
+NESTING = {
+    "_a ": "_a ",
+    "__a ": "__a ",
+    "*a _b_ ": "*a <em>b</em> ",
+    "**a __b__ ": "**a <strong>b</strong> ",
+    "[a **b** ": "[a <strong>b</strong> ",
+}
+
+
+@pytest.mark.parametrize("pattern", [*NESTING, "*a ~~b [c ", "[a [b](u) "])
+def test_matches_recursive_reference(pattern: str):
+    source = pattern * 2000
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(20_000)
+    try:
+        expected = ReferenceParser().parse(source).dump()
+    finally:
+        sys.setrecursionlimit(limit)
+    assert MarkdownParser().parse(source).dump() == expected
+
+
+@pytest.mark.parametrize("pattern", NESTING)
+def test_very_deep_nesting(pattern: str):
+    repeat = 20_000
+    html = MarkdownParser().parse(pattern * repeat).render()
+    assert html == "<p>" + NESTING[pattern] * repeat + "</p>\n"
+
+
+def test_deep_nesting_in_every_block():
+    block = "*a _b_ " * 5000
+    source = f"# {block}\n\n- {block}\n- {block}\n\n> {block}\n\n{block}"
+    tree = MarkdownParser().parse(source)
+    assert [type(child).__name__ for child in tree.children] == [
+        "HeaderNode",
+        "UnorderedListNode",
+        "QuoteBlockNode",
+        "ParagraphNode",
+    ]
@@ -0,0 +1,86 @@
+import random
+from pathlib import Path
+
+import pytest
+
+from meltdown import DocumentIndex, MarkdownParser
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+SOURCE = """\
+---
+title: Index
+---
+# A **bold** `title`
+
+Some [linked *text*](https://a.example) and an ![alt text](cat.png).
+
+<!-- not counted -->
+
+## Second [one](b.html)
+
+- first item
+- sec**ond**
+
+```python
+print("hi")
+```
+"""
+
+
+def test_index():
+    tree = MarkdownParser(index=True).parse(SOURCE)
+    index = tree.index
+    assert index is not None
+    assert index.headers == [(1, "A bold title"), (2, "Second one")]
+    assert index.links == ["https://a.example", "b.html"]
+    assert index.images == [("cat.png", "alt text")]
+    texts = [
+        "A bold title",
+        "Some linked text and an .",
+        "Second one",
+        "first item",
+        "second",
+        'print("hi")',
+    ]
+    assert index.words == sum(len(text.split()) for text in texts)
+    assert index.characters == sum(len(text) for text in texts)
+
+
+def test_disabled_by_default():
+    assert MarkdownParser().parse(SOURCE).index is None
+    assert MarkdownParser().parse_iter([SOURCE]).index is None
+
+
+def sources() -> list[str]:
+    rng = random.Random(0)
+    fuzzed = ["".join(rng.choices(FRAGMENTS, k=200)) for _ in range(20)]
+    return [Path(f).read_text(encoding="utf-8") for f in get_test_cases()] + fuzzed
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+def test_same_as_indexing_the_tree(zero_copy: bool):
+    parser = MarkdownParser(zero_copy=zero_copy, index=True)
+    for source in sources():
+        tree = parser.parse(source)
+        assert tree.index == DocumentIndex.of(tree.children)
+
+
+def test_streams_and_reparses():
+    parser = MarkdownParser(index=True)
+    for source in sources():
+        expected = parser.parse(source).index
+
+        stream = parser.parse_iter(source.splitlines(True))
+        list(stream)
+        assert stream.index == expected
+
+        tree = parser.parse(source + "\n\nx")
+        assert parser.reparse(tree, len(source), 3, "").index == expected
+
+
+def test_files(tmp_path: Path):
+    path = tmp_path / "index.md"
+    path.write_text(SOURCE, encoding="utf-8")
+    tree = MarkdownParser(index=True).parse_file(path)
+    assert tree.index == MarkdownParser(index=True).parse(SOURCE).index
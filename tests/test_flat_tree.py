@@ -0,0 +1,85 @@
+import random
+import tracemalloc
+
+import pytest
+
+from meltdown import (
+    EmphNode,
+    FlatTree,
+    HeaderNode,
+    MarkdownParser,
+    MarkdownTree,
+    ParagraphNode,
+    TextNode,
+)
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+
+def assert_round_trip(tree: MarkdownTree):
+    flat = FlatTree.from_tree(tree)
+    assert flat.to_tree() == tree
+    assert flat.to_tree().dump() == tree.dump()
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_round_trip(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        source = f.read()
+    assert_round_trip(MarkdownParser().parse(source))
+    assert_round_trip(MarkdownParser(zero_copy=True).parse(source))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_input_round_trip(seed: int):
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 60)))
+        assert_round_trip(MarkdownParser().parse(source))
+
+
+def test_navigation():
+    flat = FlatTree.from_tree(MarkdownParser().parse("# Hi *you*\n\nText"))
+
+    header, paragraph = flat.roots()
+    assert flat.type_of(header) is HeaderNode
+    assert flat.values[header] == 1
+    assert [flat.type_of(i) for i in flat.children(header)] == [TextNode, EmphNode]
+    assert flat.string(flat.children(header)[0]) == "Hi "
+    assert flat.node(paragraph) == ParagraphNode([TextNode("Text")])
+    assert len(flat) == 6
+
+
+def test_equal_strings_are_stored_once():
+    flat = FlatTree.from_tree(MarkdownParser().parse("*a* *a* *a*"))
+    assert flat.strings.count("a") == 1
+
+
+def test_deep_nesting():
+    node = TextNode("deep")
+    for _ in range(10_000):
+        node = EmphNode([node])
+    tree = MarkdownTree({}, [ParagraphNode([node])])
+
+    flat = FlatTree.from_tree(tree)
+    assert len(flat) == 10_002
+    assert flat.ends[0] == 10_002
+    assert flat.string(10_001) == "deep"
+
+
+def test_uses_less_memory():
+    with open(get_test_cases()[0], encoding="utf-8") as f:
+        tree = MarkdownParser().parse(f.read() * 20)
+
+    def allocated(build) -> int:
+        tracemalloc.start()
+        try:
+            result = build()
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del result
+        return size
+
+    flat = FlatTree.from_tree(tree)
+    assert allocated(lambda: FlatTree.from_tree(tree)) * 2 < allocated(flat.to_tree)
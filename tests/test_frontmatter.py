@@ -0,0 +1,67 @@
+import random
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from meltdown import MarkdownParser, parse, read_frontmatter, read_frontmatter_many
+from tests.test_blog import get_test_cases
+
+# Snippets that make up frontmatter, well formed or not.
+FRAGMENTS = [
+    "---", "---", "--", "-", "\n", "\n", "\n", "\n\n", " ", "  ", "title",
+    ": ", ":", "value", "a: b\n", "#", "x y", " ",
+]  # fmt: skip
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_parse(input_file: str):
+    expected = parse(Path(input_file).read_text(encoding="utf-8")).metadata
+    assert read_frontmatter(Path(input_file)) == expected
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_lines_match_parse(seed: int):
+    rng = random.Random(seed)
+    for _ in range(200):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 40)))
+        if rng.random() < 0.5:
+            source = "---\n" + source
+        expected = parse(source).metadata
+        lines = source.splitlines(keepends=True)
+        assert MarkdownParser().parse_frontmatter(lines) == expected
+        assert read_frontmatter(source) == expected
+
+
+def test_stops_reading_after_the_frontmatter():
+    def lines() -> Iterator[str]:
+        yield from ["\n", "---\n", "title: Hello\n", "tags: a, b\n", "---\n"]
+        raise AssertionError("read past the frontmatter")
+
+    metadata = MarkdownParser().parse_frontmatter(lines())
+    assert metadata == {"title": "Hello", "tags": "a, b"}
+
+
+def test_unclosed_frontmatter_is_empty():
+    lines = ["---\n", "title: Hello\n", "\n", "Some text\n"]
+    assert MarkdownParser().parse_frontmatter(lines) == {}
+
+
+def test_read_frontmatter_many(tmp_path: Path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"post{i}.md"
+        path.write_text(f"---\ntitle: Post {i}\n---\n\n# Post {i}\n")
+        paths.append(path)
+    paths.append(tmp_path / "missing.md")
+
+    with ThreadPoolExecutor(2) as executor:
+        results = list(read_frontmatter_many(paths, executor=executor, chunksize=3))
+
+    for i, result in enumerate(results[:-1]):
+        assert result.path == paths[i]
+        assert result.metadata == {"title": f"Post {i}"}
+    assert results[-1].metadata is None
+    assert results[-1].error is not None
+    assert results[-1].error.startswith("FileNotFoundError")
@@ -0,0 +1,105 @@
+from typing import Self
+
+import pytest
+
+from meltdown import (
+    BoldNode,
+    EmphNode,
+    HtmlRenderer,
+    LinkNode,
+    MarkdownParser,
+    MarkdownTree,
+    Node,
+    ParagraphNode,
+    StrikeThroughNode,
+    TextNode,
+)
+from meltdown.Nodes import MarkdownVisitor
+from tests.test_blog import get_test_cases
+
+
+def nested(depth: int) -> MarkdownTree:
+    node: Node = TextNode("x")
+    for level in range(depth):
+        match level % 4:
+            case 0:
+                node = BoldNode([node])
+            case 1:
+                node = EmphNode([node])
+            case 2:
+                node = StrikeThroughNode([node])
+            case _:
+                node = LinkNode("u", [node])
+    return MarkdownTree({}, [ParagraphNode([node])])
+
+
+def test_deep_nesting_renders_without_recursion():
+    depth = 20_000
+    opening = ["<strong>", "<em>", "<del>", '<a href="u">']
+    closing = ["</strong>", "</em>", "</del>", "</a>"]
+    expected = (
+        "<p>"
+        + "".join(opening[level % 4] for level in reversed(range(depth)))
+        + "x"
+        + "".join(closing[level % 4] for level in range(depth))
+        + "</p>\n"
+    )
+    assert nested(depth).render() == expected
+
+
+class UpperBold(HtmlRenderer):
+    def visit_bold(self: Self, node: BoldNode) -> str:
+        inner = "".join(c.accept(self) for c in node.children)
+        return "<b>" + inner.upper() + "</b>"
+
+    def visit_text(self: Self, node: TextNode) -> str:
+        return node.text.replace("a", "4")
+
+
+def test_overrides_are_honored():
+    tree = MarkdownParser().parse("A **bold a** and *an emph*\n\n**a**")
+    assert tree.render(UpperBold()) == (
+        "<p>A <b>BOLD 4</b> 4nd <em>4n emph</em></p>\n<p><b>4</b></p>\n"
+    )
+    # The table of a subclass doesn't leak into the base class
+    assert tree.render() == (
+        "<p>A <strong>bold a</strong> and <em>an emph</em></p>\n"
+        "<p><strong>a</strong></p>\n"
+    )
+
+
+def test_overrides_can_call_the_default():
+    class Marked(HtmlRenderer):
+        def visit_emph(self: Self, node: EmphNode) -> str:
+            return "[" + super().visit_emph(node) + "]"
+
+    tree = MarkdownParser().parse("**bold *emph* bold**")
+    assert tree.render(Marked()) == (
+        "<p><strong>bold [<em>emph</em>] bold</strong></p>\n"
+    )
+
+
+def test_unknown_nodes_go_through_accept():
+    class Shout(TextNode):
+        def accept(self: Self, visitor: MarkdownVisitor) -> str:
+            return self.text.upper()
+
+    class Mention(Node):
+        def accept(self: Self, visitor: MarkdownVisitor) -> str:
+            return "@someone"
+
+        def dump(self: Self, indent: int = 0) -> str:
+            return ""
+
+    tree = MarkdownTree({}, [ParagraphNode([Shout("hi"), Mention()])])
+    # Subclasses of known nodes are rendered like their base
+    assert tree.render() == "<p>hi@someone</p>\n"
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_visiting_each_block(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        tree = MarkdownParser().parse(f.read())
+    renderer = HtmlRenderer()
+    blocks = "".join(child.accept(renderer) for child in tree.children)
+    assert tree.render(renderer) == blocks
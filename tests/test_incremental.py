@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from meltdown import MarkdownParser, MarkdownTree
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+
+def random_edit(rng: random.Random, source: str) -> tuple[int, int, str]:
+    offset = rng.randint(0, len(source))
+    deleted = rng.randint(0, min(10, len(source) - offset))
+    inserted = "".join(rng.choices(FRAGMENTS, k=rng.randint(0, 4)))
+    return offset, deleted, inserted
+
+
+def assert_same_as_full_parse(tree: MarkdownTree):
+    assert tree.source_map is not None
+    expected = MarkdownParser().parse(tree.source_map.source)
+    assert tree.dump() == expected.dump()
+    assert expected.source_map is not None
+    assert tree.source_map.spans == expected.source_map.spans
+    # Reparsing may only err towards reparsing more in the future.
+    assert all(
+        reach >= expected_reach
+        for reach, expected_reach in zip(
+            tree.source_map.reaches, expected.source_map.reaches, strict=True
+        )
+    )
+    if expected.source_map.unclosed_from is not None:
+        assert tree.source_map.unclosed_from is not None
+        assert tree.source_map.unclosed_from <= expected.source_map.unclosed_from
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_edit_sequence_on_blog(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        tree = MarkdownParser().parse(f.read())
+
+    rng = random.Random(input_file)
+    for _ in range(30):
+        assert tree.source_map is not None
+        edit = random_edit(rng, tree.source_map.source)
+        tree = MarkdownParser().reparse(tree, *edit)
+        assert_same_as_full_parse(tree)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_edit_sequence_on_fuzzed_input(seed: int):
+    rng = random.Random(seed)
+    source = "".join(rng.choices(FRAGMENTS, k=100))
+    tree = MarkdownParser().parse(source)
+    for _ in range(100):
+        assert tree.source_map is not None
+        edit = random_edit(rng, tree.source_map.source)
+        tree = MarkdownParser().reparse(tree, *edit)
+        assert_same_as_full_parse(tree)
+
+
+def test_blocks_after_the_edit_are_reused():
+    source = "# Title\n\nFirst paragraph\n\nSecond paragraph\n\nThird paragraph\n"
+    tree = MarkdownParser().parse(source)
+
+    offset = source.index("Second") + len("Second")
+    new_tree = MarkdownParser().reparse(tree, offset, 0, " *edited*")
+
+    assert new_tree.children[0] is tree.children[0]
+    assert new_tree.children[2] is not tree.children[2]
+    assert new_tree.children[3] is tree.children[3]
+    assert new_tree.render() == MarkdownParser().parse(source).render().replace(
+        "Second paragraph", "Second <em>edited</em> paragraph"
+    )
+
+
+def test_closing_an_unclosed_code_block():
+    source = "```x y\n\nmore text here\n\nend"
+    tree = MarkdownParser().reparse(
+        MarkdownParser().parse(source), len(source), 0, "\n```"
+    )
+    assert_same_as_full_parse(tree)
+    assert len(tree.children) == 1
+
+
+def test_out_of_bounds_edit():
+    tree = MarkdownParser().parse("Hello")
+    with pytest.raises(ValueError):
+        MarkdownParser().reparse(tree, 3, 5, "")
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+
+from meltdown import MarkdownParser
+from tests.reference_parser import ReferenceParser
+from tests.test_blog import get_test_cases
+
+# Snippets that are likely to trip up the inline parser, glued together at
+# random.
+FRAGMENTS = [
+    "*", "**", "_", "__", "~", "~~", "`", "[", "]", "(", ")", "![", "](",
+    "<!--", "-->", "<", "!", "\n", "\n\n", "# ", "## ", "- ", "* ", "> ",
+    "```", "---", ":", " ", "\t", "word", "x y", "http://a.b", ".",
+]  # fmt: skip
+
+
+def assert_same_tree(source: str):
+    expected = ReferenceParser().parse(source).dump()
+    assert MarkdownParser().parse(source).dump() == expected
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_reference(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        assert_same_tree(f.read())
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_fuzzed_input_matches_reference(seed: int):
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 60)))
+        assert_same_tree(source)
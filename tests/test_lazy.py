@@ -0,0 +1,99 @@
+import pickle
+import random
+from pathlib import Path
+
+import pytest
+
+from meltdown import (
+    HeaderNode,
+    LazyHeaderNode,
+    LazyParagraphNode,
+    MarkdownParser,
+    ParagraphNode,
+    Stats,
+    TextNode,
+)
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+SOURCE = """\
+---
+title: Lazy
+---
+# A **bold** title
+
+Some *emph* and [a link](url).
+
+> A quote
+
+- first
+- sec**ond
+"""
+
+
+def sources() -> list[str]:
+    rng = random.Random(0)
+    fuzzed = ["".join(rng.choices(FRAGMENTS, k=200)) for _ in range(50)]
+    return [Path(f).read_text(encoding="utf-8") for f in get_test_cases()] + fuzzed
+
+
+@pytest.mark.parametrize("zero_copy", [False, True])
+def test_same_as_parsing_right_away(zero_copy: bool):
+    eager = MarkdownParser(zero_copy=zero_copy)
+    lazy = MarkdownParser(zero_copy=zero_copy, lazy=True)
+    for source in sources():
+        expected = eager.parse(source)
+        tree = lazy.parse(source)
+        assert tree.source_map is not None and expected.source_map is not None
+        assert tree.source_map.spans == expected.source_map.spans
+        assert tree.render() == expected.render()
+        assert tree == expected
+        assert expected == tree
+
+
+def test_text_is_parsed_when_read():
+    stats = Stats()
+    tree = MarkdownParser(stats=stats, lazy=True).parse(SOURCE)
+    assert stats.parsing.get("inline") is None
+
+    header = tree.children[0]
+    assert isinstance(header, LazyHeaderNode)
+    assert header.header_size == 1
+    expected = MarkdownParser().parse("# A **bold** title").children[0]
+    assert header.children == expected.children
+    assert stats.parsing["inline"].count == 1
+
+    # Only once, and the rest when rendered
+    assert header.children == expected.children
+    tree.render()
+    assert stats.parsing["inline"].count == 5
+
+
+def test_assigned_children_are_kept():
+    tree = MarkdownParser(lazy=True).parse(SOURCE)
+    paragraph = tree.children[1]
+    assert isinstance(paragraph, LazyParagraphNode)
+    paragraph.children = [TextNode("Replaced")]
+    assert paragraph == ParagraphNode([TextNode("Replaced")])
+
+
+def test_pickles_as_the_regular_nodes():
+    tree = MarkdownParser(lazy=True).parse(SOURCE)
+    loaded = pickle.loads(pickle.dumps(tree))
+    assert type(loaded.children[0]) is HeaderNode
+    assert loaded == MarkdownParser().parse(SOURCE)
+
+
+def test_streams_reparses_and_files(tmp_path: Path):
+    lazy = MarkdownParser(lazy=True)
+    expected = MarkdownParser().parse(SOURCE)
+
+    assert list(lazy.parse_iter(SOURCE.splitlines(True))) == expected.children
+
+    edited = SOURCE.replace("emph", "strong")
+    tree = lazy.reparse(lazy.parse(SOURCE), SOURCE.index("emph"), 4, "strong")
+    assert tree == MarkdownParser().parse(edited)
+
+    path = tmp_path / "lazy.md"
+    path.write_text(SOURCE, encoding="utf-8")
+    assert lazy.parse_file(path) == expected
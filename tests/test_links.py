@@ -0,0 +1,154 @@
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+
+from meltdown import (
+    ImageNode,
+    Link,
+    LinkNode,
+    Node,
+    UnorderedListNode,
+    extract_links,
+    extract_links_many,
+    parse,
+)
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+# Snippets with links and images, well formed or not.
+LINK_FRAGMENTS = [
+    "[a](u)", "![b](i.png)", "[x ![y](z) w](v)", "[t `]` q](r)", "](", "](x",
+    "**", "*", "~~", "__", "_c_", "a_b", "`c`", "<!--", "-->", "\n", "\n\n",
+]  # fmt: skip
+
+
+def from_tree(source: str) -> list[tuple[str, str, str]]:
+    found = []
+    stack: list[Node] = list(reversed(parse(source).children))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, LinkNode):
+            found.append(("link", node.url, ""))
+        elif isinstance(node, ImageNode):
+            found.append(("image", node.url, node.description))
+        if isinstance(node, UnorderedListNode):
+            stack.extend(reversed(node.items))
+        else:
+            stack.extend(reversed(getattr(node, "children", ())))
+    return found
+
+
+def check(source: str) -> None:
+    links = list(extract_links(source))
+    expected = from_tree(source)
+    # The text of a link is its markdown, which the tree doesn't have
+    found = [
+        (kind, url, text if kind == "image" else "") for kind, url, text, _ in links
+    ]
+    assert found == expected
+    for link in links:
+        if link.kind == "link":
+            markdown = f"[{link.text}]({link.url})"
+        else:
+            markdown = f"![{link.text}]({link.url})"
+        assert source.startswith(markdown, link.offset)
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_parse(input_file: str):
+    check(Path(input_file).read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("fragments", [FRAGMENTS, LINK_FRAGMENTS])
+@pytest.mark.parametrize("seed", range(5))
+def test_fuzzed_matches_parse(fragments: list[str], seed: int):
+    rng = random.Random(seed)
+    for _ in range(300):
+        check("".join(rng.choices(fragments, k=rng.randint(1, 60))))
+
+
+def test_links():
+    source = """\
+---
+title: Links
+---
+# A [header](h.html)
+
+Some [linked *text*](https://a.example) and an ![alt](cat.png).
+
+- [item](i.html)
+"""
+    links = list(extract_links(source))
+    assert links == [
+        Link("link", "h.html", "header", source.index("[header")),
+        Link("link", "https://a.example", "linked *text*", source.index("[linked")),
+        Link("image", "cat.png", "alt", source.index("![alt")),
+        Link("link", "i.html", "item", source.index("[item")),
+    ]
+
+
+def test_images_inside_of_links_come_after_them():
+    source = "[![badge](b.svg)](https://ci.example)"
+    assert list(extract_links(source)) == [
+        Link("link", "https://ci.example", "![badge](b.svg)", 0),
+        Link("image", "b.svg", "badge", 1),
+    ]
+
+
+def test_skips_code_and_comments():
+    source = """\
+`[not](a.html)` <!-- [nor](b.html) -->
+
+```
+[nor](c.html) ![nor](d.png)
+```
+
+[but](e.html)
+"""
+    assert [link.url for link in extract_links(source)] == ["e.html"]
+
+
+@pytest.mark.parametrize("broken", ["![a ", "![a](b", "![a]("])
+def test_broken_images_take_linear_time(broken: str):
+    def best(extract, source: str) -> float:
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            extract(source)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    # Four times the input takes about four times as long, not sixteen
+    for extract in [lambda s: list(extract_links(s)), parse]:
+        short = best(extract, broken * 5000)
+        assert best(extract, broken * 20000) < 8 * short
+
+
+def test_extract_links_many(tmp_path: Path):
+    paths = []
+    for i in range(20):
+        path = tmp_path / f"post{i}.md"
+        path.write_text(f"# Post {i}\n\nSee [the next](post{i + 1}.md).\n")
+        paths.append(path)
+    paths.append(tmp_path / "missing.md")
+
+    with ThreadPoolExecutor(2) as executor:
+        results = list(extract_links_many(paths, executor=executor, chunksize=3))
+
+    for i, result in enumerate(results[:-1]):
+        assert result.path == paths[i]
+        assert result.links is not None
+        assert [link.url for link in result.links] == [f"post{i + 1}.md"]
+    assert results[-1].links is None
+    assert results[-1].error is not None
+    assert results[-1].error.startswith("FileNotFoundError")
+
+
+def test_extract_links_many_processes():
+    paths = [Path(f) for f in get_test_cases()]
+    results = list(extract_links_many(paths, max_workers=2, chunksize=2))
+    for path, result in zip(paths, results, strict=True):
+        assert result.links == list(extract_links(path.read_text(encoding="utf-8")))
@@ -0,0 +1,61 @@
+import importlib
+import random
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+from meltdown import MarkdownParser, parse, parse_file
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+parser_module = importlib.import_module("meltdown.MarkdownParser")
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_parse(input_file: str, monkeypatch: pytest.MonkeyPatch):
+    expected = parse(Path(input_file).read_text(encoding="utf-8")).dump()
+    assert parse_file(input_file).dump() == expected
+
+    # Cut at every blank line
+    monkeypatch.setattr(parser_module, "_FILE_PIECE_SIZE", 1)
+    assert parse_file(input_file).dump() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fuzzed_files_match_parse(
+    seed: int, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(parser_module, "_FILE_PIECE_SIZE", 1)
+    rng = random.Random(seed)
+    path = tmp_path / "fuzzed.md"
+    for _ in range(50):
+        source = "".join(rng.choices([*FRAGMENTS, "\r\n", "\r\n\r\n", "ü"], k=60))
+        path.write_bytes(source.encode("utf-8"))
+        expected = parse(path.read_text(encoding="utf-8")).dump()
+        assert MarkdownParser().parse_file(path).dump() == expected
+
+
+def test_empty_file(tmp_path: Path):
+    path = tmp_path / "empty.md"
+    path.touch()
+    assert parse_file(path).dump() == parse("").dump()
+
+
+def test_needs_less_memory(tmp_path: Path):
+    path = tmp_path / "large.md"
+    paragraph = "Just some text that goes on and on, " * 20
+    path.write_text(f"{paragraph}\n\n" * 2_000, encoding="utf-8")
+
+    def peak(function) -> int:
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    from_file = peak(lambda: parse_file(path))
+    from_string = peak(lambda: parse(path.read_text(encoding="utf-8")))
+    assert from_file < from_string * 0.75
@@ -0,0 +1,60 @@
+import html
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from meltdown import CodeBlockNode, HtmlRenderer, RenderCache, parse, render
+
+
+class CustomHtmlRenderer(HtmlRenderer):
+    def visit_code_block(self: Self, node: CodeBlockNode) -> str:
+        return f"<pre>{html.escape(node.code)}</pre>\n"
+
+
+def test_memory_hits_and_misses():
+    cache = RenderCache()
+    source = "# Hello **friends**!"
+
+    assert render(source, cache=cache) == parse(source).render()
+    assert render(source, cache=cache) == parse(source).render()
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+def test_renderer_is_part_of_the_key():
+    cache = RenderCache()
+    source = "```\ncode\n```"
+
+    assert render(source, cache=cache) == "<pre><code>code</code></pre>\n"
+    assert render(source, CustomHtmlRenderer(), cache) == "<pre>code</pre>\n"
+    assert cache.stats.misses == 2
+
+
+def test_renderer_version_is_part_of_the_key(monkeypatch: pytest.MonkeyPatch):
+    before = CustomHtmlRenderer().identity()
+    monkeypatch.setattr(CustomHtmlRenderer, "version", 1)
+    assert CustomHtmlRenderer().identity() != before
+
+
+def test_least_recently_used_is_evicted():
+    cache = RenderCache(max_entries=2)
+    render("a", cache=cache)
+    render("b", cache=cache)
+    render("a", cache=cache)
+    render("c", cache=cache)
+
+    assert len(cache) == 2
+    assert cache.stats.evictions == 1
+    render("a", cache=cache)
+    assert cache.stats.hits == 2
+
+
+def test_disk_tier(tmp_path: Path):
+    render("Hi *there*", cache=RenderCache(directory=tmp_path))
+
+    cache = RenderCache(directory=tmp_path)
+    assert render("Hi *there*", cache=cache) == "<p>Hi <em>there</em></p>\n"
+    assert cache.stats.disk_hits == 1
+
+    cache.clear()
+    assert list(tmp_path.glob("*/*.html")) == []
@@ -0,0 +1,46 @@
+import html
+import io
+from typing import Self
+
+import pytest
+
+from meltdown import CodeBlockNode, HtmlRenderer, MarkdownParser, parse
+from tests.test_blog import get_test_cases
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_chunks_match_render(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        document = parse(f.read())
+
+    assert "".join(document.render_iter()) == document.render()
+
+
+def test_render_to_text_and_binary_sinks():
+    document = parse("# Hello **friends**!\n\nHow are you?")
+
+    text = io.StringIO()
+    document.render_to(text)
+    binary = io.BytesIO()
+    document.render_to(binary)
+
+    assert text.getvalue() == document.render()
+    assert binary.getvalue() == document.render().encode()
+
+
+def test_render_stream_while_parsing():
+    lines = ["# One\n", "\n", "Two\n", "\n", "Three"]
+    stream = MarkdownParser().parse_iter(lines)
+
+    chunks = list(stream.render_iter())
+    assert chunks == ["<h1>One</h1>\n", "<p>Two</p>\n", "<p>Three</p>\n"]
+
+
+def test_custom_renderer_chunks():
+    class CustomHtmlRenderer(HtmlRenderer):
+        def visit_code_block(self: Self, node: CodeBlockNode) -> str:
+            return f"<pre>{html.escape(node.code)}</pre>\n"
+
+    document = parse("Code:\n\n```\na < b\n```\n")
+    chunks = list(document.render_iter(CustomHtmlRenderer()))
+    assert chunks[1] == "<pre>a &lt; b</pre>\n"
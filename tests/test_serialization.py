@@ -0,0 +1,116 @@
+import pickle
+import random
+import time
+
+import pytest
+
+from meltdown import (
+    EmphNode,
+    MarkdownParser,
+    MarkdownTree,
+    ParagraphNode,
+    ParseResult,
+    TextNode,
+    parse_many,
+)
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+
+def assert_round_trip(tree: MarkdownTree):
+    decoded = MarkdownTree.from_bytes(tree.to_bytes(include_source_map=True))
+    assert decoded == tree
+    assert decoded.dump() == tree.dump()
+    assert decoded.source_map == tree.source_map
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_round_trip(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        source = f.read()
+    assert_round_trip(MarkdownParser().parse(source))
+    assert_round_trip(MarkdownParser(zero_copy=True).parse(source))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_input_round_trip(seed: int):
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 60)))
+        assert_round_trip(MarkdownParser().parse(source))
+
+
+def test_without_source_map():
+    tree = MarkdownParser().parse("---\ntitle: Hi\n---\n# Hi *you* \U0001f600")
+    decoded = MarkdownTree.from_bytes(tree.to_bytes())
+    assert decoded == tree
+    assert decoded.metadata == {"title": "Hi"}
+    assert decoded.source_map is None
+    assert len(tree.to_bytes()) < len(tree.to_bytes(include_source_map=True))
+
+    tree.source_map = None
+    decoded = MarkdownTree.from_bytes(tree.to_bytes(include_source_map=True))
+    assert decoded.source_map is None
+
+
+def test_deep_nesting():
+    node = TextNode("deep")
+    for _ in range(20_000):
+        node = EmphNode([node])
+    tree = MarkdownTree({}, [ParagraphNode([node])])
+    assert MarkdownTree.from_bytes(tree.to_bytes()).render() == tree.render()
+
+
+def test_incremental_parsing_after_decoding():
+    source = "# Title\n\nSome *text*\n\n- an item\n"
+    data = MarkdownParser().parse(source).to_bytes(include_source_map=True)
+    tree = MarkdownTree.from_bytes(data)
+    offset = source.index("Some")
+    expected = MarkdownParser().parse(source.replace("Some", "More"))
+    assert MarkdownParser().reparse(tree, offset, 4, "More") == expected
+
+
+@pytest.mark.parametrize(
+    ("data", "message"),
+    [
+        (b"", "Not an encoded"),
+        (b"\x80\x04junk", "Not an encoded"),
+        (b"MLDN\xff\x00", "Unsupported version"),
+    ],
+)
+def test_rejects_other_data(data: bytes, message: str):
+    with pytest.raises(ValueError, match=message):
+        MarkdownTree.from_bytes(data)
+
+
+def test_rejects_corrupt_data():
+    data = MarkdownParser().parse("# Title\n\nSome *text* and `code`").to_bytes()
+    for end in range(6, len(data)):
+        with pytest.raises(ValueError, match="Corrupt"):
+            MarkdownTree.from_bytes(data[:end])
+
+
+def test_smaller_and_faster_than_pickle():
+    with open(get_test_cases()[0], encoding="utf-8") as f:
+        tree = MarkdownParser().parse(f.read() * 20)
+    encoded, pickled = tree.to_bytes(), pickle.dumps(tree)
+    assert len(encoded) < len(pickled)
+
+    def best(load, data) -> float:
+        times = []
+        for _ in range(5):
+            start = time.perf_counter()
+            load(data)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    # Generous, the point is it isn't slower
+    assert best(MarkdownTree.from_bytes, encoded) < 1.5 * best(pickle.loads, pickled)
+
+
+def test_parse_results_pickle_as_encoded_trees():
+    [result] = parse_many(["# Hi *you*"], max_workers=1)
+    assert result.tree == MarkdownParser().parse("# Hi *you*")
+    copy = pickle.loads(pickle.dumps(result))
+    assert copy == result
+    assert pickle.loads(pickle.dumps(ParseResult(0, None, None, "error"))).error
@@ -0,0 +1,61 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from meltdown import MarkdownParser, Stats
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+
+def sources() -> list[str]:
+    rng = random.Random(0)
+    fuzzed = ["".join(rng.choices(FRAGMENTS, k=200)) for _ in range(20)]
+    blog = [Path(f).read_text(encoding="utf-8") for f in get_test_cases()]
+    return blog + fuzzed
+
+
+def test_one_parser_in_many_threads():
+    documents = sources() * 4
+    expected = [MarkdownParser().parse(source).dump() for source in documents]
+
+    shared = MarkdownParser()
+    with ThreadPoolExecutor(8) as executor:
+        trees = list(executor.map(shared.parse, documents))
+    assert [tree.dump() for tree in trees] == expected
+
+
+def test_interleaved_streams():
+    first, second = sources()[:2]
+    parser = MarkdownParser()
+    streams = [
+        iter(parser.parse_iter(first.splitlines(True))),
+        iter(parser.parse_iter(second.splitlines(True))),
+    ]
+    blocks = [[], []]
+    # One block of each in turn, and a whole parse in between
+    while any(streams):
+        for i, stream in enumerate(streams):
+            if stream is not None:
+                block = next(stream, None)
+                if block is None:
+                    streams[i] = None
+                else:
+                    blocks[i].append(block)
+        parser.parse(first)
+
+    assert blocks[0] == parser.parse(first).children
+    assert blocks[1] == parser.parse(second).children
+
+
+def test_no_state_is_left_on_the_parser():
+    stats = Stats()
+    parser = MarkdownParser(zero_copy=True, stats=stats)
+    tree = parser.parse("---\ntitle: A\n---\n# **Bold** `code` [link](url)")
+    parser.reparse(tree, 0, 0, "Hi ")
+    parser.parse_frontmatter(["---\n", "title: A\n"])
+    assert vars(parser) == {
+        "zero_copy": True,
+        "stats": stats,
+        "index": False,
+        "lazy": False,
+    }
@@ -56,6 +56,19 @@ x = y</code></pre>
 """)
 
 
+def test_code_block_at_end():
+    src = "```\nx = y\n```"
+    assert produce(src) == snapshot("<pre><code>x = y</code></pre>\n")
+
+
+def test_unclosed_code_block():
+    src = "```python\nx = y\n\nz"
+    assert produce(src) == snapshot("""\
+<p>```python x = y</p>
+<p>z</p>
+""")
+
+
 def test_quote_block():
     src = "> **Note:** This isn't quite correct!"
     assert produce(src) == snapshot(
@@ -129,6 +142,11 @@ def test_comment():
     )
 
 
+def test_unclosed_comments():
+    src = "a <!-- b <!-- c"
+    assert produce(src) == snapshot("<p>a &lt;!-- b &lt;!-- c</p>\n")
+
+
 def test_link():
     src = "[Homepage](https://flofriday.dev)"
     assert produce(src) == snapshot(
@@ -0,0 +1,97 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from meltdown import HtmlRenderer, SiteBuilder, TextNode, parse
+
+
+class ShoutingHtmlRenderer(HtmlRenderer):
+    def visit_text(self: Self, node: TextNode) -> str:
+        return super().visit_text(node).upper()
+
+
+@pytest.fixture
+def site(tmp_path: Path) -> Path:
+    source = tmp_path / "src"
+    (source / "posts").mkdir(parents=True)
+    (source / "index.md").write_text("# Home")
+    for i in range(5):
+        (source / "posts" / f"post{i}.md").write_text(f"# Post {i}\n\n*Hi*\n")
+    return tmp_path
+
+
+def build(site: Path, renderer: HtmlRenderer | None = None, force: bool = False):
+    with ThreadPoolExecutor(2) as executor:
+        builder = SiteBuilder(site / "src", site / "out", renderer, executor=executor)
+        return builder.build(force)
+
+
+def test_renders_every_file(site: Path):
+    report = build(site)
+
+    assert (report.rendered, report.unchanged, report.errors) == (6, 0, {})
+    output = site / "out" / "posts" / "post3.html"
+    assert output.read_text() == parse("# Post 3\n\n*Hi*\n").render()
+    assert (site / "out" / "index.html").read_text() == "<h1>Home</h1>\n"
+
+
+def test_skips_unchanged_files(site: Path):
+    build(site)
+    assert (build(site).rendered, build(site).unchanged) == (0, 6)
+
+    (site / "src" / "index.md").write_text("# New home")
+    report = build(site)
+    assert (report.rendered, report.unchanged) == (1, 5)
+    assert (site / "out" / "index.html").read_text() == "<h1>New home</h1>\n"
+
+
+def test_touched_files_are_compared_by_hash(site: Path):
+    build(site)
+    path = site / "src" / "index.md"
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    report = build(site)
+    assert (report.rendered, report.unchanged) == (0, 6)
+
+
+def test_removes_output_of_deleted_files(site: Path):
+    build(site)
+    (site / "src" / "posts" / "post0.md").unlink()
+
+    report = build(site)
+    assert report.removed == 1
+    assert not (site / "out" / "posts" / "post0.html").exists()
+
+
+def test_missing_output_is_rendered_again(site: Path):
+    build(site)
+    (site / "out" / "index.html").unlink()
+
+    assert build(site).rendered == 1
+    assert (site / "out" / "index.html").exists()
+
+
+def test_renderer_change_and_force_render_everything(site: Path):
+    build(site)
+    report = build(site, ShoutingHtmlRenderer())
+    assert report.rendered == 6
+    assert (site / "out" / "index.html").read_text() == "<h1>HOME</h1>\n"
+
+    assert build(site, ShoutingHtmlRenderer(), force=True).rendered == 6
+
+
+def test_errors_are_reported_and_retried(site: Path):
+    broken = site / "src" / "broken.md"
+    broken.write_bytes(b"\xff\xfe")
+
+    report = build(site)
+    assert report.rendered == 6
+    assert report.errors["broken.md"].startswith("UnicodeDecodeError")
+
+    broken.write_text("Fixed")
+    report = build(site)
+    assert (report.rendered, report.errors) == (1, {})
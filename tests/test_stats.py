@@ -0,0 +1,119 @@
+import pickle
+from typing import Self
+
+from meltdown import (
+    BoldNode,
+    HtmlRenderer,
+    MarkdownParser,
+    Stats,
+    compile_renderer,
+)
+
+SOURCE = """\
+---
+title: Stats
+---
+# A **bold** title
+
+Some *emph* and **bold** text with `code`.
+
+- first
+- second
+"""
+
+
+class Shouting(HtmlRenderer):
+    def visit_bold(self: Self, node: BoldNode) -> str:
+        return super().visit_bold(node).upper()
+
+
+def test_parsing_phases_and_node_counts():
+    stats = Stats()
+    MarkdownParser(stats=stats).parse(SOURCE)
+
+    assert {"frontmatter", "blocks", "inline"} <= stats.parsing.keys()
+    assert stats.parsing["HeaderNode"].count == 1
+    assert stats.parsing["ParagraphNode"].count == 1
+    assert stats.parsing["UnorderedListNode"].count == 1
+    assert stats.parsing["ListItemNode"].count == 2
+    assert stats.parsing["BoldNode"].count == 2
+    assert stats.parsing["EmphNode"].count == 1
+    assert stats.parsing["CodeNode"].count == 1
+    # The header, the paragraph and the two list items
+    assert stats.parsing["inline"].count == 4
+    assert stats.parsing["blocks"].seconds >= stats.parsing["inline"].seconds
+    assert stats.rendering == {}
+
+
+def test_streamed_parsing_is_counted_too():
+    stats = Stats()
+    stream = MarkdownParser(stats=stats).parse_iter(SOURCE.splitlines(True))
+    list(stream)
+    assert stats.parsing["frontmatter"].count == 1
+    assert stats.parsing["HeaderNode"].count == 1
+
+
+def test_rendering_node_types():
+    stats = Stats()
+    tree = MarkdownParser(stats=stats).parse(SOURCE)
+    assert tree.render(HtmlRenderer(stats=stats)) == tree.render()
+
+    assert stats.rendering["ParagraphNode"].count == 1
+    assert stats.rendering["BoldNode"].count == 2
+    assert stats.rendering["ListItemNode"].count == 2
+    assert stats.rendering["TextNode"].count == stats.parsing["TextNode"].count
+    # Cumulative, a paragraph takes at least as long as the code inside
+    paragraph = stats.rendering["ParagraphNode"].seconds
+    assert paragraph >= stats.rendering["CodeNode"].seconds
+
+
+def test_overridden_methods_are_timed():
+    stats = Stats()
+    tree = MarkdownParser().parse(SOURCE)
+    assert tree.render(Shouting(stats=stats)) == tree.render(Shouting())
+    # The whole override, the default it calls only times the children
+    assert stats.rendering["BoldNode"].count == 2
+    assert stats.rendering["TextNode"].count > 0
+
+
+def test_stats_are_not_part_of_the_identity():
+    assert HtmlRenderer(stats=Stats()).identity() == HtmlRenderer().identity()
+    assert compile_renderer(HtmlRenderer(stats=Stats())).identity() == (
+        HtmlRenderer().identity()
+    )
+
+
+def test_disabled_by_default():
+    parser, renderer = MarkdownParser(), HtmlRenderer()
+    assert parser.stats is None and renderer.stats is None
+
+
+def test_export_merge_and_pickle():
+    stats = Stats()
+    MarkdownParser(stats=stats).parse(SOURCE).render(HtmlRenderer(stats=stats))
+    exported = stats.as_dict()
+    assert exported["parse.HeaderNode.count"] == 1
+    assert exported["render.BoldNode.count"] == 2
+    assert "render.TextNode.seconds" in exported
+    assert "parsing" not in stats.report()
+    assert "  inline" in stats.report()
+
+    total = pickle.loads(pickle.dumps(stats))
+    total.merge(stats)
+    assert total.as_dict()["parse.HeaderNode.count"] == 2
+    total.clear()
+    assert total.as_dict() == {}
+
+
+def test_custom_record_callback():
+    received = []
+
+    class Forwarding(Stats):
+        def record(
+            self: Self, section: str, name: str, seconds: float, count: int = 1
+        ) -> None:
+            received.append((section, name, count))
+            super().record(section, name, seconds, count)
+
+    MarkdownParser(stats=Forwarding()).parse("# Title")
+    assert ("parse", "HeaderNode", 1) in received
@@ -0,0 +1,65 @@
+import random
+from collections.abc import Iterator
+
+import pytest
+
+from meltdown import MarkdownParser, MarkdownTree
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+
+def parse_streamed(source: str) -> MarkdownTree:
+    stream = MarkdownParser().parse_iter(source.splitlines(keepends=True))
+    return MarkdownTree(stream.metadata, list(stream))
+
+
+def assert_same_tree(source: str):
+    expected = MarkdownParser().parse(source).dump()
+    assert parse_streamed(source).dump() == expected
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_parse(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        assert_same_tree(f.read())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_input_matches_parse(seed: int):
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 80)))
+        assert_same_tree(source)
+
+
+def test_empty():
+    stream = MarkdownParser().parse_iter([])
+    assert stream.metadata == {}
+    assert list(stream) == []
+
+
+@pytest.mark.parametrize("source", ["\n\n", "\n\n\n\n", "\n\n\n\nOne\n\n"])
+def test_starts_with_blank_lines(source: str):
+    assert_same_tree(source)
+
+
+def test_blocks_arrive_before_end_of_input():
+    read: list[str] = []
+
+    def lines() -> Iterator[str]:
+        for line in ["---\n", "title: Streaming\n", "---\n", "# One\n", "\n"]:
+            read.append(line)
+            yield line
+        for line in ["Two\n", "\n", "```\n", "\n", "code\n", "```\n"]:
+            read.append(line)
+            yield line
+
+    stream = MarkdownParser().parse_iter(lines())
+    assert stream.metadata == {"title": "Streaming"}
+
+    blocks = iter(stream)
+    assert next(blocks).dump() == 'HeaderNode size:1\n    TextNode "One"\n'
+    assert len(read) == 5
+    next(blocks)
+    assert len(read) == 7
+    assert next(blocks).dump() == 'CodeBlock language:None code:"code"\n'
@@ -0,0 +1,136 @@
+import importlib
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Self
+
+import pytest
+
+from meltdown import BuildReport, HtmlRenderer, MarkdownTree, SiteWatcher, parse
+
+watch_module = importlib.import_module("meltdown.Watch")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_diff_turns_old_into_new(seed: int):
+    rng = random.Random(seed)
+    for _ in range(200):
+        old = "".join(rng.choices("ab\n", k=rng.randint(0, 20)))
+        new = "".join(rng.choices("ab\n", k=rng.randint(0, 20)))
+        offset, deleted, inserted = watch_module._diff(old, new)
+        assert old[:offset] + inserted + old[offset + deleted :] == new
+
+
+def test_diff_is_minimal():
+    assert watch_module._diff("Hello world", "Hello big world") == (6, 0, "big ")
+    assert watch_module._diff("aaaa", "aaaa") == (4, 0, "")
+
+
+@pytest.fixture
+def site(tmp_path: Path) -> Path:
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "index.md").write_text("# Home\n\nFirst\n\nSecond")
+    return tmp_path
+
+
+def test_update_reuses_the_previous_tree(site: Path):
+    watcher = SiteWatcher(site / "src", site / "out")
+    index = site / "src" / "index.md"
+    output = site / "out" / "index.html"
+
+    assert watcher.update({str(index)}).rendered == 1
+    first = watcher._trees["index.md"]
+    assert output.read_text() == parse(index.read_text()).render()
+
+    index.write_text("# Home\n\nFirst\n\nSecond *edit*")
+    assert watcher.update({str(index)}).rendered == 1
+    second = watcher._trees["index.md"]
+    assert second.children[0] is first.children[0]
+    assert output.read_text() == parse(index.read_text()).render()
+
+    assert watcher.update({str(index)}).unchanged == 1
+
+    index.unlink()
+    assert watcher.update({str(index)}).removed == 1
+    assert not output.exists()
+
+
+def test_update_ignores_other_files(site: Path):
+    (site / "src" / "image.png").write_bytes(b"")
+    report = SiteWatcher(site / "src", site / "out").update(
+        {str(site / "src" / "image.png"), str(site / "elsewhere.md")}
+    )
+    assert (report.rendered, report.unchanged, report.removed) == (0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "use_inotify",
+    [
+        False,
+        pytest.param(
+            True,
+            marks=pytest.mark.skipif(
+                not sys.platform.startswith("linux"), reason="inotify is Linux only"
+            ),
+        ),
+    ],
+)
+def test_run_renders_changes(site: Path, use_inotify: bool):
+    executor = ThreadPoolExecutor(1)
+    watcher = SiteWatcher(
+        site / "src",
+        site / "out",
+        executor=executor,
+        debounce=0.05,
+        poll_interval=0.01,
+        use_inotify=use_inotify,
+    )
+    reports: list[BuildReport] = []
+    stop = threading.Event()
+    thread = threading.Thread(target=watcher.run, args=(reports.append, stop))
+    thread.start()
+    try:
+        wait_for(lambda: len(reports) == 1)
+        assert reports[0].rendered == 1
+
+        (site / "src" / "posts").mkdir()
+        time.sleep(0.05)
+        (site / "src" / "posts" / "new.md").write_text("*New*")
+        (site / "src" / "index.md").write_text("# Changed")
+        wait_for(lambda: (site / "out" / "posts" / "new.html").exists())
+        wait_for(
+            lambda: (site / "out" / "index.html").read_text() == "<h1>Changed</h1>\n"
+        )
+        assert (site / "out" / "posts" / "new.html").read_text() == (
+            "<p><em>New</em></p>\n"
+        )
+    finally:
+        stop.set()
+        thread.join()
+        executor.shutdown()
+
+
+def wait_for(condition, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+class WrappingHtmlRenderer(HtmlRenderer):
+    def visit_tree(self: Self, node: MarkdownTree) -> str:
+        return "<main>" + super().visit_tree(node) + "</main>"
+
+
+def test_update_honors_visit_tree(site: Path):
+    watcher = SiteWatcher(site / "src", site / "out", WrappingHtmlRenderer())
+    index = site / "src" / "index.md"
+    watcher.update({str(index)})
+    index.write_text("# Home\n\nFirst\n\nSecond *edit*")
+    watcher.update({str(index)})
+
+    expected = parse(index.read_text()).render(WrappingHtmlRenderer())
+    assert (site / "out" / "index.html").read_text() == expected
@@ -0,0 +1,87 @@
+import importlib
+import random
+import tracemalloc
+
+import pytest
+
+from meltdown import (
+    CodeBlockNode,
+    MarkdownParser,
+    SourceCodeBlockNode,
+    SourceCommentNode,
+    SourceTextNode,
+    TextNode,
+)
+from tests.test_blog import get_test_cases
+from tests.test_inline_parser import FRAGMENTS
+
+parser_module = importlib.import_module("meltdown.MarkdownParser")
+
+
+def assert_same_as_copying(source: str):
+    expected = MarkdownParser().parse(source)
+    tree = MarkdownParser(zero_copy=True).parse(source)
+    assert tree == expected
+    assert tree.dump() == expected.dump()
+    assert tree.render() == expected.render()
+
+
+@pytest.mark.parametrize("input_file", get_test_cases())
+def test_blog_matches_copying_parser(input_file: str):
+    with open(input_file, encoding="utf-8") as f:
+        assert_same_as_copying(f.read())
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_fuzzed_input_matches_copying_parser(
+    seed: int, monkeypatch: pytest.MonkeyPatch
+):
+    # Share every string, however short, to exercise all the offsets.
+    monkeypatch.setattr(parser_module, "_MIN_SHARED_LENGTH", 1)
+    rng = random.Random(seed)
+    for _ in range(100):
+        source = "".join(rng.choices(FRAGMENTS, k=rng.randint(1, 60)))
+        assert_same_as_copying(source)
+
+
+def test_long_strings_point_into_the_source():
+    text = "A paragraph that is long enough to be worth sharing with the source."
+    code = "def f():\n    return 'long enough to be worth sharing, too'"
+    source = f"{text}\n\n```python\n\n{code}\n\n```\n\n<!-- {text} -->\n\nShort\n"
+    tree = MarkdownParser(zero_copy=True).parse(source)
+
+    paragraph, code_block, comment, short = tree.children
+    assert isinstance(paragraph.children[0], SourceTextNode)
+    assert paragraph.children[0].source is source
+    assert paragraph.children[0].text == text
+    assert isinstance(code_block, SourceCodeBlockNode)
+    assert code_block == CodeBlockNode("python", code)
+    assert isinstance(comment.children[0], SourceCommentNode)
+    assert comment.children[0].comment == f" {text} "
+    assert type(short.children[0]) is TextNode
+
+
+def test_assigning_replaces_the_shared_string():
+    source = "x" * 100
+    node = MarkdownParser(zero_copy=True).parse(source).children[0].children[0]
+    assert isinstance(node, SourceTextNode)
+    node.text = "changed"
+    assert node.text == "changed"
+    assert node.dump() == 'TextNode "changed"\n'
+
+
+def test_uses_less_memory():
+    with open(get_test_cases()[0], encoding="utf-8") as f:
+        source = f.read() * 20
+
+    def allocated(parser: MarkdownParser) -> int:
+        tracemalloc.start()
+        try:
+            tree = parser.parse(source)
+            size, _ = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del tree
+        return size
+
+    assert allocated(MarkdownParser(zero_copy=True)) < allocated(MarkdownParser())